@@ -14,6 +14,7 @@ sys.path.append(str(Path(__file__).resolve().parents[1]))
 from app.config import settings
 from app.database import Base
 from app.models import *  # Import all models
+from app.services.partition_service import is_partition
 
 # this is the Alembic Config object, which provides
 # access to the values within the .ini file in use.
@@ -33,6 +34,19 @@ if config.config_file_name is not None:
 # target_metadata = mymodel.Base.metadata
 target_metadata = Base.metadata
 
+
+
+def include_object(object, name, type_, reflected, compare_to):
+    """Leave order partitions (and what Postgres clones onto them) out of autogenerate"""
+    if type_ == "table":
+        return not is_partition(name)
+    if type_ == "index":
+        return not is_partition(object.table.name)
+    if type_ == "foreign_key_constraint":
+        return not is_partition(object.referred_table.name)
+    return True
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -58,6 +72,7 @@ def run_migrations_offline() -> None:
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
         version_table="quick_store__alembic_version",
+        include_object=include_object,
     )
 
     with context.begin_transaction():
@@ -82,6 +97,7 @@ def run_migrations_online() -> None:
             connection=connection,
             target_metadata=target_metadata,
             version_table="quick_store__alembic_version",
+            include_object=include_object,
         )
 
         with context.begin_transaction():
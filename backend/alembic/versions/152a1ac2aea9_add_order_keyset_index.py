@@ -0,0 +1,28 @@
+"""add order keyset index
+
+Revision ID: 152a1ac2aea9
+Revises: 194285429d4f
+Create Date: 2026-10-16 09:12:41.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '152a1ac2aea9'
+down_revision = '194285429d4f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Newest-first order listing per store, with id as the tie breaker
+    op.create_index(
+        'ix_quick_store__orders_store_created_id',
+        'quick_store__orders',
+        ['store_id', sa.text('created_at DESC'), sa.text('id DESC')]
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quick_store__orders_store_created_id', table_name='quick_store__orders')
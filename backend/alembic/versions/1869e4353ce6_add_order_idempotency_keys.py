@@ -0,0 +1,33 @@
+"""add order idempotency keys
+
+Revision ID: 1869e4353ce6
+Revises: 1dca6091765e
+Create Date: 2026-10-16 15:02:37.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '1869e4353ce6'
+down_revision = '1dca6091765e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'quick_store__order_idempotency_keys',
+        sa.Column('store_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('key', sa.String(length=255), nullable=False),
+        sa.Column('order_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('request_hash', sa.String(length=64), nullable=False),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['quick_store__stores.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('store_id', 'key')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('quick_store__order_idempotency_keys')
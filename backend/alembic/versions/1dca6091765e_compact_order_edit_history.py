@@ -0,0 +1,216 @@
+"""compact order edit history
+
+Revision ID: 1dca6091765e
+Revises: 986ee08064ea
+Create Date: 2026-10-16 14:20:08.337150
+
+"""
+import json
+from collections import defaultdict
+from decimal import Decimal
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '1dca6091765e'
+down_revision = '986ee08064ea'
+branch_labels = None
+depends_on = None
+
+
+def _dec(value):
+    return None if value is None else Decimal(str(value))
+
+
+def _snapshot_item(item):
+    """Item of a legacy previous_state snapshot in diff format"""
+    product_id = item.get("product_id")
+    return {
+        "product_id": None if product_id in (None, "None") else product_id,
+        "product_name": item["product_name"],
+        "quantity": str(_dec(item["quantity"])),
+        "price": str(_dec(item["price"])),
+    }
+
+
+def _item_key(item):
+    return (item.get("product_id"), _dec(item["quantity"]), _dec(item["price"]))
+
+
+def _diff(before, after):
+    """Diff turning state `before` into state `after` (lines matched by value)"""
+    changes = {}
+    fields = {}
+    if before["customer_name"] != after["customer_name"]:
+        fields["customer_name"] = {"from": before["customer_name"], "to": after["customer_name"]}
+    if _dec(before["total"]) != _dec(after["total"]):
+        fields["total"] = {"from": str(_dec(before["total"])), "to": str(_dec(after["total"]))}
+    if fields:
+        changes["fields"] = fields
+
+    remaining = list(after["items"])
+    removed = []
+    for item in before["items"]:
+        match = next((i for i, other in enumerate(remaining) if _item_key(other) == _item_key(item)), None)
+        if match is None:
+            removed.append(item)
+        else:
+            del remaining[match]
+
+    items = {}
+    if removed:
+        items["removed"] = removed
+    if remaining:
+        items["added"] = remaining
+    if items:
+        changes["items"] = items
+    return changes
+
+
+def _undo(state, changes):
+    """State before an edit, from the state after it and its diff"""
+    previous = {"customer_name": state["customer_name"], "total": state["total"], "items": list(state["items"])}
+    for name, value in changes.get("fields", {}).items():
+        previous[name] = value["from"]
+    items = changes.get("items", {})
+    for added in items.get("added", []):
+        for i, item in enumerate(previous["items"]):
+            if (added.get("id") and item.get("id") == added["id"]) or (
+                not added.get("id") and _item_key(item) == _item_key(added)
+            ):
+                del previous["items"][i]
+                break
+    for changed in items.get("changed", []):
+        for item in previous["items"]:
+            if item.get("id") == changed["id"]:
+                for name, value in changed.items():
+                    if name != "id":
+                        item[name] = value["from"]
+    previous["items"].extend(items.get("removed", []))
+    return previous
+
+
+def _current_states(conn, order_ids):
+    """Current content of orders, in diff format"""
+    states = {}
+    for order_id, customer_name, total in conn.execute(
+        sa.text("SELECT id, customer_name, total FROM quick_store__orders WHERE id = ANY(:ids)"),
+        {"ids": list(order_ids)}
+    ):
+        states[order_id] = {"customer_name": customer_name, "total": str(total), "items": []}
+    for row in conn.execute(
+        sa.text(
+            "SELECT id, order_id, product_id, product_name, quantity, price, sold_in_unit, base_unit, quantity_in_base "
+            "FROM quick_store__order_items WHERE order_id = ANY(:ids)"
+        ),
+        {"ids": list(order_ids)}
+    ):
+        states[row.order_id]["items"].append({
+            "id": str(row.id),
+            "product_id": str(row.product_id) if row.product_id else None,
+            "product_name": row.product_name,
+            "quantity": str(row.quantity),
+            "price": str(row.price),
+            "sold_in_unit": row.sold_in_unit,
+            "base_unit": row.base_unit,
+            "quantity_in_base": None if row.quantity_in_base is None else str(row.quantity_in_base),
+        })
+    return states
+
+
+def upgrade() -> None:
+    op.add_column('quick_store__order_edit_history', sa.Column('version', sa.Integer(), nullable=True))
+    op.add_column('quick_store__order_edit_history', sa.Column('changes', postgresql.JSONB(), nullable=True))
+
+    # Replace each full snapshot with the diff of its edit. Snapshot i is
+    # the state before edit i, so edit i turned it into snapshot i+1 (or
+    # into the current order for the last edit).
+    conn = op.get_bind()
+    edits = defaultdict(list)
+    for row in conn.execute(sa.text(
+        "SELECT id, order_id, previous_state FROM quick_store__order_edit_history ORDER BY order_id, edited_at, id"
+    )):
+        edits[row.order_id].append(row)
+
+    order_ids = list(edits)
+    for start in range(0, len(order_ids), 500):
+        batch = order_ids[start:start + 500]
+        states = _current_states(conn, batch)
+        for order_id in batch:
+            rows = edits[order_id]
+            snapshots = [
+                {
+                    "customer_name": row.previous_state.get("customer_name"),
+                    "total": row.previous_state.get("total"),
+                    "items": [_snapshot_item(item) for item in row.previous_state.get("items", [])],
+                }
+                for row in rows
+            ]
+            snapshots.append(states[order_id])
+            for version, row in enumerate(rows, start=1):
+                conn.execute(
+                    sa.text(
+                        "UPDATE quick_store__order_edit_history "
+                        "SET version = :version, changes = CAST(:changes AS JSONB) WHERE id = :id"
+                    ),
+                    {
+                        "version": version,
+                        "changes": json.dumps(_diff(snapshots[version - 1], snapshots[version])),
+                        "id": row.id,
+                    }
+                )
+
+    op.alter_column('quick_store__order_edit_history', 'version', nullable=False)
+    op.alter_column('quick_store__order_edit_history', 'changes', nullable=False)
+    op.drop_column('quick_store__order_edit_history', 'previous_state')
+    op.create_unique_constraint(
+        'unique_order_edit_version', 'quick_store__order_edit_history', ['order_id', 'version']
+    )
+
+
+def downgrade() -> None:
+    op.drop_constraint('unique_order_edit_version', 'quick_store__order_edit_history', type_='unique')
+    op.add_column('quick_store__order_edit_history', sa.Column('previous_state', postgresql.JSONB(), nullable=True))
+
+    # Rebuild full snapshots by undoing the diffs from the current order
+    conn = op.get_bind()
+    edits = defaultdict(list)
+    for row in conn.execute(sa.text(
+        "SELECT id, order_id, changes FROM quick_store__order_edit_history ORDER BY order_id, version DESC"
+    )):
+        edits[row.order_id].append(row)
+
+    order_ids = list(edits)
+    for start in range(0, len(order_ids), 500):
+        batch = order_ids[start:start + 500]
+        states = _current_states(conn, batch)
+        for order_id in batch:
+            state = states[order_id]
+            for row in edits[order_id]:
+                state = _undo(state, row.changes)
+                snapshot = {
+                    "customer_name": state["customer_name"],
+                    "total": float(state["total"]),
+                    "items": [
+                        {
+                            "product_id": str(item.get("product_id")),
+                            "product_name": item["product_name"],
+                            "quantity": float(item["quantity"]),
+                            "price": float(item["price"]),
+                        }
+                        for item in state["items"]
+                    ],
+                }
+                conn.execute(
+                    sa.text(
+                        "UPDATE quick_store__order_edit_history "
+                        "SET previous_state = CAST(:snapshot AS JSONB) WHERE id = :id"
+                    ),
+                    {"snapshot": json.dumps(snapshot), "id": row.id}
+                )
+
+    op.alter_column('quick_store__order_edit_history', 'previous_state', nullable=False)
+    op.drop_column('quick_store__order_edit_history', 'changes')
+    op.drop_column('quick_store__order_edit_history', 'version')
@@ -0,0 +1,173 @@
+"""partition orders by month
+
+Revision ID: 539882db9187
+Revises: 62a53a1e9955
+Create Date: 2026-10-16 18:41:09.552317
+
+"""
+from datetime import date, datetime
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '539882db9187'
+down_revision = '62a53a1e9955'
+branch_labels = None
+depends_on = None
+
+
+ORDERS = 'quick_store__orders'
+ITEMS = 'quick_store__order_items'
+HISTORY = 'quick_store__order_edit_history'
+KEYS = 'quick_store__order_idempotency_keys'
+
+CURRENT_XID = sa.text("(pg_current_xact_id()::text::bigint)")
+MONTHS_AHEAD = 3
+
+ORDER_INDEXES = (
+    ('ix_quick_store__orders_created_at', ['created_at']),
+    ('ix_quick_store__orders_store_id', ['store_id']),
+    ('ix_quick_store__orders_store_created_id', ['store_id', sa.text('created_at DESC'), sa.text('id DESC')]),
+    ('ix_quick_store__orders_store_change', ['store_id', 'change_xid']),
+)
+ITEM_INDEXES = (
+    ('ix_quick_store__order_items_order_id', ['order_id']),
+)
+
+ORDER_COLUMNS = "id, store_id, customer_name, total, is_paid, is_edited, created_at, created_by, updated_at, change_xid"
+ITEM_COLUMNS = "id, order_id, product_id, product_name, quantity, price, sold_in_unit, base_unit, quantity_in_base"
+
+
+def _add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _create_orders(partitioned):
+    op.create_table(ORDERS,
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('store_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('customer_name', sa.String(), nullable=True),
+    sa.Column('total', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('is_paid', sa.Boolean(), nullable=False),
+    sa.Column('is_edited', sa.Boolean(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('created_by', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.Column('change_xid', sa.BigInteger(), server_default=CURRENT_XID, nullable=False),
+    sa.ForeignKeyConstraint(['created_by'], ['quick_store__users.id']),
+    sa.ForeignKeyConstraint(['store_id'], ['quick_store__stores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'created_at') if partitioned else sa.PrimaryKeyConstraint('id'),
+    **({'postgresql_partition_by': 'RANGE (created_at)'} if partitioned else {})
+    )
+    for name, columns in ORDER_INDEXES:
+        op.create_index(name, ORDERS, columns)
+
+
+def _create_items(partitioned):
+    op.create_table(ITEMS,
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('order_id', postgresql.UUID(as_uuid=True), nullable=False),
+    *([sa.Column('order_created_at', sa.DateTime(), nullable=False)] if partitioned else []),
+    sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('quantity', sa.Numeric(precision=14, scale=4), nullable=False),
+    sa.Column('price', sa.Numeric(precision=10, scale=2), nullable=False),
+    sa.Column('sold_in_unit', sa.String(length=10), nullable=True),
+    sa.Column('base_unit', sa.String(length=10), nullable=True),
+    sa.Column('quantity_in_base', sa.Numeric(precision=14, scale=4), nullable=True),
+    sa.ForeignKeyConstraint(
+        ['order_id', 'order_created_at'], [f'{ORDERS}.id', f'{ORDERS}.created_at'],
+        ondelete='CASCADE', onupdate='CASCADE'
+    ) if partitioned else sa.ForeignKeyConstraint(['order_id'], [f'{ORDERS}.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['product_id'], ['quick_store__products.id'], ondelete='SET NULL'),
+    sa.PrimaryKeyConstraint('id', 'order_created_at') if partitioned else sa.PrimaryKeyConstraint('id'),
+    **({'postgresql_partition_by': 'RANGE (order_created_at)'} if partitioned else {})
+    )
+    for name, columns in ITEM_INDEXES:
+        op.create_index(name, ITEMS, columns)
+
+
+def _move_aside(table, indexes):
+    """Rename a table to <table>_old and free its index names"""
+    op.rename_table(table, f'{table}_old')
+    for name, _ in indexes:
+        op.drop_index(name, table_name=f'{table}_old')
+    op.drop_constraint(f'{table}_pkey', f'{table}_old', type_='primary')
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+
+    op.drop_constraint(f'{ITEMS}_order_id_fkey', ITEMS, type_='foreignkey')
+    op.drop_constraint(f'{HISTORY}_order_id_fkey', HISTORY, type_='foreignkey')
+    _move_aside(ORDERS, ORDER_INDEXES)
+    _move_aside(ITEMS, ITEM_INDEXES)
+
+    _create_orders(partitioned=True)
+    _create_items(partitioned=True)
+
+    # One partition per month from the oldest order to a few months ahead,
+    # plus a default partition for anything outside them
+    oldest = conn.scalar(sa.text(f"SELECT min(created_at) FROM {ORDERS}_old"))
+    current = datetime.utcnow().date().replace(day=1)
+    month = (oldest.date() if oldest else current).replace(day=1)
+    while month <= _add_months(current, MONTHS_AHEAD):
+        end = _add_months(month, 1)
+        for table in (ORDERS, ITEMS):
+            op.execute(
+                f"CREATE TABLE {table}_p{month:%Y%m} PARTITION OF {table} "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+            )
+        month = end
+    for table in (ORDERS, ITEMS):
+        op.execute(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT")
+
+    op.execute(f"INSERT INTO {ORDERS} ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM {ORDERS}_old")
+    op.execute(
+        f"INSERT INTO {ITEMS} ({ITEM_COLUMNS}, order_created_at) "
+        f"SELECT {', '.join('i.' + c for c in ITEM_COLUMNS.split(', '))}, o.created_at "
+        f"FROM {ITEMS}_old i JOIN {ORDERS}_old o ON o.id = i.order_id"
+    )
+
+    op.add_column(HISTORY, sa.Column('order_created_at', sa.DateTime(), nullable=True))
+    op.execute(
+        f"UPDATE {HISTORY} h SET order_created_at = o.created_at FROM {ORDERS}_old o WHERE o.id = h.order_id"
+    )
+    op.alter_column(HISTORY, 'order_created_at', nullable=False)
+    op.create_foreign_key(
+        f'{HISTORY}_order_id_order_created_at_fkey', HISTORY, ORDERS,
+        ['order_id', 'order_created_at'], ['id', 'created_at'],
+        ondelete='CASCADE', onupdate='CASCADE'
+    )
+
+    op.drop_table(f'{ITEMS}_old')
+    op.drop_table(f'{ORDERS}_old')
+
+    # Order ids are only unique per partition now; client-generated ones
+    # stay unique through the keys they are claimed under
+    op.create_unique_constraint(f'{KEYS}_order_id_key', KEYS, ['order_id'])
+
+
+def downgrade() -> None:
+    op.drop_constraint(f'{KEYS}_order_id_key', KEYS, type_='unique')
+    op.drop_constraint(f'{HISTORY}_order_id_order_created_at_fkey', HISTORY, type_='foreignkey')
+    op.drop_constraint(f'{ITEMS}_order_id_order_created_at_fkey', ITEMS, type_='foreignkey')
+    _move_aside(ORDERS, ORDER_INDEXES)
+    _move_aside(ITEMS, ITEM_INDEXES)
+
+    _create_orders(partitioned=False)
+    _create_items(partitioned=False)
+    op.execute(f"INSERT INTO {ORDERS} ({ORDER_COLUMNS}) SELECT {ORDER_COLUMNS} FROM {ORDERS}_old")
+    op.execute(f"INSERT INTO {ITEMS} ({ITEM_COLUMNS}) SELECT {ITEM_COLUMNS} FROM {ITEMS}_old")
+
+    # Dropping the partitioned tables drops their partitions
+    op.drop_table(f'{ITEMS}_old')
+    op.drop_table(f'{ORDERS}_old')
+
+    op.drop_column(HISTORY, 'order_created_at')
+    op.create_foreign_key(
+        f'{HISTORY}_order_id_fkey', HISTORY, ORDERS, ['order_id'], ['id'], ondelete='CASCADE'
+    )
@@ -0,0 +1,88 @@
+"""add daily sales rollups
+
+Revision ID: 62a53a1e9955
+Revises: 776ead718d62
+Create Date: 2026-10-16 17:52:31.406218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '62a53a1e9955'
+down_revision = '776ead718d62'
+branch_labels = None
+depends_on = None
+
+
+# Business day of an order, as computed by BusinessDayService
+BUSINESS_DAY = (
+    "((timezone(s.timezone, timezone('UTC', o.created_at)) - s.business_day_start::interval)::date)"
+)
+
+
+def upgrade() -> None:
+    # unique_daily_product_sales is UNIQUE NULLS NOT DISTINCT (one row per
+    # day for deleted products, product_id NULL): PostgreSQL 15 or later
+    server_version = op.get_bind().dialect.server_version_info
+    if server_version is not None and server_version < (15,):
+        raise RuntimeError("The daily sales rollups need PostgreSQL 15 or later (UNIQUE NULLS NOT DISTINCT)")
+
+    op.create_table('quick_store__daily_sales',
+    sa.Column('store_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('business_day', sa.Date(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('paid_count', sa.Integer(), nullable=False),
+    sa.Column('paid_revenue', sa.Numeric(precision=14, scale=2), nullable=False),
+    sa.Column('edited_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['store_id'], ['quick_store__stores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('store_id', 'business_day')
+    )
+    op.create_table('quick_store__daily_product_sales',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('store_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('business_day', sa.Date(), nullable=False),
+    sa.Column('product_id', postgresql.UUID(as_uuid=True), nullable=True),
+    sa.Column('product_name', sa.String(), nullable=False),
+    sa.Column('base_unit', sa.String(length=10), nullable=True),
+    sa.Column('quantity', sa.Numeric(precision=18, scale=4), nullable=False),
+    sa.Column('quantity_in_base', sa.Numeric(precision=18, scale=4), nullable=False),
+    sa.Column('revenue', sa.Numeric(precision=20, scale=6), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['store_id'], ['quick_store__stores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('store_id', 'business_day', 'product_id', name='unique_daily_product_sales', postgresql_nulls_not_distinct=True)
+    )
+
+    # Backfill from the existing orders
+    op.execute(f"""
+        INSERT INTO quick_store__daily_sales
+            (store_id, business_day, order_count, revenue, paid_count, paid_revenue, edited_count)
+        SELECT o.store_id, {BUSINESS_DAY}, count(*), sum(o.total),
+               count(*) FILTER (WHERE o.is_paid), coalesce(sum(o.total) FILTER (WHERE o.is_paid), 0),
+               count(*) FILTER (WHERE o.is_edited)
+        FROM quick_store__orders o
+        JOIN quick_store__stores s ON s.id = o.store_id
+        GROUP BY o.store_id, {BUSINESS_DAY}
+    """)
+    op.execute(f"""
+        INSERT INTO quick_store__daily_product_sales
+            (id, store_id, business_day, product_id, product_name, base_unit,
+             quantity, quantity_in_base, revenue, order_count)
+        SELECT gen_random_uuid(), o.store_id, {BUSINESS_DAY}, i.product_id,
+               (array_agg(i.product_name ORDER BY o.created_at DESC))[1],
+               (array_agg(i.base_unit ORDER BY o.created_at DESC))[1],
+               sum(i.quantity), sum(coalesce(i.quantity_in_base, i.quantity)),
+               sum(i.price * i.quantity), count(DISTINCT o.id)
+        FROM quick_store__order_items i
+        JOIN quick_store__orders o ON o.id = i.order_id
+        JOIN quick_store__stores s ON s.id = o.store_id
+        GROUP BY o.store_id, {BUSINESS_DAY}, i.product_id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('quick_store__daily_product_sales')
+    op.drop_table('quick_store__daily_sales')
@@ -0,0 +1,66 @@
+"""add sync change tracking
+
+Revision ID: 776ead718d62
+Revises: 1869e4353ce6
+Create Date: 2026-10-16 16:47:12.093561
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '776ead718d62'
+down_revision = '1869e4353ce6'
+branch_labels = None
+depends_on = None
+
+
+CURRENT_XID = sa.text("(pg_current_xact_id()::text::bigint)")
+
+SYNCED_TABLES = (
+    'quick_store__products',
+    'quick_store__combos',
+    'quick_store__orders',
+    'quick_store__customer_names',
+)
+TABLES_WITH_UPDATED_AT = ('quick_store__products', 'quick_store__combos', 'quick_store__orders')
+
+
+def upgrade() -> None:
+    for table in TABLES_WITH_UPDATED_AT:
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), nullable=True))
+        op.execute(f"UPDATE {table} SET updated_at = created_at")
+        op.alter_column(table, 'updated_at', nullable=False)
+
+    # Existing rows are stamped with this migration's transaction id
+    for table in SYNCED_TABLES:
+        op.add_column(table, sa.Column('change_xid', sa.BigInteger(), server_default=CURRENT_XID, nullable=False))
+        op.create_index(f'ix_{table}_store_change', table, ['store_id', 'change_xid'])
+
+    op.create_table(
+        'quick_store__sync_tombstones',
+        sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('store_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('entity_id', postgresql.UUID(as_uuid=True), nullable=False),
+        sa.Column('change_xid', sa.BigInteger(), server_default=CURRENT_XID, nullable=False),
+        sa.Column('deleted_at', sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(['store_id'], ['quick_store__stores.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(
+        'ix_quick_store__sync_tombstones_store_change',
+        'quick_store__sync_tombstones',
+        ['store_id', 'change_xid']
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_quick_store__sync_tombstones_store_change', table_name='quick_store__sync_tombstones')
+    op.drop_table('quick_store__sync_tombstones')
+    for table in SYNCED_TABLES:
+        op.drop_index(f'ix_{table}_store_change', table_name=table)
+        op.drop_column(table, 'change_xid')
+    for table in TABLES_WITH_UPDATED_AT:
+        op.drop_column(table, 'updated_at')
@@ -0,0 +1,25 @@
+"""add store change versions
+
+Revision ID: 7a429e316991
+Revises: f8ff14ff9b48
+Create Date: 2026-10-17 11:26:48.140275
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '7a429e316991'
+down_revision = 'f8ff14ff9b48'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('quick_store__stores', sa.Column('orders_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+    op.add_column('quick_store__stores', sa.Column('customers_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('quick_store__stores', 'customers_version')
+    op.drop_column('quick_store__stores', 'orders_version')
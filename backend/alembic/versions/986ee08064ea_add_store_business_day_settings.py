@@ -0,0 +1,34 @@
+"""add store business day settings
+
+Revision ID: 986ee08064ea
+Revises: 152a1ac2aea9
+Create Date: 2026-10-16 11:03:27.551902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '986ee08064ea'
+down_revision = '152a1ac2aea9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing stores keep today's behaviour: UTC days starting at midnight.
+    # Day range filters on created_at are served by
+    # ix_quick_store__orders_store_created_id (store_id, created_at DESC, id DESC).
+    op.add_column(
+        'quick_store__stores',
+        sa.Column('timezone', sa.String(64), nullable=False, server_default='UTC')
+    )
+    op.add_column(
+        'quick_store__stores',
+        sa.Column('business_day_start', sa.Time(), nullable=False, server_default=sa.text("'00:00'"))
+    )
+
+
+def downgrade() -> None:
+    op.drop_column('quick_store__stores', 'business_day_start')
+    op.drop_column('quick_store__stores', 'timezone')
@@ -0,0 +1,54 @@
+"""add order archive
+
+Revision ID: db9dcb237373
+Revises: 539882db9187
+Create Date: 2026-10-17 09:14:52.604118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'db9dcb237373'
+down_revision = '539882db9187'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('quick_store__order_archive_segments',
+    sa.Column('id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('store_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('path', sa.String(), nullable=False),
+    sa.Column('order_count', sa.Integer(), nullable=False),
+    sa.Column('first_created_at', sa.DateTime(), nullable=False),
+    sa.Column('last_created_at', sa.DateTime(), nullable=False),
+    sa.Column('size', sa.BigInteger(), nullable=False),
+    sa.Column('sha256', sa.String(length=64), nullable=False),
+    sa.Column('archived_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['store_id'], ['quick_store__stores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('store_id', 'month', name='unique_order_archive_segment')
+    )
+    op.create_table('quick_store__archived_orders',
+    sa.Column('store_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('order_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('segment_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['segment_id'], ['quick_store__order_archive_segments.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['store_id'], ['quick_store__stores.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('store_id', 'order_id')
+    )
+    op.create_index(op.f('ix_quick_store__archived_orders_segment_id'), 'quick_store__archived_orders', ['segment_id'], unique=False)
+    op.add_column('quick_store__stores', sa.Column('archived_until', sa.DateTime(), nullable=True))
+    op.add_column('quick_store__companies', sa.Column('order_retention_months', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('quick_store__companies', 'order_retention_months')
+    op.drop_column('quick_store__stores', 'archived_until')
+    op.drop_index(op.f('ix_quick_store__archived_orders_segment_id'), table_name='quick_store__archived_orders')
+    op.drop_table('quick_store__archived_orders')
+    op.drop_table('quick_store__order_archive_segments')
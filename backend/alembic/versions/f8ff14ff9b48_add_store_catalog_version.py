@@ -0,0 +1,23 @@
+"""add store catalog version
+
+Revision ID: f8ff14ff9b48
+Revises: db9dcb237373
+Create Date: 2026-10-17 10:02:37.918344
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = 'f8ff14ff9b48'
+down_revision = 'db9dcb237373'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('quick_store__stores', sa.Column('catalog_version', sa.Integer(), server_default=sa.text('0'), nullable=False))
+
+
+def downgrade() -> None:
+    op.drop_column('quick_store__stores', 'catalog_version')
@@ -0,0 +1,162 @@
+"""
+Cross-worker cache invalidation for QuickStore.
+
+In-process caches (the tenant cache, catalog snapshots, the unit
+registry) live in every uvicorn worker and container. Write paths that
+change cached data publish invalidation tags (e.g. "store:<id>") with
+publish(): the tags are sent with NOTIFY in the writing transaction, so
+Postgres delivers them to every worker on commit and drops them on
+rollback, and they are evicted from this worker's caches right after
+the commit.
+
+Each worker receives them on its shared LISTEN connection (pg_listener.py,
+opened at startup by CacheInvalidationBus.start) and evicts them from the
+registered caches. While that connection is down, invalidations can be
+missed: registered caches are cleared and their TTL is capped at
+CACHE_INVALIDATION_FALLBACK_TTL_SECONDS until it is back, and cleared
+again when it is. Behind a transaction-mode pooler without
+LISTEN_DATABASE_URL it never connects, so the caches keep the fallback TTL.
+"""
+import json
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .cache import TTLCache
+from .config import settings
+from .pg_listener import PgListener, pg_listener
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_INVALIDATION_CHANNEL = "quick_store__cache_invalidation"
+
+# Session.info key of the tags published in the current transaction
+_PENDING_KEY = "cache_invalidations"
+
+
+class CacheInvalidationBus:
+    """Evicts tags invalidated by any worker from this worker's registered caches"""
+
+    def __init__(self, listener: Optional[PgListener] = None, fallback_ttl: Optional[float] = None):
+        self.listener = listener or pg_listener
+        self.fallback_ttl = settings.CACHE_INVALIDATION_FALLBACK_TTL_SECONDS if fallback_ttl is None else fallback_ttl
+        self._caches: Dict[TTLCache, float] = {}  # Cache -> its configured TTL
+        self._handlers: Dict[str, List[Callable[[], None]]] = {}
+        self._started = False
+        self.listener.add_channel(
+            CACHE_INVALIDATION_CHANNEL,
+            self._dispatch,
+            on_connect=lambda: self._set_degraded(False),
+            on_disconnect=lambda: self._set_degraded(True)
+        )
+
+    def register(self, cache: TTLCache) -> TTLCache:
+        """Evict invalidated tags from a cache (returns the cache)"""
+        self._caches[cache] = cache.ttl
+        if self.degraded:
+            cache.ttl = min(cache.ttl, self.fallback_ttl)
+        return cache
+
+    def on_invalidate(self, tag: str, handler: Callable[[], None]) -> None:
+        """
+        Call handler when a tag is invalidated, for state that is not a TTLCache.
+
+        Handlers are also called after the connection was lost, since the
+        tag may have been missed.
+
+        Example:
+            >>> cache_bus.on_invalidate("units", reset_unit_registry)
+        """
+        self._handlers.setdefault(tag, []).append(handler)
+
+    @property
+    def degraded(self) -> bool:
+        """Started but not listening: invalidations from other workers may be missed"""
+        return self._started and not self.listener.connected
+
+    async def publish(self, db: AsyncSession, *tags: str) -> None:
+        """
+        Invalidate tags in every worker once the caller's transaction commits.
+
+        Args:
+            db: Database session; nothing is invalidated if it rolls back
+            tags: Cache tags, e.g. "user:<id>", "company:<id>", "store:<id>"
+
+        Example:
+            >>> await cache_bus.publish(db, f"store:{store.id}")
+            >>> await db.commit()
+        """
+        if not tags:
+            return
+        await db.execute(
+            text("SELECT pg_notify(:channel, :payload)"),
+            {"channel": CACHE_INVALIDATION_CHANNEL, "payload": json.dumps(sorted(set(tags)))}
+        )
+        # This worker evicts them right after the commit (see _after_commit),
+        # before its next request, rather than when its listener hears back
+        db.info.setdefault(_PENDING_KEY, {}).setdefault(self, set()).update(tags)
+
+    def evict(self, tags: Iterable[str]) -> None:
+        """Drop tagged entries from the registered caches of this worker"""
+        tags = tuple(tags)
+        for cache in self._caches:
+            cache.invalidate(*tags)
+        for tag in tags:
+            for handler in self._handlers.get(tag, ()):
+                handler()
+
+    def evict_all(self) -> None:
+        """Drop everything the registered caches and handlers hold"""
+        for cache in self._caches:
+            cache.clear()
+        for handlers in self._handlers.values():
+            for handler in handlers:
+                handler()
+
+    async def start(self) -> None:
+        """Start listening (at startup); caches use the fallback TTL until connected"""
+        if not self._started:
+            self._started = True
+            self._set_degraded(True)
+        await self.listener.start()
+
+    def stop(self) -> None:
+        """Stop evicting (at shutdown, before the listener) and restore the configured TTLs"""
+        self._started = False
+        for cache, ttl in self._caches.items():
+            cache.ttl = ttl
+
+    def _set_degraded(self, degraded: bool) -> None:
+        if not self._started:
+            return
+        for cache, ttl in self._caches.items():
+            cache.ttl = min(ttl, self.fallback_ttl) if degraded else ttl
+        # Entries cached before may be stale either way
+        self.evict_all()
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            tags = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed cache invalidation: %r", payload[:200])
+            return
+        self.evict(tags)
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session) -> None:
+    pending: Dict[CacheInvalidationBus, Set[str]] = session.info.pop(_PENDING_KEY, None) or {}
+    for bus, tags in pending.items():
+        bus.evict(tags)
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+cache_bus = CacheInvalidationBus()
@@ -0,0 +1 @@
+"""Maintenance commands, run as ``python -m app.commands.<name>``"""
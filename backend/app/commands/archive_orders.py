@@ -0,0 +1,34 @@
+"""
+Archive orders past their company's retention window.
+
+    python -m app.commands.archive_orders [--company ID]
+
+Moves the orders of every store-month older than the company's
+order_retention_months to segment files under ORDER_ARCHIVE_DIR.
+Companies without a retention window are left alone. Safe to run
+repeatedly, e.g. nightly from cron.
+"""
+import argparse
+import asyncio
+from uuid import UUID
+
+from ..database import AsyncSessionLocal
+from ..services.order_archive_service import OrderArchiveService
+
+
+async def archive_orders(company_id=None) -> None:
+    async with AsyncSessionLocal() as db:
+        segments = await OrderArchiveService.archive_due(db, company_id)
+    for segment in segments:
+        print(f"Archived {segment.month:%Y-%m} of store {segment.store_id}: {segment.order_count} orders in {segment.path}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Archive orders past their company's retention window")
+    parser.add_argument("--company", type=UUID, default=None, help="Only archive this company")
+    args = parser.parse_args()
+    asyncio.run(archive_orders(args.company))
+
+
+if __name__ == "__main__":
+    main()
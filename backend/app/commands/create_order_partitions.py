@@ -0,0 +1,32 @@
+"""
+Create the monthly order partitions ahead of time.
+
+    python -m app.commands.create_order_partitions [--months N]
+
+Creates the current month and the N following ones (default:
+ORDER_PARTITION_MONTHS_AHEAD). Safe to run repeatedly, e.g. daily from cron.
+"""
+import argparse
+import asyncio
+
+from ..database import AsyncSessionLocal
+from ..services.partition_service import PartitionService
+
+
+async def create_partitions(months_ahead=None) -> None:
+    async with AsyncSessionLocal() as db:
+        created = await PartitionService.ensure_partitions(db, months_ahead)
+        await db.commit()
+    for name in created:
+        print(f"Created {name}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Create the monthly order partitions ahead of time")
+    parser.add_argument("--months", type=int, default=None, help="Months to create after the current one")
+    args = parser.parse_args()
+    asyncio.run(create_partitions(args.months))
+
+
+if __name__ == "__main__":
+    main()
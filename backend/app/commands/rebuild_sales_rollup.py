@@ -0,0 +1,30 @@
+"""
+Recompute the daily sales rollups from the orders.
+
+    python -m app.commands.rebuild_sales_rollup [--store STORE_ID ...]
+
+Rebuilds every store by default, in one transaction.
+"""
+import argparse
+import asyncio
+from uuid import UUID
+
+from ..database import AsyncSessionLocal
+from ..services.sales_rollup_service import SalesRollupService
+
+
+async def rebuild(store_ids=None) -> None:
+    async with AsyncSessionLocal() as db:
+        await SalesRollupService.rebuild(db, store_ids)
+        await db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Recompute the daily sales rollups from the orders")
+    parser.add_argument("--store", dest="stores", type=UUID, action="append", help="Only rebuild this store (repeatable)")
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.stores))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,15 +2,52 @@ from pydantic_settings import BaseSettings
 from typing import List, Optional
 
 
+def make_async_url(url: str) -> str:
+    """Rewrite a postgresql:// URL to use the asyncpg driver"""
+    scheme, sep, rest = url.partition("://")
+    if scheme in ("postgresql", "postgres", "postgresql+psycopg2"):
+        return f"postgresql+asyncpg{sep}{rest}"
+    return url
+
+
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    # Async driver URL used by the API; derived from DATABASE_URL when unset
+    ASYNC_DATABASE_URL: Optional[str] = None
+    DATABASE_POOL_SIZE: int = 10
+    DATABASE_MAX_OVERFLOW: int = 20
+    # Disable asyncpg prepared statement caches (required behind PgBouncer
+    # in transaction mode, e.g. the Supabase transaction pooler)
+    DATABASE_PGBOUNCER: bool = False
+
+    # Direct (or session-mode pooler) connection for LISTEN (order events, cache
+    # invalidations); defaults to DATABASE_URL. Required with DATABASE_PGBOUNCER:
+    # LISTEN through a transaction-mode pooler succeeds but never receives anything
+    LISTEN_DATABASE_URL: Optional[str] = None
 
     # JWT
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 10080  # 7 days
 
+    # Tenant context cache (resolved user/company/store per token and headers)
+    TENANT_CACHE_TTL_SECONDS: int = 30
+    TENANT_CACHE_MAX_ENTRIES: int = 4096
+
+    # Catalog snapshots (products, combos and units per store and catalog version)
+    CATALOG_CACHE_TTL_SECONDS: int = 3600
+    CATALOG_CACHE_MAX_ENTRIES: int = 1024
+
+    # Cache TTL while a worker is not listening for invalidations (see cache_bus.py)
+    CACHE_INVALIDATION_FALLBACK_TTL_SECONDS: int = 5
+
+    # Monthly order partitions to keep created ahead of the current month
+    ORDER_PARTITION_MONTHS_AHEAD: int = 3
+
+    # Directory of archived order segments (see services/order_archive_service.py)
+    ORDER_ARCHIVE_DIR: str = "archive"
+
     # CORS
     CORS_ORIGINS: str = "http://localhost:5173"
 
@@ -28,6 +65,25 @@ class Settings(BaseSettings):
         env_file = ".env"
         case_sensitive = True
 
+    @property
+    def async_database_url(self) -> str:
+        if self.ASYNC_DATABASE_URL:
+            return self.ASYNC_DATABASE_URL
+        return make_async_url(self.DATABASE_URL)
+
+    @property
+    def listen_dsn(self) -> Optional[str]:
+        """LISTEN_DATABASE_URL (or DATABASE_URL) as a plain postgresql:// DSN for asyncpg
+
+        None behind PgBouncer in transaction mode without LISTEN_DATABASE_URL,
+        as DATABASE_URL then cannot receive notifications.
+        """
+        url = self.LISTEN_DATABASE_URL or (None if self.DATABASE_PGBOUNCER else self.DATABASE_URL)
+        if url is None:
+            return None
+        scheme, sep, rest = url.partition("://")
+        return f"postgresql{sep}{rest}"
+
     @property
     def cors_origins_list(self) -> List[str]:
         return [origin.strip() for origin in self.CORS_ORIGINS.split(",")]
@@ -1,24 +1,85 @@
-from fastapi import Depends, HTTPException, status, Header
+from fastapi import Depends, HTTPException, status, Header, Request, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select, inspect, case, literal, and_, false
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased, joinedload, make_transient_to_detached
+from sqlalchemy.orm.attributes import set_committed_value
+from dataclasses import dataclass
 from typing import Optional
 from uuid import UUID
 
+from .cache import TTLCache
+from .cache_bus import cache_bus
+from .config import settings
 from .database import get_db
 from .security import decode_access_token
+from .http_cache import PRIVATE_CACHE_HEADERS, etag_matches, make_etag
 from .models import User, Company, Store
 from .models.user import UserRole
+from .services.unit_registry import UnitRegistry, get_loaded_unit_registry, load_unit_registry
+from .services.store_version_service import StoreVersionService
+from .services.business_day_service import BusinessDayService
 
 security = HTTPBearer()
 
+# Resolved users, companies and stores, keyed by token subject and tenant
+# headers. Entries hold plain column snapshots, never session-bound objects.
+tenant_cache = cache_bus.register(TTLCache(
+    "tenant",
+    maxsize=settings.TENANT_CACHE_MAX_ENTRIES,
+    ttl=settings.TENANT_CACHE_TTL_SECONDS
+))
 
-async def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-) -> User:
-    """Get the current authenticated user from JWT token"""
-    token = credentials.credentials
-    payload = decode_access_token(token)
+
+async def invalidate_user(db: AsyncSession, user_id) -> None:
+    """Drop cached tenant contexts resolved for a user, in every worker, when db commits"""
+    await cache_bus.publish(db, f"user:{user_id}")
+
+
+async def invalidate_company(db: AsyncSession, company_id) -> None:
+    """Drop cached tenant contexts that include a company, in every worker, when db commits"""
+    await cache_bus.publish(db, f"company:{company_id}")
+
+
+async def invalidate_store(db: AsyncSession, store_id) -> None:
+    """Drop cached tenant contexts that include a store, in every worker, when db commits"""
+    await cache_bus.publish(db, f"store:{store_id}")
+
+
+@dataclass
+class TenantContext:
+    """The user, company and store a request acts on"""
+    user: User
+    company: Optional[Company] = None
+    store: Optional[Store] = None
+
+
+def _snapshot(obj) -> Optional[dict]:
+    """Column values of an ORM object"""
+    if obj is None:
+        return None
+    return {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs}
+
+
+def _detached(model, values: Optional[dict]):
+    """Rebuild a detached instance from a column snapshot"""
+    if values is None:
+        return None
+    obj = model(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def _parse_uuid(value: Optional[str]) -> Optional[UUID]:
+    try:
+        return UUID(value) if value else None
+    except (ValueError, AttributeError):
+        return None
+
+
+def _token_subject(credentials: HTTPAuthorizationCredentials) -> str:
+    """Validate the bearer token and return its subject (user id)"""
+    payload = decode_access_token(credentials.credentials)
 
     if payload is None:
         raise HTTPException(
@@ -34,13 +95,37 @@ async def get_current_user(
             detail="Invalid authentication credentials",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    return user_id
 
-    user = db.query(User).options(joinedload(User.company)).filter(User.id == UUID(user_id)).first()
-    if user is None:
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="User not found",
-            headers={"WWW-Authenticate": "Bearer"},
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db)
+) -> User:
+    """Get the current authenticated user from JWT token"""
+    user_id = _token_subject(credentials)
+
+    cache_key = ("user", user_id)
+    cached = tenant_cache.get(cache_key)
+    if cached is not None:
+        user_values, company_values = cached
+        user = _detached(User, user_values)
+        set_committed_value(user, "company", _detached(Company, company_values))
+        user = await db.merge(user, load=False)
+    else:
+        user = await db.scalar(
+            select(User).options(joinedload(User.company)).where(User.id == UUID(user_id))
+        )
+        if user is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="User not found",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        tenant_cache.set(
+            cache_key,
+            (_snapshot(user), _snapshot(user.company)),
+            tags=(f"user:{user.id}", f"company:{user.company_id}")
         )
 
     if not user.is_active:
@@ -64,91 +149,227 @@ async def get_current_admin_user(
     return current_user
 
 
-async def get_current_company(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db),
-    x_company_id: Optional[str] = Header(None, alias="X-Company-ID")
-) -> Company:
-    """Get the company for the current user
+async def _resolve_tenant(
+    db: AsyncSession,
+    user_id: str,
+    x_company_id: Optional[str],
+    x_store_id: Optional[str],
+    with_store: bool
+) -> TenantContext:
+    """Resolve user, company and (optionally) store with a single SELECT
 
-    For admin users, X-Company-ID header is required to specify which company to access.
-    For regular users, their assigned company is used.
+    Admins act on the company named by X-Company-ID, everyone else on their
+    own company. The store is the one named by X-Store-ID, or else the
+    company's first store.
     """
-    if current_user.role == UserRole.ADMIN:
+    company_uuid = _parse_uuid(x_company_id)
+    store_uuid = _parse_uuid(x_store_id)
+
+    cache_key = ("tenant", user_id, x_company_id, x_store_id if with_store else False)
+    cached = tenant_cache.get(cache_key)
+    if cached is not None:
+        user_values, user_company_values, company_values, store_values = cached
+        user = _detached(User, user_values)
+        set_committed_value(user, "company", _detached(Company, user_company_values))
+        user = await db.merge(user, load=False)
+        company = _detached(Company, company_values)
+        store = _detached(Store, store_values)
+        return TenantContext(
+            user=user,
+            company=await db.merge(company, load=False) if company else None,
+            store=await db.merge(store, load=False) if store else None
+        )
+
+    UserCompany = aliased(Company)
+    company_match = Company.id == case(
+        (User.role == UserRole.ADMIN, literal(company_uuid, Company.id.type)),
+        else_=User.company_id
+    )
+    query = (
+        select(User, UserCompany, Company)
+        .outerjoin(UserCompany, UserCompany.id == User.company_id)
+        .outerjoin(Company, company_match)
+        .where(User.id == UUID(user_id))
+    )
+    if with_store:
+        store_match = Store.company_id == Company.id
+        if x_store_id:
+            store_match = and_(store_match, Store.id == store_uuid) if store_uuid else false()
+        query = query.add_columns(Store).outerjoin(Store, store_match)
+
+    row = (await db.execute(query.limit(1))).first()
+    if row is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+    user, user_company, company = row[0], row[1], row[2]
+    store = row[3] if with_store else None
+    set_committed_value(user, "company", user_company)
+
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="User account is inactive"
+        )
+
+    if user.role == UserRole.ADMIN:
         if not x_company_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Admin users must provide X-Company-ID header to access a company"
             )
-        try:
-            company_uuid = UUID(x_company_id)
-        except (ValueError, AttributeError):
+        if company_uuid is None:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid company ID format"
             )
-
-        company = db.query(Company).filter(Company.id == company_uuid).first()
-        if company is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Company not found"
-            )
-        return company
-
-    if current_user.company_id is None:
+    elif user.company_id is None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="User is not assigned to a company"
         )
 
-    company = db.query(Company).filter(Company.id == current_user.company_id).first()
     if company is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Company not found"
         )
 
-    return company
+    if with_store and store is None:
+        if x_store_id and store_uuid is None:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid store ID format"
+            )
+        if x_store_id:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Store not found or does not belong to your company"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No store found for this company. Please create a store first."
+        )
 
+    tags = [f"user:{user.id}", f"company:{company.id}", f"company:{user.company_id}"]
+    if store is not None:
+        tags.append(f"store:{store.id}")
+    tenant_cache.set(
+        cache_key,
+        (_snapshot(user), _snapshot(user_company), _snapshot(company), _snapshot(store)),
+        tags=tags
+    )
+    return TenantContext(user=user, company=company, store=store)
 
-async def get_current_store(
-    company: Company = Depends(get_current_company),
-    db: Session = Depends(get_db),
+
+async def get_company_context(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+    x_company_id: Optional[str] = Header(None, alias="X-Company-ID")
+) -> TenantContext:
+    """Resolve the current user and company in one query"""
+    return await _resolve_tenant(db, _token_subject(credentials), x_company_id, None, with_store=False)
+
+
+async def get_tenant_context(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+    x_company_id: Optional[str] = Header(None, alias="X-Company-ID"),
     x_store_id: Optional[str] = Header(None, alias="X-Store-ID")
+) -> TenantContext:
+    """Resolve the current user, company and store in one query"""
+    return await _resolve_tenant(db, _token_subject(credentials), x_company_id, x_store_id, with_store=True)
+
+
+async def get_current_company(
+    context: TenantContext = Depends(get_company_context)
+) -> Company:
+    """Get the company for the current user
+
+    For admin users, X-Company-ID header is required to specify which company to access.
+    For regular users, their assigned company is used.
+    """
+    return context.company
+
+
+async def get_current_store(
+    context: TenantContext = Depends(get_tenant_context)
 ) -> Store:
     """Get the store for the current company
 
     If X-Store-ID header is provided, use that specific store.
     Otherwise, return the first store for the company.
     """
-    if x_store_id:
-        # Validate and use the provided store ID
-        try:
-            store_uuid = UUID(x_store_id)
-        except (ValueError, AttributeError):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid store ID format"
-            )
+    return context.store
 
-        store = db.query(Store).filter(
-            Store.id == store_uuid,
-            Store.company_id == company.id
-        ).first()
 
-        if store is None:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Store not found or does not belong to your company"
-            )
-    else:
-        # Fallback to first store if no store ID is provided
-        store = db.query(Store).filter(Store.company_id == company.id).first()
-        if store is None:
+async def get_current_store_user(
+    context: TenantContext = Depends(get_tenant_context)
+) -> User:
+    """Get the current user on store-scoped endpoints
+
+    Shares the tenant lookup with get_current_store, so using both costs a
+    single query.
+    """
+    return context.user
+
+
+async def get_unit_registry(
+    db: AsyncSession = Depends(get_db)
+) -> UnitRegistry:
+    """Get the process-wide unit registry
+
+    It is normally loaded at startup; if that failed (or it was reset) the
+    first request to need it loads it.
+    """
+    registry = get_loaded_unit_registry()
+    if registry is None:
+        registry = await load_unit_registry(db)
+    return registry
+
+
+def store_list_etag(*scopes: str, inventory: bool = False, daily: bool = False):
+    """Dependency answering conditional GETs of a store-scoped list
+
+    The weak ETag is derived from the store's change versions for scopes
+    (see StoreVersionService) and the request URL, so it is known after
+    one single-row query. A matching If-None-Match ends the request with
+    304 before the endpoint runs its list query; otherwise the ETag is set
+    on the response.
+
+    Args:
+        scopes: Versions the list depends on, e.g. "catalog"
+        inventory: Also depend on orders when the store tracks inventory
+        daily: Also depend on the store's current business day
+
+    Example:
+        >>> @router.get("", dependencies=[Depends(store_list_etag("customers"))])
+    """
+    async def check_etag(
+        request: Request,
+        response: Response,
+        store: Store = Depends(get_current_store),
+        db: AsyncSession = Depends(get_db)
+    ) -> None:
+        names = list(scopes)
+        if inventory and store.track_inventory:
+            names.append("orders")
+        versions = await StoreVersionService.current(db, store.id, *names)
+
+        parts = [str(store.id), request.url.path, request.url.query]
+        parts += [f"{name}={version}" for name, version in zip(names, versions)]
+        if daily:
+            parts.append(BusinessDayService.current_day(store).isoformat())
+        etag = "W/" + make_etag("|".join(parts).encode())
+
+        if etag_matches(request.headers.get("If-None-Match"), etag):
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="No store found for this company. Please create a store first."
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, **PRIVATE_CACHE_HEADERS}
             )
+        response.headers.update({"ETag": etag, **PRIVATE_CACHE_HEADERS})
 
-    return store
+    return check_etag
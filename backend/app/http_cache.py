@@ -0,0 +1,53 @@
+"""
+HTTP validators for QuickStore.
+
+Endpoints whose responses rarely change send an ETag; clients send it
+back in If-None-Match and get an empty 304 while it still matches.
+"""
+import hashlib
+from typing import Optional
+
+from fastapi import Response, status
+
+
+# For responses that depend on the caller's tenant headers: caches may keep
+# them but must revalidate before reuse
+PRIVATE_CACHE_HEADERS = {
+    "Cache-Control": "private, no-cache",
+    "Vary": "Authorization, X-Company-ID, X-Store-ID",
+}
+
+
+def make_etag(*parts: bytes) -> str:
+    """Strong ETag (quoted) from the bytes a representation is built from"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part)
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    True if an If-None-Match header matches an ETag.
+
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so
+    W/"x" matches "x" (proxies may weaken ETags when they compress).
+
+    Example:
+        >>> etag_matches('W/"abc", "def"', '"abc"')
+        True
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(
+        candidate.strip().removeprefix("W/") == opaque
+        for candidate in if_none_match.split(",")
+    )
+
+
+def not_modified(etag: str, headers: Optional[dict] = None) -> Response:
+    """Empty 304 response carrying the current ETag"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, **(headers or {})})
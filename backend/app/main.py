@@ -1,7 +1,15 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
+from .cache_bus import cache_bus
 from .config import settings
+from .pg_listener import pg_listener
+from .database import AsyncSessionLocal
+from .services.partition_service import PartitionService
+from .services.unit_registry import load_unit_registry
 from .routers import (
     auth_router,
     admin_router,
@@ -12,14 +20,55 @@ from .routers import (
     sessions_router,
     customers_router,
     units_router,
+    sync_router,
+    reports_router,
+    catalog_router,
 )
 
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Load reference data and create upcoming order partitions before serving requests
+
+    Opens the worker's LISTEN connection (cache invalidations, order
+    events) while serving, and closes it at shutdown.
+    """
+    await cache_bus.start()
+    try:
+        async with app.state.session_factory() as db:
+            await load_unit_registry(db)
+    except Exception:
+        # Requests that need units will load them on first use
+        logger.exception("Could not load unit registry at startup")
+    try:
+        async with app.state.session_factory() as db:
+            await PartitionService.ensure_partitions(db)
+            await db.commit()
+    except Exception:
+        # Orders still land in the default partitions
+        logger.exception("Could not create order partitions at startup")
+    if settings.listen_dsn is None:
+        logger.warning(
+            "DATABASE_PGBOUNCER is set without LISTEN_DATABASE_URL: live order events are "
+            "disabled and caches keep CACHE_INVALIDATION_FALLBACK_TTL_SECONDS"
+        )
+    yield
+    cache_bus.stop()
+    await pg_listener.stop()
+
+
 app = FastAPI(
     title="QuickStore API",
     description="Backend API for QuickStore POS System",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+# Sessions opened outside request dependencies (startup, streamed responses)
+app.state.session_factory = AsyncSessionLocal
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -39,6 +88,9 @@ app.include_router(orders_router)
 app.include_router(sessions_router)
 app.include_router(customers_router)
 app.include_router(units_router)
+app.include_router(sync_router)
+app.include_router(reports_router)
+app.include_router(catalog_router)
 
 
 @app.get("/")
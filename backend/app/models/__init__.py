@@ -3,10 +3,13 @@ from .company import Company
 from .store import Store
 from .product import Product
 from .combo import Combo, ComboItem
-from .order import Order, OrderItem, OrderEditHistory
+from .order import Order, OrderItem, OrderEditHistory, OrderIdempotencyKey
 from .session import Session
 from .customer import CustomerName
 from .unit import Unit
+from .sync import SyncTombstone
+from .sales_rollup import DailySales, DailyProductSales
+from .order_archive import OrderArchiveSegment, ArchivedOrder
 
 __all__ = [
     "User",
@@ -18,7 +21,13 @@ __all__ = [
     "Order",
     "OrderItem",
     "OrderEditHistory",
+    "OrderIdempotencyKey",
     "Session",
     "CustomerName",
     "Unit",
+    "SyncTombstone",
+    "DailySales",
+    "DailyProductSales",
+    "OrderArchiveSegment",
+    "ArchivedOrder",
 ]
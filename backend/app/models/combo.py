@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, BigInteger, Numeric, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
 from ..database import Base
+from .sync import change_xid_server_default, current_xid
 
 
 class Combo(Base):
@@ -15,11 +16,18 @@ class Combo(Base):
     name = Column(String, nullable=False)
     total_price = Column(Numeric(10, 2), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    change_xid = Column(BigInteger, server_default=change_xid_server_default(), onupdate=current_xid(), nullable=False)  # Sync cursor
 
     # Relationships
     store = relationship("Store", back_populates="combos")
     items = relationship("ComboItem", back_populates="combo", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Serves the sync deltas of a store
+        Index('ix_quick_store__combos_store_change', 'store_id', 'change_xid'),
+    )
+
 
 class ComboItem(Base):
     __tablename__ = "quick_store__combo_items"
@@ -14,6 +14,7 @@ class Company(Base):
     name = Column(String, nullable=False)
     currency_symbol = Column(String, default="$", nullable=False)
     max_stores = Column(Integer, default=1, nullable=False)
+    order_retention_months = Column(Integer, nullable=True)  # Months of orders kept hot before archival; NULL keeps all
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     created_by = Column(UUID(as_uuid=True), nullable=True)  # Removed FK to avoid circular dependency
 
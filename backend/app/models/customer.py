@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, Index, UniqueConstraint
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
 from ..database import Base
+from .sync import change_xid_server_default, current_xid
 
 
 class CustomerName(Base):
@@ -14,10 +15,13 @@ class CustomerName(Base):
     store_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__stores.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String, nullable=False)
     last_used = Column(DateTime, default=datetime.utcnow, nullable=False)
+    change_xid = Column(BigInteger, server_default=change_xid_server_default(), onupdate=current_xid(), nullable=False)  # Sync cursor
 
     # Relationships
     store = relationship("Store", back_populates="customer_names")
 
     __table_args__ = (
         UniqueConstraint('store_id', 'name', name='unique_store_customer'),
+        # Serves the sync deltas of a store
+        Index('ix_quick_store__customer_names_store_change', 'store_id', 'change_xid'),
     )
@@ -1,13 +1,27 @@
-from sqlalchemy import Column, String, Integer, Numeric, Boolean, DateTime, ForeignKey
+from sqlalchemy import DDL, Column, String, Integer, BigInteger, Numeric, Boolean, DateTime, ForeignKey, ForeignKeyConstraint, Index, UniqueConstraint, event
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
 from ..database import Base
+from .sync import change_xid_server_default, current_xid
+
+
+def default_partition(table: str) -> DDL:
+    """Catch-all partition for rows outside the monthly partitions
+
+    The monthly ones are created ahead of time by
+    services/partition_service.py; create_all() only creates this one.
+    """
+    return DDL(f"CREATE TABLE IF NOT EXISTS {table}_default PARTITION OF {table} DEFAULT")
 
 
 class Order(Base):
+    """An order, in the monthly partition of its created_at
+
+    The primary key includes the partition key, as Postgres requires.
+    """
     __tablename__ = "quick_store__orders"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -16,8 +30,10 @@ class Order(Base):
     total = Column(Numeric(10, 2), nullable=False)
     is_paid = Column(Boolean, default=False, nullable=False)
     is_edited = Column(Boolean, default=False, nullable=False)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow, nullable=False, index=True)  # Partition key
     created_by = Column(UUID(as_uuid=True), ForeignKey("quick_store__users.id"), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    change_xid = Column(BigInteger, server_default=change_xid_server_default(), onupdate=current_xid(), nullable=False)  # Sync cursor
 
     # Relationships
     store = relationship("Store", back_populates="orders")
@@ -25,12 +41,25 @@ class Order(Base):
     items = relationship("OrderItem", back_populates="order", cascade="all, delete-orphan")
     edit_history = relationship("OrderEditHistory", back_populates="order", cascade="all, delete-orphan")
 
+    __table_args__ = (
+        # Serves the newest-first keyset pagination of a store's orders
+        Index('ix_quick_store__orders_store_created_id', 'store_id', created_at.desc(), id.desc()),
+        # Serves the sync deltas of a store
+        Index('ix_quick_store__orders_store_change', 'store_id', 'change_xid'),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+
+event.listen(Order.__table__, "after_create", default_partition(Order.__tablename__))
+
 
 class OrderItem(Base):
+    """An order line, partitioned like its order so both prune together"""
     __tablename__ = "quick_store__order_items"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    order_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    order_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    order_created_at = Column(DateTime, primary_key=True, nullable=False)  # The order's created_at: partition key
     product_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__products.id", ondelete="SET NULL"), nullable=True)
     product_name = Column(String, nullable=False)  # Snapshot for history
     quantity = Column(Numeric(14, 4), nullable=False)
@@ -45,16 +74,57 @@ class OrderItem(Base):
     order = relationship("Order", back_populates="items")
     product = relationship("Product", back_populates="order_items")
 
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['order_id', 'order_created_at'],
+            ['quick_store__orders.id', 'quick_store__orders.created_at'],
+            ondelete="CASCADE",
+            onupdate="CASCADE"
+        ),
+        {"postgresql_partition_by": "RANGE (order_created_at)"},
+    )
+
+
+event.listen(OrderItem.__table__, "after_create", default_partition(OrderItem.__tablename__))
+
 
 class OrderEditHistory(Base):
     __tablename__ = "quick_store__order_edit_history"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    order_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__orders.id", ondelete="CASCADE"), nullable=False, index=True)
+    order_id = Column(UUID(as_uuid=True), nullable=False, index=True)
+    order_created_at = Column(DateTime, nullable=False)  # Completes the reference to the partitioned order
+    version = Column(Integer, nullable=False)  # 1 for the first edit of the order, then 2, 3...
     edited_at = Column(DateTime, default=datetime.utcnow, nullable=False)
     edited_by = Column(UUID(as_uuid=True), ForeignKey("quick_store__users.id"), nullable=False)
-    previous_state = Column(JSONB, nullable=False)  # Store previous order state as JSON
+    changes = Column(JSONB, nullable=False)  # Diff of this edit, see services/order_history_service.py
 
     # Relationships
     order = relationship("Order", back_populates="edit_history")
     edited_by_user = relationship("User", back_populates="order_edits")
+
+    __table_args__ = (
+        ForeignKeyConstraint(
+            ['order_id', 'order_created_at'],
+            ['quick_store__orders.id', 'quick_store__orders.created_at'],
+            ondelete="CASCADE",
+            onupdate="CASCADE"
+        ),
+        UniqueConstraint('order_id', 'version', name='unique_order_edit_version'),
+    )
+
+
+class OrderIdempotencyKey(Base):
+    """Idempotency key (or client-generated order id) claimed by an order creation
+
+    Kept in its own table so the key stays unique per store whatever the
+    layout of the orders table. No foreign key to the order: the key is
+    claimed before the order row is written.
+    """
+    __tablename__ = "quick_store__order_idempotency_keys"
+
+    store_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__stores.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+    order_id = Column(UUID(as_uuid=True), nullable=False, unique=True)  # Orders no longer enforce unique ids across partitions
+    request_hash = Column(String(64), nullable=False)  # sha256 of the request body the key was first used with
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
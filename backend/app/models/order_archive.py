@@ -0,0 +1,41 @@
+from sqlalchemy import Column, String, Integer, BigInteger, Date, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from ..database import Base
+
+
+class OrderArchiveSegment(Base):
+    """Manifest entry of an archive segment file
+
+    One gzipped JSONL file per store and business month, holding the
+    orders of that month with their items and edit history; see
+    services/order_archive_service.py.
+    """
+    __tablename__ = "quick_store__order_archive_segments"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    store_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__stores.id", ondelete="CASCADE"), nullable=False)
+    month = Column(Date, nullable=False)  # First business day of the month
+    path = Column(String, nullable=False)  # Relative to ORDER_ARCHIVE_DIR
+    order_count = Column(Integer, nullable=False)
+    first_created_at = Column(DateTime, nullable=False)
+    last_created_at = Column(DateTime, nullable=False)
+    size = Column(BigInteger, nullable=False)  # Bytes on disk
+    sha256 = Column(String(64), nullable=False)
+    archived_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint('store_id', 'month', name='unique_order_archive_segment'),
+    )
+
+
+class ArchivedOrder(Base):
+    """Segment an archived order was moved to, for lookups by id"""
+    __tablename__ = "quick_store__archived_orders"
+
+    store_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__stores.id", ondelete="CASCADE"), primary_key=True)
+    order_id = Column(UUID(as_uuid=True), primary_key=True)
+    segment_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__order_archive_segments.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = Column(DateTime, nullable=False)
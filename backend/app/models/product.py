@@ -1,10 +1,11 @@
-from sqlalchemy import Column, String, Integer, Numeric, DateTime, ForeignKey
+from sqlalchemy import Column, String, Integer, BigInteger, Numeric, DateTime, ForeignKey, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
 import uuid
 
 from ..database import Base
+from .sync import change_xid_server_default, current_xid
 
 
 class Product(Base):
@@ -17,6 +18,8 @@ class Product(Base):
     category = Column(String, nullable=True)
     inventory = Column(Numeric(14, 4), nullable=True)  # Null if inventory not tracked
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+    change_xid = Column(BigInteger, server_default=change_xid_server_default(), onupdate=current_xid(), nullable=False)  # Sync cursor
 
     # Unit system fields
     base_unit = Column(String(10), ForeignKey("quick_store__units.code"), nullable=True)
@@ -27,3 +30,8 @@ class Product(Base):
     unit_ref = relationship("Unit", foreign_keys=[base_unit])
     combo_items = relationship("ComboItem", back_populates="product", cascade="all, delete-orphan")
     order_items = relationship("OrderItem", back_populates="product")
+
+    __table_args__ = (
+        # Serves the sync deltas of a store
+        Index('ix_quick_store__products_store_change', 'store_id', 'change_xid'),
+    )
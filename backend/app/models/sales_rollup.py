@@ -0,0 +1,50 @@
+from sqlalchemy import Column, String, Integer, Numeric, Date, ForeignKey, UniqueConstraint
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from ..database import Base
+
+
+class DailySales(Base):
+    """Order totals of one business day of a store
+
+    Kept up to date as deltas by every order write; see
+    services/sales_rollup_service.py.
+    """
+    __tablename__ = "quick_store__daily_sales"
+
+    store_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__stores.id", ondelete="CASCADE"), primary_key=True)
+    business_day = Column(Date, primary_key=True)
+    order_count = Column(Integer, default=0, nullable=False)
+    revenue = Column(Numeric(14, 2), default=0, nullable=False)  # Sum of order totals
+    paid_count = Column(Integer, default=0, nullable=False)
+    paid_revenue = Column(Numeric(14, 2), default=0, nullable=False)
+    edited_count = Column(Integer, default=0, nullable=False)
+
+
+class DailyProductSales(Base):
+    """Sales of one product on one business day of a store
+
+    Lines whose product has been deleted are counted under product_id NULL.
+    """
+    __tablename__ = "quick_store__daily_product_sales"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    store_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__stores.id", ondelete="CASCADE"), nullable=False)
+    business_day = Column(Date, nullable=False)
+    product_id = Column(UUID(as_uuid=True), nullable=True)
+    product_name = Column(String, nullable=False)  # Name on the latest sale
+    base_unit = Column(String(10), nullable=True)  # Unit of quantity_in_base on the latest sale
+    quantity = Column(Numeric(18, 4), default=0, nullable=False)  # As sold, whatever the unit
+    quantity_in_base = Column(Numeric(18, 4), default=0, nullable=False)
+    revenue = Column(Numeric(20, 6), default=0, nullable=False)  # Sum of price x quantity, unrounded
+    order_count = Column(Integer, default=0, nullable=False)  # Orders containing the product
+
+    __table_args__ = (
+        # NULLS NOT DISTINCT (PostgreSQL 15+): one row per day for deleted products
+        UniqueConstraint(
+            'store_id', 'business_day', 'product_id',
+            name='unique_daily_product_sales',
+            postgresql_nulls_not_distinct=True
+        ),
+    )
@@ -1,7 +1,7 @@
-from sqlalchemy import Column, String, Boolean, DateTime, ForeignKey
+from sqlalchemy import Column, String, Boolean, Integer, DateTime, Time, ForeignKey, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
-from datetime import datetime
+from datetime import datetime, time
 import uuid
 
 from ..database import Base
@@ -14,7 +14,14 @@ class Store(Base):
     company_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__companies.id", ondelete="CASCADE"), nullable=False, index=True)
     name = Column(String, nullable=False)
     track_inventory = Column(Boolean, default=False, nullable=False)
+    timezone = Column(String(64), default="UTC", server_default="UTC", nullable=False)  # IANA name, e.g. "Europe/Paris"
+    business_day_start = Column(Time, default=time(0, 0), server_default=text("'00:00'"), nullable=False)  # Local time a business day begins
     created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    archived_until = Column(DateTime, nullable=True)  # Orders created before this were moved to the archive
+    # Change versions, see services/store_version_service.py
+    catalog_version = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    orders_version = Column(Integer, default=0, server_default=text("0"), nullable=False)
+    customers_version = Column(Integer, default=0, server_default=text("0"), nullable=False)
 
     # Relationships
     company = relationship("Company", back_populates="stores")
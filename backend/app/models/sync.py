@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, BigInteger, DateTime, ForeignKey, Index, literal_column, text
+from sqlalchemy.dialects.postgresql import UUID
+from datetime import datetime
+import uuid
+
+from ..database import Base
+
+
+# Id of the writing transaction (xid8, never wraps) as a bigint. Rows synced
+# to devices carry it in a change_xid column, set on insert and on update;
+# see services/sync_service.py.
+CURRENT_XID_SQL = "pg_current_xact_id()::text::bigint"
+
+
+def change_xid_server_default():
+    return text(f"({CURRENT_XID_SQL})")
+
+
+def current_xid():
+    return literal_column(CURRENT_XID_SQL)
+
+
+class SyncTombstone(Base):
+    """Record of a deleted row, so devices syncing deltas can drop it"""
+    __tablename__ = "quick_store__sync_tombstones"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    store_id = Column(UUID(as_uuid=True), ForeignKey("quick_store__stores.id", ondelete="CASCADE"), nullable=False)
+    entity = Column(String(20), nullable=False)  # "product", "combo" or "order"
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    change_xid = Column(BigInteger, server_default=change_xid_server_default(), nullable=False)
+    deleted_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+
+    __table_args__ = (
+        Index('ix_quick_store__sync_tombstones_store_change', 'store_id', 'change_xid'),
+    )
@@ -0,0 +1,156 @@
+"""
+Shared Postgres LISTEN connection of a QuickStore worker.
+
+Features that react to NOTIFY from other workers (live order events,
+cache invalidation) register a channel with the process's PgListener
+rather than opening a connection each. It holds one connection, listens
+on every registered channel, hands each notification to its channel's
+handler, and reconnects when the connection drops. Channels are told
+when it connects and disconnects, so they can make up for notifications
+sent while it was down.
+
+A transaction-mode pooler accepts LISTEN but never delivers anything, so
+the connection uses settings.listen_dsn: behind DATABASE_PGBOUNCER
+without LISTEN_DATABASE_URL there is none and the listener never
+connects.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import asyncpg
+
+from .config import settings
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ListenChannel:
+    """A channel and the callbacks of the feature listening on it"""
+    name: str
+    on_notify: Callable[[str], None]
+    on_connect: Optional[Callable[[], None]] = None
+    on_disconnect: Optional[Callable[[], None]] = None
+
+
+class PgListener:
+    """One LISTEN connection dispatching notifications to their channel's handler"""
+
+    # Delay before reopening a lost connection
+    RECONNECT_SECONDS = 2.0
+
+    def __init__(self, dsn: Optional[str] = None):
+        self.dsn = dsn
+        self._channels: Dict[str, ListenChannel] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._connected: Optional[asyncio.Event] = None
+
+    @property
+    def resolved_dsn(self) -> Optional[str]:
+        """DSN the connection is opened with, or None if there is no usable one"""
+        return self.dsn or settings.listen_dsn
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def connected(self) -> bool:
+        """Listening on every channel right now"""
+        return self.running and self._connected.is_set()
+
+    def add_channel(
+        self,
+        name: str,
+        on_notify: Callable[[str], None],
+        on_connect: Optional[Callable[[], None]] = None,
+        on_disconnect: Optional[Callable[[], None]] = None
+    ) -> None:
+        """
+        Listen on a channel once started (channels are added before start()).
+
+        Args:
+            name: Channel name
+            on_notify: Called with the payload of each notification
+            on_connect: Called each time the connection is (re)opened
+            on_disconnect: Called each time it is lost or closed
+
+        Example:
+            >>> pg_listener.add_channel("quick_store__order_events", hub.dispatch)
+        """
+        if self.running:
+            raise RuntimeError("Channels must be added before the listener starts")
+        self._channels[name] = ListenChannel(name, on_notify, on_connect, on_disconnect)
+
+    async def start(self) -> None:
+        """Open the connection in the background (no-op if already running)"""
+        loop = asyncio.get_running_loop()
+        if self.running and self._task.get_loop() is loop:
+            return
+        # (A new event loop, as in tests, needs its own connection)
+        self._connected = asyncio.Event()
+        self._task = loop.create_task(self._run())
+
+    async def wait_connected(self, timeout: float) -> bool:
+        """Wait until listening; False if not connected within timeout"""
+        if not self.running:
+            return False
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    async def stop(self) -> None:
+        """Close the connection (at shutdown)"""
+        task, self._task = self._task, None
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        dsn = self.resolved_dsn
+        if dsn is None:
+            return
+        while True:
+            lost = asyncio.Event()
+            connection = None
+            try:
+                connection = await asyncpg.connect(dsn)
+                connection.add_termination_listener(lambda _: lost.set())
+                for channel in self._channels.values():
+                    await connection.add_listener(channel.name, self._dispatch)
+                self._connected.set()
+                self._notify_channels("on_connect")
+                await lost.wait()
+                logger.warning("LISTEN connection lost, reconnecting")
+            except (OSError, asyncpg.PostgresError, asyncpg.InterfaceError):
+                logger.exception("Could not open the LISTEN connection")
+            finally:
+                if self._connected.is_set():
+                    self._connected.clear()
+                    self._notify_channels("on_disconnect")
+                if connection is not None and not connection.is_closed():
+                    await connection.close()
+            await asyncio.sleep(self.RECONNECT_SECONDS)
+
+    def _notify_channels(self, callback: str) -> None:
+        for channel in self._channels.values():
+            handler = getattr(channel, callback)
+            if handler is not None:
+                handler()
+
+    def _dispatch(self, connection, pid, channel: str, payload: str) -> None:
+        listen_channel = self._channels.get(channel)
+        if listen_channel is not None:
+            listen_channel.on_notify(payload)
+
+
+pg_listener = PgListener()
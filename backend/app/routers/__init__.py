@@ -7,6 +7,9 @@ from .orders import router as orders_router
 from .sessions import router as sessions_router
 from .customers import router as customers_router
 from .units import router as units_router
+from .sync import router as sync_router
+from .reports import router as reports_router
+from .catalog import router as catalog_router
 
 __all__ = [
     "auth_router",
@@ -18,4 +21,7 @@ __all__ = [
     "sessions_router",
     "customers_router",
     "units_router",
+    "sync_router",
+    "reports_router",
+    "catalog_router",
 ]
@@ -1,5 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
 from typing import List
 from pydantic import BaseModel
 from uuid import UUID
@@ -11,7 +13,7 @@ from ..schemas.user import UserCreate, UserUpdate, UserResponse, UserPasswordCha
 from ..schemas.company import CompanyCreate, CompanyUpdate, CompanyResponse
 from ..schemas.store import StoreResponse
 from ..security import get_password_hash
-from ..dependencies import get_current_admin_user
+from ..dependencies import get_current_admin_user, invalidate_user, invalidate_company
 
 router = APIRouter(prefix="/api/admin", tags=["Admin"])
 
@@ -32,28 +34,29 @@ class AdminStoreResponse(BaseModel):
 @router.post("/companies", response_model=CompanyResponse, status_code=status.HTTP_201_CREATED)
 async def create_company(
     company_data: CompanyCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin_user)
 ):
     """Create a new company (admin only)"""
     company = Company(
         name=company_data.name,
         currency_symbol=company_data.currency_symbol,
+        order_retention_months=company_data.order_retention_months,
         created_by=admin.id
     )
     db.add(company)
-    db.commit()
-    db.refresh(company)
+    await db.commit()
+    await db.refresh(company)
     return company
 
 
 @router.get("/companies", response_model=List[CompanyResponse])
 async def list_companies(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin_user)
 ):
     """List all companies (admin only)"""
-    companies = db.query(Company).all()
+    companies = (await db.scalars(select(Company))).all()
     return companies
 
 
@@ -61,11 +64,11 @@ async def list_companies(
 async def update_company(
     company_id: str,
     company_data: CompanyUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin_user)
 ):
     """Update a company (admin only)"""
-    company = db.query(Company).filter(Company.id == company_id).first()
+    company = await db.scalar(select(Company).where(Company.id == company_id))
     if not company:
         raise HTTPException(status_code=404, detail="Company not found")
 
@@ -75,19 +78,22 @@ async def update_company(
         company.currency_symbol = company_data.currency_symbol
     if company_data.max_stores is not None:
         company.max_stores = company_data.max_stores
+    if "order_retention_months" in company_data.model_fields_set:
+        company.order_retention_months = company_data.order_retention_months
 
-    db.commit()
-    db.refresh(company)
+    await invalidate_company(db, company.id)
+    await db.commit()
+    await db.refresh(company)
     return company
 
 
 @router.get("/stores", response_model=List[AdminStoreResponse])
 async def list_all_stores(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin_user)
 ):
     """List all stores across all companies (admin only)"""
-    stores = db.query(Store).options(joinedload(Store.company)).all()
+    stores = (await db.scalars(select(Store).options(joinedload(Store.company)))).all()
 
     result = []
     for store in stores:
@@ -106,12 +112,12 @@ async def list_all_stores(
 @router.post("/users", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
 async def create_user(
     user_data: UserCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin_user)
 ):
     """Create a new user and optionally assign to a company (admin only)"""
     # Check if username already exists
-    existing_user = db.query(User).filter(User.username == user_data.username).first()
+    existing_user = await db.scalar(select(User).where(User.username == user_data.username))
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -119,7 +125,7 @@ async def create_user(
         )
 
     # Check if email already exists
-    existing_email = db.query(User).filter(User.email == user_data.email).first()
+    existing_email = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_email:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -128,7 +134,7 @@ async def create_user(
 
     # If company_id is provided, verify it exists
     if user_data.company_id:
-        company = db.query(Company).filter(Company.id == user_data.company_id).first()
+        company = await db.scalar(select(Company).where(Company.id == user_data.company_id))
         if not company:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -143,20 +149,21 @@ async def create_user(
         company_id=user_data.company_id
     )
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
     # Reload with company relationship
-    user = db.query(User).options(joinedload(User.company)).filter(User.id == user.id).first()
+    user = await db.scalar(
+        select(User).options(joinedload(User.company)).where(User.id == user.id)
+    )
     return user
 
 
 @router.get("/users", response_model=List[UserResponse])
 async def list_users(
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin_user)
 ):
     """List all users (admin only)"""
-    users = db.query(User).options(joinedload(User.company)).all()
+    users = (await db.scalars(select(User).options(joinedload(User.company)))).all()
     return users
 
 
@@ -164,20 +171,20 @@ async def list_users(
 async def update_user(
     user_id: str,
     user_data: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin_user)
 ):
     """Update a user (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     if user_data.email is not None:
         # Check if email already exists for another user
-        existing = db.query(User).filter(
+        existing = await db.scalar(select(User).where(
             User.email == user_data.email,
             User.id != user_id
-        ).first()
+        ))
         if existing:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -190,7 +197,7 @@ async def update_user(
 
     if user_data.company_id is not None:
         # Verify company exists
-        company = db.query(Company).filter(Company.id == user_data.company_id).first()
+        company = await db.scalar(select(Company).where(Company.id == user_data.company_id))
         if not company:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -198,10 +205,12 @@ async def update_user(
             )
         user.company_id = user_data.company_id
 
-    db.commit()
-    db.refresh(user)
+    await invalidate_user(db, user.id)
+    await db.commit()
     # Reload with company relationship
-    user = db.query(User).options(joinedload(User.company)).filter(User.id == user_id).first()
+    user = await db.scalar(
+        select(User).options(joinedload(User.company)).where(User.id == user_id)
+    )
     return user
 
 
@@ -209,19 +218,21 @@ async def update_user(
 async def change_user_password(
     user_id: str,
     password_data: UserPasswordChange,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     admin: User = Depends(get_current_admin_user)
 ):
     """Change a user's password (admin only)"""
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Update password
     user.password_hash = get_password_hash(password_data.new_password)
 
-    db.commit()
-    db.refresh(user)
+    await invalidate_user(db, user.id)
+    await db.commit()
     # Reload with company relationship
-    user = db.query(User).options(joinedload(User.company)).filter(User.id == user_id).first()
+    user = await db.scalar(
+        select(User).options(joinedload(User.company)).where(User.id == user_id)
+    )
     return user
@@ -1,12 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..database import get_db
 from ..models import User
 from ..schemas.auth import LoginRequest, Token, ChangePasswordRequest
 from ..schemas.user import UserResponse
 from ..security import verify_password, create_access_token, get_password_hash
-from ..dependencies import get_current_user
+from ..dependencies import get_current_user, invalidate_user
 
 router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 
@@ -14,10 +15,10 @@ router = APIRouter(prefix="/api/auth", tags=["Authentication"])
 @router.post("/login", response_model=Token)
 async def login(
     login_data: LoginRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Login with username and password to get JWT token"""
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = await db.scalar(select(User).where(User.username == login_data.username))
 
     if not user or not verify_password(login_data.password, user.password_hash):
         raise HTTPException(
@@ -51,7 +52,7 @@ async def get_current_user_info(
 async def change_password(
     password_data: ChangePasswordRequest,
     current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Change current user's password"""
     # Verify current password
@@ -63,6 +64,7 @@ async def change_password(
 
     # Update password
     current_user.password_hash = get_password_hash(password_data.new_password)
-    db.commit()
+    await invalidate_user(db, current_user.id)
+    await db.commit()
 
     return {"message": "Password changed successfully"}
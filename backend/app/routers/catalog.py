@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from ..database import get_db
+from ..models import Store
+from ..schemas.catalog import CatalogResponse
+from ..dependencies import get_current_store, get_unit_registry
+from ..http_cache import PRIVATE_CACHE_HEADERS, etag_matches, not_modified
+from ..services.unit_registry import UnitRegistry
+from ..services.catalog_service import CatalogService
+
+router = APIRouter(prefix="/api/catalog", tags=["Catalog"])
+
+
+@router.get("", response_model=CatalogResponse)
+async def get_catalog(
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    store: Store = Depends(get_current_store),
+    db: AsyncSession = Depends(get_db),
+    registry: UnitRegistry = Depends(get_unit_registry)
+):
+    """Get the store's products, combos and their units in one response
+
+    Served from a per-store snapshot while the catalog version is
+    unchanged. Send the ETag back in If-None-Match to get a 304 when
+    nothing changed, inventory included.
+    """
+    snapshot, inventory = await CatalogService.load(db, store, registry)
+    etag = CatalogService.etag(snapshot, inventory)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag, PRIVATE_CACHE_HEADERS)
+
+    return Response(
+        content=CatalogService.render(snapshot, inventory),
+        media_type="application/json",
+        headers={"ETag": etag, **PRIVATE_CACHE_HEADERS}
+    )
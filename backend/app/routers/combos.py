@@ -1,11 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, delete
+from sqlalchemy.orm import selectinload
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
+from datetime import datetime
 
 from ..database import get_db
 from ..models import Combo, ComboItem, Product, Store
 from ..schemas.combo import ComboCreate, ComboUpdate, ComboResponse
-from ..dependencies import get_current_store
+from ..dependencies import get_current_store, store_list_etag
+from ..services.sync_service import SyncService
+from ..services.store_version_service import StoreVersionService
 
 router = APIRouter(prefix="/api/combos", tags=["Combos"])
 
@@ -14,15 +19,15 @@ router = APIRouter(prefix="/api/combos", tags=["Combos"])
 async def create_combo(
     combo_data: ComboCreate,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a new combo"""
     # Verify all products exist and belong to the store
     product_ids = [item.product_id for item in combo_data.items]
-    products = db.query(Product).filter(
+    products = (await db.scalars(select(Product).where(
         Product.id.in_(product_ids),
         Product.store_id == store.id
-    ).all()
+    ))).all()
 
     if len(products) != len(product_ids):
         raise HTTPException(
@@ -36,7 +41,7 @@ async def create_combo(
         total_price=combo_data.total_price
     )
     db.add(combo)
-    db.flush()  # Get combo.id without committing
+    await db.flush()  # Get combo.id without committing
 
     # Add combo items
     for item_data in combo_data.items:
@@ -47,18 +52,24 @@ async def create_combo(
         )
         db.add(combo_item)
 
-    db.commit()
-    db.refresh(combo)
+    await StoreVersionService.bump(db, store.id, "catalog")
+    await db.commit()
+    await db.refresh(combo, attribute_names=["items"])
     return combo
 
 
-@router.get("", response_model=List[ComboResponse])
+@router.get("", response_model=List[ComboResponse], dependencies=[Depends(store_list_etag("catalog"))])
 async def list_combos(
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all combos for the current store"""
-    combos = db.query(Combo).filter(Combo.store_id == store.id).all()
+    """List all combos for the current store
+
+    Answers If-None-Match with 304 while no product or combo changed.
+    """
+    combos = (await db.scalars(
+        select(Combo).options(selectinload(Combo.items)).where(Combo.store_id == store.id)
+    )).all()
     return combos
 
 
@@ -66,13 +77,13 @@ async def list_combos(
 async def get_combo(
     combo_id: str,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific combo"""
-    combo = db.query(Combo).filter(
+    combo = await db.scalar(select(Combo).options(selectinload(Combo.items)).where(
         Combo.id == combo_id,
         Combo.store_id == store.id
-    ).first()
+    ))
 
     if not combo:
         raise HTTPException(status_code=404, detail="Combo not found")
@@ -85,13 +96,13 @@ async def update_combo(
     combo_id: str,
     combo_data: ComboUpdate,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Update a combo"""
-    combo = db.query(Combo).filter(
+    combo = await db.scalar(select(Combo).options(selectinload(Combo.items)).where(
         Combo.id == combo_id,
         Combo.store_id == store.id
-    ).first()
+    ))
 
     if not combo:
         raise HTTPException(status_code=404, detail="Combo not found")
@@ -103,10 +114,10 @@ async def update_combo(
     if combo_data.items is not None:
         # Verify all products exist
         product_ids = [item.product_id for item in combo_data.items]
-        products = db.query(Product).filter(
+        products = (await db.scalars(select(Product).where(
             Product.id.in_(product_ids),
             Product.store_id == store.id
-        ).all()
+        ))).all()
 
         if len(products) != len(product_ids):
             raise HTTPException(
@@ -115,7 +126,7 @@ async def update_combo(
             )
 
         # Delete existing items
-        db.query(ComboItem).filter(ComboItem.combo_id == combo.id).delete()
+        await db.execute(delete(ComboItem).where(ComboItem.combo_id == combo.id))
 
         # Add new items
         for item_data in combo_data.items:
@@ -126,8 +137,11 @@ async def update_combo(
             )
             db.add(combo_item)
 
-    db.commit()
-    db.refresh(combo)
+        combo.updated_at = datetime.utcnow()  # The row changes even when only its lines do
+
+    await StoreVersionService.bump(db, store.id, "catalog")
+    await db.commit()
+    await db.refresh(combo, attribute_names=["items"])
     return combo
 
 
@@ -135,17 +149,19 @@ async def update_combo(
 async def delete_combo(
     combo_id: str,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a combo"""
-    combo = db.query(Combo).filter(
+    combo = await db.scalar(select(Combo).options(selectinload(Combo.items)).where(
         Combo.id == combo_id,
         Combo.store_id == store.id
-    ).first()
+    ))
 
     if not combo:
         raise HTTPException(status_code=404, detail="Combo not found")
 
-    db.delete(combo)
-    db.commit()
+    await SyncService.record_deletions(db, store.id, "combo", [combo.id])
+    await StoreVersionService.bump(db, store.id, "catalog")
+    await db.delete(combo)
+    await db.commit()
     return None
@@ -1,36 +1,37 @@
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 
 from ..database import get_db
 from ..models import CustomerName, Store
 from ..schemas.customer import CustomerNameResponse
-from ..dependencies import get_current_store
+from ..dependencies import get_current_store, store_list_etag
 
 router = APIRouter(prefix="/api/customers", tags=["Customers"])
 
 
-@router.get("", response_model=List[CustomerNameResponse])
+@router.get("", response_model=List[CustomerNameResponse], dependencies=[Depends(store_list_etag("customers"))])
 async def list_customer_names(
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get customer names for autocomplete"""
-    customers = db.query(CustomerName).filter(
+    customers = (await db.scalars(select(CustomerName).where(
         CustomerName.store_id == store.id
-    ).order_by(CustomerName.last_used.desc()).limit(100).all()
+    ).order_by(CustomerName.last_used.desc()).limit(100))).all()
 
     return customers
 
 
-@router.get("/names", response_model=List[str])
+@router.get("/names", response_model=List[str], dependencies=[Depends(store_list_etag("customers"))])
 async def list_customer_names_simple(
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get simple list of customer names for autocomplete"""
-    customers = db.query(CustomerName.name).filter(
+    customers = (await db.execute(select(CustomerName.name).where(
         CustomerName.store_id == store.id
-    ).order_by(CustomerName.last_used.desc()).limit(100).all()
+    ).order_by(CustomerName.last_used.desc()).limit(100))).all()
 
     return [c.name for c in customers]
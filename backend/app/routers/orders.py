@@ -1,98 +1,157 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select, update, delete, func, tuple_, any_, bindparam
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PGUUID
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload, joinedload
+from typing import Dict, List, Optional, Set, Tuple, Union
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta
 from datetime import date as date_type
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
+import base64
+import hashlib
+import json
 
 from ..database import get_db
-from ..models import Order, OrderItem, OrderEditHistory, Product, Store, User, CustomerName, Unit
-from ..schemas.order import OrderCreate, OrderUpdate, OrderResponse, BulkUpdatePaymentRequest, BulkUpdatePaymentResponse, BulkUpdateResult
-from ..dependencies import get_current_store, get_current_user
+from ..models import Order, OrderItem, OrderEditHistory, OrderIdempotencyKey, Product, Store, User, CustomerName
+from ..models.sync import current_xid
+from ..schemas.order import OrderCreate, OrderItemCreate, OrderUpdate, OrderResponse, OrderPage, OrderHistoryPage, OrderVersionResponse, BulkUpdatePaymentRequest, BulkUpdatePaymentResponse, BulkUpdateResult, OrderBatchCreate, OrderBatchResponse
+from ..dependencies import get_current_store, get_current_store_user, get_unit_registry, store_list_etag
+from ..services.unit_registry import UnitRegistry
 from ..services.unit_service import UnitService
+from ..services.inventory_service import InventoryService, InsufficientInventoryError
+from ..services.business_day_service import BusinessDayService
+from ..services.order_history_service import OrderHistoryService
+from ..services.sync_service import SyncService
+from ..services.order_export_service import OrderExportService, EXPORT_FORMATS
+from ..services.sales_rollup_service import SalesDelta
+from ..services.order_archive_service import OrderArchiveService
+from ..services.store_version_service import StoreVersionService
+from ..services.order_event_service import OrderEventService, OrderEventsUnavailable, order_event_hub, order_summary
 
 router = APIRouter(prefix="/api/orders", tags=["Orders"])
 
+CENTS = Decimal("0.01")
 
-def update_inventory(db: Session, product_id: str, quantity_change: Decimal, store: Store, sold_in_unit: Optional[str] = None):
-    """Helper function to update product inventory with unit conversion support"""
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def orders_with_items():
+    """SELECT of orders with their items batch-loaded in one extra query
+
+    Every read that returns OrderResponse must start from this; lazy loading
+    items would cost one query per order.
+    """
+    return select(Order).options(selectinload(Order.items))
+
+
+async def update_inventory(
+    db: AsyncSession,
+    store: Store,
+    changes: Dict[UUID, Decimal],
+    products: Optional[Dict[str, Product]] = None,
+    names: Optional[Dict[UUID, str]] = None
+):
+    """Helper function to apply per-product inventory changes (in base units) atomically"""
     if not store.track_inventory:
         return
 
-    product = db.query(Product).filter(Product.id == product_id).first()
-    if product and product.inventory is not None:
-        # Convert quantity to base unit if needed
-        change_in_base = quantity_change
-        if product.base_unit and sold_in_unit and sold_in_unit != product.base_unit:
-            change_in_base = UnitService.convert(quantity_change, sold_in_unit, product.base_unit, db)
+    if products is not None:
+        # Products without tracked inventory need no update
+        changes = {
+            pid: qty for pid, qty in changes.items()
+            if str(pid) not in products or products[str(pid)].inventory is not None
+        }
+
+    try:
+        await InventoryService.apply_changes(db, changes)
+    except InsufficientInventoryError as e:
+        product_id = e.product_ids[0]
+        product = (products or {}).get(str(product_id))
+        name = product.name if product else (names or {}).get(product_id, str(product_id))
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Insufficient inventory for product: {name}"
+        )
 
-        product.inventory += change_in_base
-        if product.inventory < 0:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Insufficient inventory for product: {product.name}"
-            )
 
+def item_inventory_changes(items, sign: int) -> Dict[UUID, Decimal]:
+    """Per-product inventory change for order items, in base units"""
+    changes: Dict[UUID, Decimal] = {}
+    for item in items:
+        if not item.product_id:
+            continue
+        quantity = item.quantity_in_base if item.quantity_in_base else item.quantity
+        changes[item.product_id] = changes.get(item.product_id, Decimal(0)) + sign * quantity
+    return changes
 
-def save_customer_name(db: Session, customer_name: str, store_id: str):
-    """Helper function to save or update customer name"""
-    if not customer_name:
+
+async def save_customer_names(db: AsyncSession, customer_names, store_id: str):
+    """Helper function to save or update customer names (single upsert)"""
+    names = sorted({name for name in customer_names if name})
+    if not names:
         return
 
-    customer = db.query(CustomerName).filter(
-        CustomerName.store_id == store_id,
-        CustomerName.name == customer_name
-    ).first()
+    now = datetime.utcnow()
+    stmt = pg_insert(CustomerName).values([
+        {"store_id": store_id, "name": name, "last_used": now} for name in names
+    ])
+    stmt = stmt.on_conflict_do_update(
+        constraint="unique_store_customer",
+        set_={"last_used": stmt.excluded.last_used, "change_xid": current_xid()}
+    )
+    await db.execute(stmt)
 
-    if customer:
-        customer.last_used = datetime.utcnow()
-    else:
-        customer = CustomerName(
-            store_id=store_id,
-            name=customer_name
-        )
-        db.add(customer)
 
+async def save_customer_name(db: AsyncSession, customer_name: str, store_id: str):
+    """Helper function to save or update customer name (single upsert)"""
+    await save_customer_names(db, [customer_name], store_id)
 
-@router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
-async def create_order(
-    order_data: OrderCreate,
-    store: Store = Depends(get_current_store),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
-):
-    """Create a new order"""
-    # Verify all products exist and belong to the store
-    product_ids = [item.product_id for item in order_data.items]
-    products = db.query(Product).filter(
-        Product.id.in_(product_ids),
+
+async def load_store_products(db: AsyncSession, store: Store, product_ids) -> Dict[str, Product]:
+    """Products of the store among product_ids, keyed by str(id), in one query"""
+    products = (await db.scalars(select(Product).where(
+        Product.id.in_(set(product_ids)),
         Product.store_id == store.id
-    ).all()
+    ))).all()
+    return {str(p.id): p for p in products}
 
-    if len(products) != len(product_ids):
+
+def build_order_items(
+    store: Store,
+    items_data: List[OrderItemCreate],
+    product_map: Dict[str, Product],
+    registry: UnitRegistry,
+    check_inventory: bool = True
+) -> Tuple[Decimal, List[OrderItem]]:
+    """Validate order lines against loaded products and build their OrderItem rows
+
+    Runs no queries. Returns the order total and the new items.
+    """
+    # Verify all products exist and belong to the store
+    if any(str(item.product_id) not in product_map for item in items_data):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="One or more products not found"
         )
 
-    # Create product lookup map
-    product_map = {str(p.id): p for p in products}
-
     # Calculate total and prepare order items
     total = Decimal(0)
-    order_items_data = []
+    order_items = []
 
-    for item_data in order_data.items:
+    for item_data in items_data:
         product = product_map[str(item_data.product_id)]
+        quantity = UnitService.validate_quantity(item_data.quantity)
 
         # Determine selling unit (from request or product's base_unit or None)
         sold_in_unit = item_data.unit if item_data.unit else product.base_unit
 
         # Validate unit if provided
         if sold_in_unit:
-            unit = db.query(Unit).filter(Unit.code == sold_in_unit).first()
-            if not unit:
+            if sold_in_unit not in registry:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
                     detail=f"Invalid unit code: {sold_in_unit}"
@@ -100,19 +159,19 @@ async def create_order(
 
             # If product has a base unit, validate compatibility
             if product.base_unit:
-                if not UnitService.are_compatible(sold_in_unit, product.base_unit, db):
+                if not UnitService.are_compatible(sold_in_unit, product.base_unit, registry):
                     raise HTTPException(
                         status_code=status.HTTP_400_BAD_REQUEST,
                         detail=f"Unit {sold_in_unit} is not compatible with product base unit {product.base_unit}"
                     )
 
         # Convert quantity to base unit for inventory check
-        quantity_in_base = item_data.quantity
+        quantity_in_base = quantity
         if product.base_unit and sold_in_unit and sold_in_unit != product.base_unit:
-            quantity_in_base = UnitService.convert(item_data.quantity, sold_in_unit, product.base_unit, db)
+            quantity_in_base = UnitService.convert(quantity, sold_in_unit, product.base_unit, registry)
 
-        # Check inventory before creating order
-        if store.track_inventory and product.inventory is not None:
+        # Check inventory before touching the database (the atomic update re-checks)
+        if check_inventory and store.track_inventory and product.inventory is not None:
             if product.inventory < quantity_in_base:
                 raise HTTPException(
                     status_code=status.HTTP_400_BAD_REQUEST,
@@ -120,143 +179,775 @@ async def create_order(
                 )
 
         # Calculate item total (use product.price as-is, since it represents the sale price)
-        item_total = product.price * item_data.quantity
-        total += item_total
-
-        order_items_data.append({
-            "product_id": item_data.product_id,
-            "product_name": product.name,
-            "quantity": item_data.quantity,
-            "price": product.price,
-            "sold_in_unit": sold_in_unit,
-            "base_unit": product.base_unit,
-            "quantity_in_base": quantity_in_base
-        })
-
-    # Create order
+        total += product.price * quantity
+
+        order_items.append(OrderItem(
+            id=uuid4(),
+            product_id=item_data.product_id,
+            product_name=product.name,
+            quantity=quantity,
+            price=product.price,
+            sold_in_unit=sold_in_unit,
+            base_unit=product.base_unit,
+            quantity_in_base=quantity_in_base
+        ))
+
+    return total.quantize(CENTS, rounding=ROUND_HALF_UP), order_items
+
+
+async def prepare_order_items(
+    db: AsyncSession,
+    store: Store,
+    items_data: List[OrderItemCreate],
+    registry: UnitRegistry,
+    check_inventory: bool = True
+) -> Tuple[Decimal, List[OrderItem], Dict[str, Product]]:
+    """Validate order lines and build their OrderItem rows
+
+    Products are loaded with one query whatever the number of lines; units
+    come from the in-memory registry. Returns the order total, the new
+    items and the product map.
+    """
+    product_map = await load_store_products(db, store, (item.product_id for item in items_data))
+    total, order_items = build_order_items(store, items_data, product_map, registry, check_inventory)
+    return total, order_items, product_map
+
+
+def diff_order_items(
+    items: List[OrderItem],
+    items_data: List[OrderItemCreate],
+    registry: UnitRegistry
+) -> Tuple[List[Tuple[OrderItem, Decimal]], List[OrderItem], List[OrderItemCreate]]:
+    """Match an order's new lines against its current items
+
+    A line matches an unused item of the same product sold in the same unit
+    (no unit matches an item sold in its base unit). Returns the matched
+    items whose quantity changed with their new quantity, the items with
+    no matching line, and the lines with no matching item.
+    """
+    unmatched = list(items)
+    changed = []
+    added = []
+
+    for line in items_data:
+        match = next(
+            (
+                item for item in unmatched
+                if item.product_id == line.product_id and (
+                    item.sold_in_unit == line.unit
+                    if line.unit else item.sold_in_unit == item.base_unit
+                )
+            ),
+            None
+        )
+        if match is None:
+            added.append(line)
+            continue
+
+        unmatched.remove(match)
+        quantity = UnitService.validate_quantity(line.quantity)
+        if quantity != match.quantity:
+            changed.append((match, quantity))
+
+    return changed, unmatched, added
+
+
+def next_history_version(order_id):
+    """Edit number for a new history row, computed in the INSERT itself"""
+    return (
+        select(func.coalesce(func.max(OrderEditHistory.version), 0) + 1)
+        .where(OrderEditHistory.order_id == order_id)
+        .scalar_subquery()
+    )
+
+
+def converted_to_base(item: OrderItem, quantity: Decimal, registry: UnitRegistry) -> Decimal:
+    """Quantity of an existing item's unit in its base unit snapshot"""
+    if item.base_unit and item.sold_in_unit and item.sold_in_unit != item.base_unit:
+        try:
+            return UnitService.convert(quantity, item.sold_in_unit, item.base_unit, registry)
+        except ValueError:
+            # Unit no longer known; scale by the ratio recorded at sale time
+            if item.quantity and item.quantity_in_base is not None:
+                return (quantity * item.quantity_in_base / item.quantity).quantize(
+                    UnitService.PRECISION, rounding=ROUND_HALF_UP
+                )
+    return quantity
+
+
+def request_fingerprint(order_data: OrderCreate) -> str:
+    """sha256 of an order creation request body"""
+    body = json.dumps(order_data.model_dump(mode="json"), sort_keys=True)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+async def find_idempotent_orders(db: AsyncSession, store_id: UUID, keys: List[str]) -> Dict[str, Tuple[Order, str]]:
+    """Orders created under idempotency keys, with the request hash each was created with
+
+    A single indexed lookup: the keys' primary key, the orders' and their
+    items joined in. Keys whose order was deleted are left out.
+    """
+    rows = (await db.execute(
+        select(Order, OrderIdempotencyKey.key, OrderIdempotencyKey.request_hash)
+        .join(OrderIdempotencyKey, OrderIdempotencyKey.order_id == Order.id)
+        .where(
+            OrderIdempotencyKey.store_id == store_id,
+            OrderIdempotencyKey.key.in_(keys),
+            Order.store_id == store_id
+        )
+        .options(joinedload(Order.items))
+    )).unique().all()
+    return {key: (order, request_hash) for order, key, request_hash in rows}
+
+
+async def find_idempotent_order(db: AsyncSession, store_id: UUID, key: str) -> Optional[Tuple[Order, str]]:
+    """Order created under an idempotency key and the request hash it was created with"""
+    return (await find_idempotent_orders(db, store_id, [key])).get(key)
+
+
+async def find_claimed_keys(db: AsyncSession, store_id: UUID, keys: List[str]) -> Set[str]:
+    """Keys the store has claimed, whether or not their order still exists
+
+    A claim that lost on neither of these conflicted on its order id
+    instead: the client-generated id is claimed by another key or store.
+    """
+    return set((await db.scalars(
+        select(OrderIdempotencyKey.key)
+        .where(OrderIdempotencyKey.store_id == store_id, OrderIdempotencyKey.key.in_(keys))
+    )).all())
+
+
+def replay_order(replay: Optional[Tuple[Order, str]], request_hash: str, response: Response) -> Order:
+    """Return a previously created order for a retried request"""
+    if replay is None:
+        # The key was used by an order that has since been deleted
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Idempotency key has already been used"
+        )
+    order, stored_hash = replay
+    if stored_hash != request_hash:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Idempotency key has already been used with a different request"
+        )
+    response.headers["Idempotent-Replayed"] = "true"
+    return order
+
+
+@router.post("", response_model=OrderResponse, status_code=status.HTTP_201_CREATED)
+async def create_order(
+    order_data: OrderCreate,
+    response: Response,
+    store: Store = Depends(get_current_store),
+    current_user: User = Depends(get_current_store_user),
+    db: AsyncSession = Depends(get_db),
+    registry: UnitRegistry = Depends(get_unit_registry),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=255)
+):
+    """Create a new order
+
+    Runs a constant number of statements regardless of the number of lines:
+    one product lookup, one stock update, one customer upsert and the
+    order/items inserts. Units are checked against the in-memory registry.
+    The response is built from the in-memory order.
+
+    Retries are safe when the request carries an Idempotency-Key header or
+    a client-generated order id: a repeat returns the order created by the
+    first attempt (with an Idempotent-Replayed header) in one lookup, and
+    never touches inventory again. The key is claimed before any stock is
+    deducted; a concurrent attempt with the same key waits on that claim
+    and then replays the winner's order.
+    """
+    store_id = store.id
+    order_id = order_data.id or uuid4()
+    key = idempotency_key or (str(order_data.id) if order_data.id else None)
+
+    if key:
+        request_hash = request_fingerprint(order_data)
+        replay = await find_idempotent_order(db, store_id, key)
+        if replay is not None:
+            return replay_order(replay, request_hash, response)
+
+        claimed = await db.scalar(
+            pg_insert(OrderIdempotencyKey)
+            .values(store_id=store_id, key=key, order_id=order_id, request_hash=request_hash, created_at=datetime.utcnow())
+            .on_conflict_do_nothing()
+            .returning(OrderIdempotencyKey.order_id)
+        )
+        if claimed is None:
+            # Another attempt with this key committed while we were checking,
+            # or the client-generated id is already claimed under another key
+            replay = await find_idempotent_order(db, store_id, key)
+            if replay is None and not await find_claimed_keys(db, store_id, [key]):
+                raise HTTPException(
+                    status_code=status.HTTP_409_CONFLICT,
+                    detail="Order id already exists"
+                )
+            return replay_order(replay, request_hash, response)
+
+    total, order_items, product_map = await prepare_order_items(db, store, order_data.items, registry)
+
+    # Deduct inventory for all items at once (quantity_in_base is already converted)
+    await update_inventory(db, store, item_inventory_changes(order_items, -1), product_map)
+
+    # Save customer name
+    await save_customer_name(db, order_data.customer_name, str(store_id))
+
+    # Create order; its items are inserted together in one batch on commit
     order = Order(
-        store_id=store.id,
+        id=order_id,
+        store_id=store_id,
         customer_name=order_data.customer_name,
         total=total,
         is_paid=order_data.is_paid,
-        created_by=current_user.id
+        created_at=datetime.utcnow(),
+        created_by=current_user.id,
+        items=order_items
     )
     db.add(order)
-    db.flush()  # Get order.id without committing
 
-    # Add order items and update inventory
-    for item_data in order_items_data:
-        order_item = OrderItem(
-            order_id=order.id,
-            product_id=item_data["product_id"],
-            product_name=item_data["product_name"],
-            quantity=item_data["quantity"],
-            price=item_data["price"],
-            sold_in_unit=item_data["sold_in_unit"],
-            base_unit=item_data["base_unit"],
-            quantity_in_base=item_data["quantity_in_base"]
-        )
-        db.add(order_item)
+    rollup = SalesDelta(store)
+    rollup.add_order(order)
+    await OrderEventService.publish(db, store_id, "created", [order_summary(order)])
+    await db.flush()
+    await rollup.apply(db)  # Last: it locks the day's rollup row until commit
+    await db.commit()
+    await StoreVersionService.bump_committed(db, store_id, "orders", *(("customers",) if order_data.customer_name else ()))
+    return order
 
-        # Update inventory (deduct) - pass quantity_in_base directly since it's already converted
-        update_inventory(db, str(item_data["product_id"]), -item_data["quantity_in_base"], store)
 
-    # Save customer name
-    save_customer_name(db, order_data.customer_name, str(store.id))
+def batch_failure(index: int, order_data: OrderCreate, error: str) -> dict:
+    return {"index": index, "id": order_data.id, "status": "failed", "error": error}
 
-    db.commit()
-    db.refresh(order)
-    return order
 
+def batch_replay(index: int, order_data: OrderCreate, replay: Optional[Tuple[Order, str]], request_hash: str) -> dict:
+    """Result for a batch order that was uploaded before"""
+    if replay is None:
+        # The id was used by an order that has since been deleted
+        return batch_failure(index, order_data, "Order id has already been used")
+    order, stored_hash = replay
+    if stored_hash != request_hash:
+        return batch_failure(index, order_data, "Order id has already been used with a different request")
+    return {"index": index, "id": order_data.id, "status": "replayed", "order": order}
 
-@router.get("", response_model=List[OrderResponse])
-async def list_orders(
-    date_filter: Optional[str] = None,
+
+@router.post("/batch", response_model=OrderBatchResponse)
+async def create_orders_batch(
+    batch: OrderBatchCreate,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_store_user),
+    db: AsyncSession = Depends(get_db),
+    registry: UnitRegistry = Depends(get_unit_registry)
 ):
-    """List orders for the current store with optional date filter"""
-    query = db.query(Order).filter(Order.store_id == store.id)
-
-    if date_filter:
+    """Create the orders a device queued while offline
+
+    Each order succeeds or fails on its own, in batch order, and the whole
+    upload runs a constant number of statements: one lookup of orders
+    already uploaded, one product lookup, one key claim, one stock lock,
+    one stock update, the order/items inserts and one customer upsert.
+
+    Orders are idempotent per client order id (shared with POST
+    /api/orders), so a partial upload can be resent as a whole. An order
+    that runs out of stock fails without consuming its id and can be
+    retried later.
+    """
+    store_id = store.id
+    orders_data = batch.orders
+    keys = [str(order_data.id) for order_data in orders_data]
+    hashes = [request_fingerprint(order_data) for order_data in orders_data]
+    results: List[Optional[dict]] = [None] * len(orders_data)
+
+    # Orders from an earlier (possibly interrupted) upload
+    existing = await find_idempotent_orders(db, store_id, keys)
+    for index, key in enumerate(keys):
+        if key in existing:
+            results[index] = batch_replay(index, orders_data[index], existing[key], hashes[index])
+
+    # Price every new order against one product lookup
+    pending = [index for index, result in enumerate(results) if result is None]
+    priced: Dict[int, Tuple[Decimal, List[OrderItem]]] = {}
+    product_map: Dict[str, Product] = {}
+    if pending:
+        product_map = await load_store_products(
+            db, store, (item.product_id for index in pending for item in orders_data[index].items)
+        )
+    for index in pending:
         try:
-            filter_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
-            query = query.filter(
-                func.date(Order.created_at) == filter_date
+            priced[index] = build_order_items(
+                store, orders_data[index].items, product_map, registry, check_inventory=False
             )
-        except ValueError:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="Invalid date format. Use YYYY-MM-DD"
+        except HTTPException as e:
+            results[index] = batch_failure(index, orders_data[index], e.detail)
+
+    # Claim the ids in a fixed order; ids claimed concurrently are replayed
+    if priced:
+        claimed = set((await db.scalars(
+            pg_insert(OrderIdempotencyKey)
+            .values([
+                {
+                    "store_id": store_id,
+                    "key": keys[index],
+                    "order_id": orders_data[index].id,
+                    "request_hash": hashes[index],
+                    "created_at": datetime.utcnow(),
+                }
+                for index in sorted(priced, key=lambda index: keys[index])
+            ])
+            .on_conflict_do_nothing()
+            .returning(OrderIdempotencyKey.key)
+        )).all())
+        lost = [index for index in priced if keys[index] not in claimed]
+        if lost:
+            late = await find_idempotent_orders(db, store_id, [keys[index] for index in lost])
+            unmatched = [keys[index] for index in lost if keys[index] not in late]
+            used = await find_claimed_keys(db, store_id, unmatched) if unmatched else set()
+            for index in lost:
+                if keys[index] in late or keys[index] in used:
+                    results[index] = batch_replay(index, orders_data[index], late.get(keys[index]), hashes[index])
+                else:
+                    # Claimed by an order of another store (or under another key)
+                    results[index] = batch_failure(index, orders_data[index], "Order id already exists")
+                del priced[index]
+
+    # Allocate stock to orders in batch order under one lock
+    if store.track_inventory and priced:
+        demand = {index: item_inventory_changes(priced[index][1], -1) for index in priced}
+        stock = dict((await db.execute(
+            select(Product.id, Product.inventory)
+            .where(
+                Product.id.in_({pid for changes in demand.values() for pid in changes}),
+                Product.inventory.isnot(None)
+            )
+            .order_by(Product.id)
+            .with_for_update()
+        )).all())
+
+        short_orders = []
+        for index in sorted(priced):
+            short = next(
+                (pid for pid, qty in demand[index].items() if pid in stock and stock[pid] + qty < 0),
+                None
             )
+            if short is not None:
+                results[index] = batch_failure(
+                    index, orders_data[index], f"Insufficient inventory for product: {product_map[str(short)].name}"
+                )
+                short_orders.append(index)
+                continue
+            for pid, qty in demand[index].items():
+                if pid in stock:
+                    stock[pid] += qty
+
+        if short_orders:
+            # Release their ids so the device can retry them
+            await db.execute(delete(OrderIdempotencyKey).where(
+                OrderIdempotencyKey.store_id == store_id,
+                OrderIdempotencyKey.key.in_([keys[index] for index in short_orders])
+            ))
+            for index in short_orders:
+                del priced[index]
 
-    orders = query.order_by(Order.created_at.desc()).all()
-    return orders
+        await update_inventory(
+            db, store, InventoryService.merge_changes(*(demand[index] for index in priced)), product_map
+        )
+
+    # Orders and their items are inserted in one batch each on commit
+    orders = []
+    rollup = SalesDelta(store)
+    created_at = datetime.utcnow()
+    for index in sorted(priced):
+        order_data = orders_data[index]
+        total, order_items = priced[index]
+        order = Order(
+            id=order_data.id,
+            store_id=store_id,
+            customer_name=order_data.customer_name,
+            total=total,
+            is_paid=order_data.is_paid,
+            created_at=created_at,
+            created_by=current_user.id,
+            items=order_items
+        )
+        orders.append(order)
+        rollup.add_order(order)
+        results[index] = {"index": index, "id": order_data.id, "status": "created", "order": order}
+
+    if orders:
+        db.add_all(orders)
+        await save_customer_names(db, (order.customer_name for order in orders), str(store_id))
+        await OrderEventService.publish(db, store_id, "created", [order_summary(order) for order in orders])
+        await db.flush()
+        await rollup.apply(db)
+        await db.commit()
+        named = any(order.customer_name for order in orders)
+        await StoreVersionService.bump_committed(db, store_id, "orders", *(("customers",) if named else ()))
+    else:
+        await db.commit()
+
+    return {
+        "total": len(results),
+        "created": sum(1 for result in results if result["status"] == "created"),
+        "replayed": sum(1 for result in results if result["status"] == "replayed"),
+        "failed": sum(1 for result in results if result["status"] == "failed"),
+        "results": results,
+    }
+
+
+def encode_cursor(order: Order) -> str:
+    """Opaque keyset cursor pointing just after an order"""
+    raw = f"{order.created_at.isoformat()}|{order.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """Inverse of encode_cursor; raises 400 for anything it did not produce"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        created_at, order_id = raw.split("|")
+        return datetime.fromisoformat(created_at), UUID(order_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+
+def parse_date(value: str) -> date_type:
+    """Parse a YYYY-MM-DD query parameter"""
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid date format. Use YYYY-MM-DD"
+        )
+
+
+async def archived_orders(
+    db: AsyncSession,
+    store: Store,
+    start: Optional[datetime],
+    end: Optional[datetime],
+    is_paid: Optional[bool] = None,
+    customer: Optional[str] = None,
+    after: Optional[Tuple[datetime, UUID]] = None,
+    limit: Optional[int] = None
+) -> List[OrderResponse]:
+    """Archived orders matching the list filters, newest first
+
+    Only segments overlapping [start, end) are read, newest first and no
+    further than needed for limit orders; none at all for ranges that
+    start after the store's archive.
+    """
+    needle = customer.lower() if customer else None
+
+    def matches(order: OrderResponse) -> bool:
+        return (
+            (is_paid is None or order.is_paid == is_paid)
+            and (needle is None or needle in (order.customer_name or "").lower())
+            and (after is None or (order.created_at, order.id) < after)
+        )
 
+    return await OrderArchiveService.orders_between(db, store, start, end, matches, limit)
 
-@router.get("/today", response_model=List[OrderResponse])
+
+@router.get("", response_model=Union[List[OrderResponse], OrderPage])
+async def list_orders(
+    date_filter: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size; returns an OrderPage"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    is_paid: Optional[bool] = None,
+    customer: Optional[str] = Query(None, max_length=100, description="Customer name contains (case-insensitive)"),
+    date_from: Optional[str] = Query(None, description="First day to include (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, description="Last day to include (YYYY-MM-DD)"),
+    store: Store = Depends(get_current_store),
+    db: AsyncSession = Depends(get_db)
+):
+    """List orders for the current store, newest first
+
+    With limit or cursor the result is an OrderPage fetched by keyset on
+    (created_at, id), so every page costs the same. Without them every
+    matching order is returned as a plain list. Archived orders follow the
+    ones still in the database when the range reaches back into the archive;
+    a plain list only includes them for ranges with a first day.
+    """
+    query = orders_with_items().where(Order.store_id == store.id)
+
+    # Days are the store's business days, as half-open ranges on created_at
+    # so the (store_id, created_at) index is used
+    starts, ends = [], []
+    if date_filter:
+        start, end = BusinessDayService.day_range(store, parse_date(date_filter))
+        starts.append(start)
+        ends.append(end)
+    if date_from:
+        starts.append(BusinessDayService.day_start_utc(store, parse_date(date_from)))
+    if date_to:
+        ends.append(BusinessDayService.day_range(store, parse_date(date_to))[1])
+    start = max(starts) if starts else None
+    end = min(ends) if ends else None
+    if start is not None:
+        query = query.where(Order.created_at >= start)
+    if end is not None:
+        query = query.where(Order.created_at < end)
+    if is_paid is not None:
+        query = query.where(Order.is_paid == is_paid)
+    if customer:
+        escaped = customer.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        query = query.where(Order.customer_name.ilike(f"%{escaped}%", escape="\\"))
+
+    query = query.order_by(Order.created_at.desc(), Order.id.desc())
+
+    if limit is None and cursor is None:
+        orders = (await db.scalars(query)).all()
+        if start is None:
+            # Unbounded: reading the whole archive is left to pages and exports
+            return orders
+        return orders + await archived_orders(db, store, start, end, is_paid, customer)
+
+    limit = limit or DEFAULT_PAGE_SIZE
+    after = None
+    if cursor:
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        after = (cursor_created_at, cursor_id)
+        query = query.where(
+            tuple_(Order.created_at, Order.id) < tuple_(cursor_created_at, cursor_id),
+            Order.created_at <= cursor_created_at  # Prunes newer partitions
+        )
+
+    # One extra row tells whether there is a next page
+    orders = (await db.scalars(query.limit(limit + 1))).all()
+    if len(orders) <= limit:
+        # Archived orders are all older than hot ones: they continue the page
+        if after is not None:
+            # Only segments reaching back past the cursor are read
+            after_end = cursor_created_at + timedelta(microseconds=1)
+            end = min(end, after_end) if end else after_end
+        archived = await archived_orders(db, store, start, end, is_paid, customer, after, limit + 1 - len(orders))
+        orders = orders + archived
+    next_cursor = encode_cursor(orders[limit - 1]) if len(orders) > limit else None
+    return OrderPage(orders=orders[:limit], next_cursor=next_cursor)
+
+
+@router.get("/today", response_model=List[OrderResponse], dependencies=[Depends(store_list_etag("orders", daily=True))])
 async def list_today_orders(
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """List today's orders for the current store"""
-    today = date_type.today()
-    orders = db.query(Order).filter(
+    """List the current business day's orders for the current store
+
+    Answers If-None-Match with 304 while no order of the store changed
+    and the business day is the same.
+    """
+    start, end = BusinessDayService.day_range(store, BusinessDayService.current_day(store))
+    orders = (await db.scalars(orders_with_items().where(
         Order.store_id == store.id,
-        func.date(Order.created_at) == today
-    ).order_by(Order.created_at.desc()).all()
+        Order.created_at >= start,
+        Order.created_at < end
+    ).order_by(Order.created_at.desc(), Order.id.desc()))).all()
     return orders
 
 
+@router.get("/events")
+async def order_events(
+    store: Store = Depends(get_current_store)
+):
+    """Stream the store's order events as server-sent events
+
+    Sends "ready" first, then order.created, order.edited, order.paid and
+    order.deleted as other devices write, each with the summaries of the
+    orders concerned. On "ready" and "resync" clients should refetch
+    today's orders, as events sent while they were away are not replayed.
+    """
+    try:
+        subscription = await order_event_hub.subscribe(store.id)
+    except OrderEventsUnavailable:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Live order events are unavailable"
+        )
+
+    async def body():
+        try:
+            async for chunk in order_event_hub.stream(subscription):
+                yield chunk
+        finally:
+            order_event_hub.unsubscribe(subscription)
+
+    return StreamingResponse(
+        body(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/export")
+async def export_orders(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$", description="csv (one row per line) or ndjson (one order per line)"),
+    date_from: Optional[str] = Query(None, alias="from", description="First day to include (YYYY-MM-DD)"),
+    date_to: Optional[str] = Query(None, alias="to", description="Last day to include (YYYY-MM-DD)"),
+    store: Store = Depends(get_current_store)
+):
+    """Stream the store's orders, oldest first, as CSV or NDJSON
+
+    Lines are read through a server-side cursor and sent batch by batch,
+    so exports of any size run in constant memory. The stream uses its own
+    session: request-scoped ones are closed before the body is sent.
+    """
+    start = BusinessDayService.day_start_utc(store, parse_date(date_from)) if date_from else None
+    end = BusinessDayService.day_range(store, parse_date(date_to))[1] if date_to else None
+    query = OrderExportService.lines_query(store, start, end)
+    formatter = OrderExportService.csv_chunks if format == "csv" else OrderExportService.ndjson_chunks
+
+    async def batches(db: AsyncSession):
+        # Archived orders first, one segment at a time: they are the oldest
+        for segment in await OrderArchiveService.segments_between(db, store, start, end):
+            orders = [
+                order for order in await OrderArchiveService.read_orders(segment)
+                if (start is None or order.created_at >= start) and (end is None or order.created_at < end)
+            ]
+            if orders:
+                yield OrderExportService.archived_lines(orders)
+        result = await db.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+    async def body():
+        async with request.app.state.session_factory() as db:
+            async for chunk in formatter(batches(db)):
+                yield chunk
+
+    filename = f"orders-{date_from or 'start'}-{date_to or 'now'}.{format}"
+    return StreamingResponse(
+        body(),
+        media_type=EXPORT_FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: str,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific order"""
-    order = db.query(Order).filter(
+    order = await db.scalar(orders_with_items().where(
         Order.id == order_id,
         Order.store_id == store.id
-    ).first()
+    ))
 
+    if not order:
+        try:
+            order = await OrderArchiveService.find_order(db, store, UUID(order_id))
+        except ValueError:
+            order = None
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
     return order
 
 
+@router.get("/{order_id}/history", response_model=OrderHistoryPage)
+async def get_order_history(
+    order_id: str,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    store: Store = Depends(get_current_store),
+    db: AsyncSession = Depends(get_db)
+):
+    """List an order's edits, newest first, with what each one changed"""
+    order = await db.scalar(select(Order.id).where(
+        Order.id == order_id,
+        Order.store_id == store.id
+    ))
+
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    query = select(OrderEditHistory).where(OrderEditHistory.order_id == order)
+    if cursor:
+        if not cursor.isdigit():
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid cursor"
+            )
+        query = query.where(OrderEditHistory.version < int(cursor))
+
+    entries = (await db.scalars(query.order_by(OrderEditHistory.version.desc()).limit(limit + 1))).all()
+    next_cursor = str(entries[limit - 1].version) if len(entries) > limit else None
+    return OrderHistoryPage(entries=entries[:limit], next_cursor=next_cursor)
+
+
+@router.get("/{order_id}/history/{version}", response_model=OrderVersionResponse)
+async def get_order_version(
+    order_id: str,
+    version: int,
+    store: Store = Depends(get_current_store),
+    db: AsyncSession = Depends(get_db)
+):
+    """Rebuild an order as it was after a given edit (0 = as created)"""
+    order = await db.scalar(orders_with_items().where(
+        Order.id == order_id,
+        Order.store_id == store.id
+    ))
+
+    if not order:
+        raise HTTPException(status_code=404, detail="Order not found")
+
+    if version < 0:
+        raise HTTPException(status_code=404, detail="Order version not found")
+
+    # Undo the edits made after the requested version, newest first
+    later_edits = (await db.scalars(select(OrderEditHistory.changes).where(
+        OrderEditHistory.order_id == order.id,
+        OrderEditHistory.version > version
+    ).order_by(OrderEditHistory.version.desc()))).all()
+
+    # Versions are numbered without gaps, so with no later edits the
+    # requested one must be the latest
+    if version > 0 and not later_edits and not await db.scalar(select(OrderEditHistory.id).where(
+        OrderEditHistory.order_id == order.id,
+        OrderEditHistory.version == version
+    )):
+        raise HTTPException(status_code=404, detail="Order version not found")
+
+    state = OrderHistoryService.order_state(order)
+    for changes in later_edits:
+        state = OrderHistoryService.undo(state, changes)
+
+    return OrderVersionResponse(order_id=order.id, version=version, **state)
+
+
 @router.patch("/{order_id}", response_model=OrderResponse)
 async def update_order(
     order_id: str,
     order_data: OrderUpdate,
     store: Store = Depends(get_current_store),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_store_user),
+    db: AsyncSession = Depends(get_db),
+    registry: UnitRegistry = Depends(get_unit_registry)
 ):
     """Update an order"""
-    order = db.query(Order).filter(
+    # Locked so concurrent edits apply their rollup deltas one after the other
+    order = await db.scalar(orders_with_items().where(
         Order.id == order_id,
         Order.store_id == store.id
-    ).first()
+    ).with_for_update())
 
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    # Save previous state for edit history
-    previous_state = {
-        "customer_name": order.customer_name,
-        "total": float(order.total),
-        "items": [
-            {
-                "product_id": str(item.product_id),
-                "product_name": item.product_name,
-                "quantity": item.quantity,
-                "price": float(item.price)
-            }
-            for item in order.items
-        ]
-    }
+    # The sales rollups swap the order as it was for the order as it ends up
+    rollup = SalesDelta(store)
+    rollup.add_order(order, -1)
+    was_paid = order.is_paid
+
+    # What this edit changes, for the history diff
+    field_changes = {}
+    removed, new_items, item_changes = [], [], []
 
     # Track if actual order content was edited (not just payment status)
     content_edited = False
@@ -265,129 +956,88 @@ async def update_order(
     if order_data.customer_name is not None:
         if order.customer_name != order_data.customer_name:
             content_edited = True
+            field_changes["customer_name"] = (order.customer_name, order_data.customer_name)
         order.customer_name = order_data.customer_name
-        save_customer_name(db, order_data.customer_name, str(store.id))
 
     # Update payment status if provided
     if order_data.is_paid is not None:
         order.is_paid = order_data.is_paid
 
-    # Update items if provided
+    # Update items if provided: only changed, removed and added lines are
+    # written, and only added lines need their products loaded
     if order_data.items is not None:
-        content_edited = True
-        # Restore inventory from old order items (use quantity_in_base if available)
-        for old_item in order.items:
-            if old_item.product_id:
-                restore_quantity = old_item.quantity_in_base if old_item.quantity_in_base else old_item.quantity
-                update_inventory(db, str(old_item.product_id), restore_quantity, store)
-
-        # Verify all new products exist
-        product_ids = [item.product_id for item in order_data.items]
-        products = db.query(Product).filter(
-            Product.id.in_(product_ids),
-            Product.store_id == store.id
-        ).all()
-
-        if len(products) != len(product_ids):
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="One or more products not found"
-            )
-
-        # Create product lookup map
-        product_map = {str(p.id): p for p in products}
-
-        # Calculate new total and prepare new order items
-        total = Decimal(0)
-        new_order_items = []
-
-        for item_data in order_data.items:
-            product = product_map[str(item_data.product_id)]
-
-            # Determine selling unit (from request or product's base_unit or None)
-            sold_in_unit = item_data.unit if item_data.unit else product.base_unit
-
-            # Validate unit if provided
-            if sold_in_unit:
-                unit = db.query(Unit).filter(Unit.code == sold_in_unit).first()
-                if not unit:
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Invalid unit code: {sold_in_unit}"
-                    )
+        changed, removed, added = diff_order_items(order.items, order_data.items, registry)
 
-                # If product has a base unit, validate compatibility
-                if product.base_unit:
-                    if not UnitService.are_compatible(sold_in_unit, product.base_unit, db):
-                        raise HTTPException(
-                            status_code=status.HTTP_400_BAD_REQUEST,
-                            detail=f"Unit {sold_in_unit} is not compatible with product base unit {product.base_unit}"
-                        )
-
-            # Convert quantity to base unit for inventory check
-            quantity_in_base = item_data.quantity
-            if product.base_unit and sold_in_unit and sold_in_unit != product.base_unit:
-                quantity_in_base = UnitService.convert(item_data.quantity, sold_in_unit, product.base_unit, db)
-
-            # Check inventory
-            if store.track_inventory and product.inventory is not None:
-                if product.inventory < quantity_in_base:
-                    # Restore inventory before raising error
-                    for old_item in order.items:
-                        if old_item.product_id:
-                            update_inventory(db, str(old_item.product_id), old_item.quantity_in_base if old_item.quantity_in_base else old_item.quantity, store)
-                    raise HTTPException(
-                        status_code=status.HTTP_400_BAD_REQUEST,
-                        detail=f"Insufficient inventory for product: {product.name}"
-                    )
+        if changed or removed or added:
+            content_edited = True
 
-            item_total = product.price * item_data.quantity
-            total += item_total
-
-            new_order_items.append({
-                "product_id": item_data.product_id,
-                "product_name": product.name,
-                "quantity": item_data.quantity,
-                "price": product.price,
-                "sold_in_unit": sold_in_unit,
-                "base_unit": product.base_unit,
-                "quantity_in_base": quantity_in_base
-            })
-
-        # Delete old order items
-        db.query(OrderItem).filter(OrderItem.order_id == order.id).delete()
-
-        # Add new order items and update inventory
-        for item_data in new_order_items:
-            order_item = OrderItem(
-                order_id=order.id,
-                product_id=item_data["product_id"],
-                product_name=item_data["product_name"],
-                quantity=item_data["quantity"],
-                price=item_data["price"],
-                sold_in_unit=item_data["sold_in_unit"],
-                base_unit=item_data["base_unit"],
-                quantity_in_base=item_data["quantity_in_base"]
+        product_map = {}
+        if added:
+            _, new_items, product_map = await prepare_order_items(
+                db, store, added, registry, check_inventory=False
             )
-            db.add(order_item)
-
-            # Update inventory (deduct) - use quantity_in_base since it's already converted
-            update_inventory(db, str(item_data["product_id"]), -item_data["quantity_in_base"], store)
 
+        # Net stock change per product: old quantities back, new ones out
+        changes = InventoryService.merge_changes(
+            item_inventory_changes(removed, 1),
+            item_inventory_changes(new_items, -1)
+        )
+        for item, quantity in changed:
+            quantity_in_base = converted_to_base(item, quantity, registry)
+            if item.product_id:
+                old_in_base = item.quantity_in_base if item.quantity_in_base else item.quantity
+                changes = InventoryService.merge_changes(changes, {item.product_id: old_in_base - quantity_in_base})
+            item_changes.append((item, {
+                "quantity": (item.quantity, quantity),
+                "quantity_in_base": (item.quantity_in_base, quantity_in_base)
+            }))
+            item.quantity = quantity
+            item.quantity_in_base = quantity_in_base
+
+        names = {item.product_id: item.product_name for item in order.items if item.product_id}
+        await update_inventory(db, store, changes, product_map, names)
+
+        # The unit of work batches these into one DELETE, UPDATE and INSERT
+        for item in removed:
+            order.items.remove(item)
+        order.items.extend(new_items)
+
+        # Kept lines keep the price they were sold at
+        total = sum((item.price * item.quantity for item in order.items), Decimal(0))
+        total = total.quantize(CENTS, rounding=ROUND_HALF_UP)
+        if total != order.total:
+            field_changes["total"] = (order.total, total)
         order.total = total
 
-    # Mark order as edited and save edit history only if content was changed
+    # After the stock update: every order write locks products, then
+    # customer names, then the store's rollup and version rows
+    if order_data.customer_name is not None:
+        await save_customer_name(db, order_data.customer_name, str(store.id))
+
+    # Mark order as edited and record what changed, only if content was changed
     if content_edited:
         order.is_edited = True
-        edit_history = OrderEditHistory(
+        order.updated_at = datetime.utcnow()  # The row changes even when only its lines do
+        db.add(OrderEditHistory(
             order_id=order.id,
+            order_created_at=order.created_at,
+            version=next_history_version(order.id),
             edited_by=current_user.id,
-            previous_state=previous_state
-        )
-        db.add(edit_history)
-
-    db.commit()
-    db.refresh(order)
+            changes=OrderHistoryService.build_changes(
+                field_changes,
+                removed=removed,
+                added=new_items,
+                changed=item_changes
+            )
+        ))
+
+    rollup.add_order(order)
+    if content_edited or order.is_paid != was_paid:
+        await OrderEventService.publish(db, store.id, "edited" if content_edited else "paid", [order_summary(order)])
+    await db.flush()
+    await rollup.apply(db)
+    await db.commit()
+    await StoreVersionService.bump_committed(db, store.id, "orders", *(("customers",) if order_data.customer_name else ()))
     return order
 
 
@@ -395,89 +1045,96 @@ async def update_order(
 async def bulk_update_payment(
     request: BulkUpdatePaymentRequest,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Bulk update payment status for multiple orders"""
-    results = []
-    successful = 0
-    failed = 0
-
-    # Validate all orders belong to the current store
-    orders = db.query(Order).filter(
-        Order.id.in_(request.order_ids),
-        Order.store_id == store.id
-    ).all()
-
-    # Create a map of found orders
-    order_map = {str(order.id): order for order in orders}
-
-    # Process each order ID
-    for order_id in request.order_ids:
-        order_id_str = str(order_id)
-
-        if order_id_str not in order_map:
-            # Order not found or doesn't belong to store
-            results.append(BulkUpdateResult(
-                order_id=order_id,
-                success=False,
-                error="Order not found or access denied"
-            ))
-            failed += 1
-            continue
-
-        try:
-            # Update payment status
-            order = order_map[order_id_str]
-            order.is_paid = request.is_paid
-            db.commit()
-
-            results.append(BulkUpdateResult(
-                order_id=order_id,
-                success=True
-            ))
-            successful += 1
-
-        except Exception as e:
-            db.rollback()
-            results.append(BulkUpdateResult(
-                order_id=order_id,
-                success=False,
-                error=str(e)
-            ))
-            failed += 1
-
-    # Return appropriate status code
-    response = BulkUpdatePaymentResponse(
-        total=len(request.order_ids),
+    """Bulk update payment status for many orders in one statement
+
+    Orders are given by id, or selected by customer name and/or business
+    day. Either way a single UPDATE ... RETURNING runs in one transaction,
+    followed by one upsert of the sales rollups for the orders that flipped.
+    """
+    matched = select(Order.id, Order.created_at, Order.is_paid).where(Order.store_id == store.id)
+
+    if request.order_ids is not None:
+        matched = matched.where(Order.id == any_(bindparam(
+            "order_ids", list(set(request.order_ids)), type_=ARRAY(PGUUID(as_uuid=True))
+        )))
+    else:
+        matched = matched.where(Order.is_paid != request.is_paid)
+        if request.customer_name is not None:
+            matched = matched.where(Order.customer_name == request.customer_name)
+        if request.date is not None:
+            start, end = BusinessDayService.day_range(store, request.date)
+            matched = matched.where(Order.created_at >= start, Order.created_at < end)
+
+    # The status before the update tells which orders flipped
+    before = matched.order_by(Order.id).with_for_update().cte("before")
+    stmt = (
+        update(Order)
+        .where(Order.id == before.c.id, Order.created_at == before.c.created_at)
+        .values(is_paid=request.is_paid)
+        .returning(Order.id, Order.created_at, Order.total, before.c.is_paid.label("was_paid"))
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await db.execute(stmt)).all()
+    updated = {row.id for row in rows}
+
+    rollup = SalesDelta(store)
+    flipped = []
+    for row in rows:
+        if row.was_paid != request.is_paid:
+            rollup.add_payment_change(row.created_at, row.total, request.is_paid)
+            flipped.append({"id": str(row.id), "is_paid": request.is_paid})
+    await OrderEventService.publish(db, store.id, "paid", flipped)
+    await rollup.apply(db)
+    await db.commit()
+    if rows:
+        await StoreVersionService.bump_committed(db, store.id, "orders")
+
+    # Report in request order; in filter mode every matched order succeeded
+    order_ids = request.order_ids if request.order_ids is not None else sorted(updated, key=str)
+    results = [
+        BulkUpdateResult(order_id=order_id, success=True)
+        if order_id in updated else
+        BulkUpdateResult(order_id=order_id, success=False, error="Order not found or access denied")
+        for order_id in order_ids
+    ]
+    successful = sum(1 for r in results if r.success)
+
+    return BulkUpdatePaymentResponse(
+        total=len(results),
         successful=successful,
-        failed=failed,
+        failed=len(results) - successful,
         results=results
     )
 
-    return response
-
 
 @router.delete("/{order_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_order(
     order_id: str,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete an order"""
-    order = db.query(Order).filter(
+    order = await db.scalar(orders_with_items().where(
         Order.id == order_id,
         Order.store_id == store.id
-    ).first()
+    ).with_for_update())
 
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
     # Restore inventory before deleting (use quantity_in_base if available)
-    for item in order.items:
-        if item.product_id:
-            restore_quantity = item.quantity_in_base if item.quantity_in_base else item.quantity
-            update_inventory(db, str(item.product_id), restore_quantity, store)
-
-    db.delete(order)
-    db.commit()
+    await update_inventory(db, store, item_inventory_changes(order.items, 1))
+
+    rollup = SalesDelta(store)
+    rollup.add_order(order, -1)
+
+    await SyncService.record_deletions(db, store.id, "order", [order.id])
+    await OrderEventService.publish(db, store.id, "deleted", [{"id": str(order.id)}])
+    await db.delete(order)
+    await db.flush()
+    await rollup.apply(db)
+    await db.commit()
+    await StoreVersionService.bump_committed(db, store.id, "orders")
     return None
@@ -1,11 +1,17 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime
 
 from ..database import get_db
-from ..models import Product, Store, Unit
+from ..models import Combo, ComboItem, Product, Store
 from ..schemas.product import ProductCreate, ProductUpdate, ProductResponse
-from ..dependencies import get_current_store
+from ..dependencies import get_current_store, get_unit_registry, store_list_etag
+from ..services.unit_registry import UnitRegistry
+from ..services.sync_service import SyncService
+from ..services.sales_rollup_service import SalesRollupService
+from ..services.store_version_service import StoreVersionService
 
 router = APIRouter(prefix="/api/products", tags=["Products"])
 
@@ -14,12 +20,13 @@ router = APIRouter(prefix="/api/products", tags=["Products"])
 async def create_product(
     product_data: ProductCreate,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    registry: UnitRegistry = Depends(get_unit_registry)
 ):
     """Create a new product"""
     # Validate base_unit if provided
     if product_data.base_unit:
-        unit = db.query(Unit).filter(Unit.code == product_data.base_unit).first()
+        unit = registry.get(product_data.base_unit)
         if not unit:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -36,24 +43,28 @@ async def create_product(
         price_per_unit=product_data.price_per_unit
     )
     db.add(product)
-    db.commit()
-    db.refresh(product)
+    await StoreVersionService.bump(db, store.id, "catalog")
+    await db.commit()
+    await db.refresh(product)
     return product
 
 
-@router.get("", response_model=List[ProductResponse])
+@router.get("", response_model=List[ProductResponse], dependencies=[Depends(store_list_etag("catalog", inventory=True))])
 async def list_products(
     category: Optional[str] = None,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """List all products for the current store"""
-    query = db.query(Product).filter(Product.store_id == store.id)
+    """List all products for the current store
+
+    Answers If-None-Match with 304 while no product changed.
+    """
+    query = select(Product).where(Product.store_id == store.id)
 
     if category:
-        query = query.filter(Product.category == category)
+        query = query.where(Product.category == category)
 
-    products = query.all()
+    products = (await db.scalars(query)).all()
     return products
 
 
@@ -61,13 +72,13 @@ async def list_products(
 async def get_product(
     product_id: str,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get a specific product"""
-    product = db.query(Product).filter(
+    product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.store_id == store.id
-    ).first()
+    ))
 
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
@@ -80,20 +91,21 @@ async def update_product(
     product_id: str,
     product_data: ProductUpdate,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    registry: UnitRegistry = Depends(get_unit_registry)
 ):
     """Update a product"""
-    product = db.query(Product).filter(
+    product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.store_id == store.id
-    ).first()
+    ))
 
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
     # Validate base_unit if provided
     if product_data.base_unit is not None:
-        unit = db.query(Unit).filter(Unit.code == product_data.base_unit).first()
+        unit = registry.get(product_data.base_unit)
         if not unit:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -118,8 +130,9 @@ async def update_product(
     if product_data.price_per_unit is not None:
         product.price_per_unit = product_data.price_per_unit
 
-    db.commit()
-    db.refresh(product)
+    await StoreVersionService.bump(db, store.id, "catalog")
+    await db.commit()
+    await db.refresh(product)
     return product
 
 
@@ -127,17 +140,27 @@ async def update_product(
 async def delete_product(
     product_id: str,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a product"""
-    product = db.query(Product).filter(
+    product = await db.scalar(select(Product).where(
         Product.id == product_id,
         Product.store_id == store.id
-    ).first()
+    ))
 
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    db.delete(product)
-    db.commit()
+    # Combos lose their lines of this product, so devices must resync them
+    await db.execute(
+        update(Combo)
+        .where(Combo.id.in_(select(ComboItem.combo_id).where(ComboItem.product_id == product.id)))
+        .values(updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    await SyncService.record_deletions(db, store.id, "product", [product.id])
+    await SalesRollupService.forget_product(db, store.id, product.id)
+    await StoreVersionService.bump(db, store.id, "catalog")
+    await db.delete(product)
+    await db.commit()
     return None
@@ -0,0 +1,52 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date as date_type
+
+from ..database import get_db
+from ..schemas.report import DailyReport, RangeReport
+from ..dependencies import TenantContext, get_tenant_context
+from ..services.business_day_service import BusinessDayService
+from ..services.report_service import ReportService
+from ..services.sales_rollup_service import SalesRollupService
+
+router = APIRouter(prefix="/api/reports", tags=["Reports"])
+
+
+@router.get("/daily", response_model=DailyReport)
+async def get_daily_report(
+    date: Optional[date_type] = Query(None, description="Business day (YYYY-MM-DD); the current one by default"),
+    include_text: bool = Query(False, description="Also return the text summary"),
+    context: TenantContext = Depends(get_tenant_context),
+    db: AsyncSession = Depends(get_db)
+):
+    """Revenue, order count, paid/unpaid split and per-product sales of a day
+
+    Aggregated in the database: two queries whatever the number of orders.
+    """
+    store = context.store
+    day = date or BusinessDayService.current_day(store)
+    report = await ReportService.daily_summary(db, store, day)
+    if include_text:
+        report["text"] = ReportService.text_summary(report, store.name, context.company.currency_symbol)
+    return report
+
+
+@router.get("/range", response_model=RangeReport)
+async def get_range_report(
+    date_from: date_type = Query(..., alias="from", description="First business day (YYYY-MM-DD)"),
+    date_to: date_type = Query(..., alias="to", description="Last business day (YYYY-MM-DD), included"),
+    context: TenantContext = Depends(get_tenant_context),
+    db: AsyncSession = Depends(get_db)
+):
+    """Totals, per-day totals and per-product sales of a range of days
+
+    Read from the daily sales rollups, so the cost grows with the number of
+    days and products in the range, not with the number of orders.
+    """
+    if date_from > date_to:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="'from' must not be after 'to'"
+        )
+    return await SalesRollupService.range_summary(db, context.store, date_from, date_to)
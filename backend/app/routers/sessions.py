@@ -1,11 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date as date_module
 
 from ..database import get_db
 from ..models import Session as SessionModel, Store
 from ..schemas.session import SessionResponse
 from ..dependencies import get_current_store
+from ..services.business_day_service import BusinessDayService
 
 router = APIRouter(prefix="/api/sessions", tags=["Sessions"])
 
@@ -13,15 +15,15 @@ router = APIRouter(prefix="/api/sessions", tags=["Sessions"])
 @router.get("/today", response_model=SessionResponse)
 async def get_today_session(
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Get or create today's session"""
-    today = date_module.today()
+    """Get or create the session for the store's current business day"""
+    today = BusinessDayService.current_day(store)
 
-    session = db.query(SessionModel).filter(
+    session = await db.scalar(select(SessionModel).where(
         SessionModel.store_id == store.id,
         SessionModel.date == today
-    ).first()
+    ))
 
     if not session:
         session = SessionModel(
@@ -29,8 +31,8 @@ async def get_today_session(
             date=today
         )
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        await db.refresh(session)
 
     return session
 
@@ -39,7 +41,7 @@ async def get_today_session(
 async def get_session_by_date(
     date: str,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get session for a specific date"""
     try:
@@ -50,10 +52,10 @@ async def get_session_by_date(
             detail="Invalid date format. Use YYYY-MM-DD"
         )
 
-    session = db.query(SessionModel).filter(
+    session = await db.scalar(select(SessionModel).where(
         SessionModel.store_id == store.id,
         SessionModel.date == session_date
-    ).first()
+    ))
 
     if not session:
         # Create session if it doesn't exist
@@ -62,8 +64,8 @@ async def get_session_by_date(
             date=session_date
         )
         db.add(session)
-        db.commit()
-        db.refresh(session)
+        await db.commit()
+        await db.refresh(session)
 
     return session
 
@@ -72,18 +74,18 @@ async def get_session_by_date(
 async def mark_session_exported(
     session_id: str,
     store: Store = Depends(get_current_store),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Mark a session as exported"""
-    session = db.query(SessionModel).filter(
+    session = await db.scalar(select(SessionModel).where(
         SessionModel.id == session_id,
         SessionModel.store_id == store.id
-    ).first()
+    ))
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
     session.exported = True
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
@@ -1,24 +1,43 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
+from sqlalchemy import select, func, inspect
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from typing import List
+from uuid import UUID
+import logging
 
 from ..database import get_db
 from ..models import Store, User, Company
 from ..schemas.store import StoreCreate, StoreUpdate, StoreResponse
-from ..dependencies import get_current_user, get_current_company
+from ..dependencies import get_current_user, get_current_company, invalidate_company, invalidate_store
+from ..services.sales_rollup_service import SalesRollupService
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/stores", tags=["Stores"])
 
 
+async def rebuild_sales_rollups(session_factory: async_sessionmaker, store_id: UUID) -> None:
+    """Recompute a store's rollups in their own transaction (run after the response)"""
+    try:
+        async with session_factory() as db:
+            await SalesRollupService.rebuild(db, [store_id])
+            await db.commit()
+    except Exception:
+        # Reports stay off until python -m app.commands.rebuild_sales_rollup --store <id>
+        logger.exception("Could not rebuild the sales rollups of store %s", store_id)
+
+
 @router.post("", response_model=StoreResponse, status_code=status.HTTP_201_CREATED)
 async def create_store(
     store_data: StoreCreate,
     company: Company = Depends(get_current_company),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Create a store for the current company"""
     # Check if company has reached max stores limit
-    existing_count = db.query(Store).filter(Store.company_id == company.id).count()
+    existing_count = await db.scalar(
+        select(func.count()).select_from(Store).where(Store.company_id == company.id)
+    )
     if existing_count >= company.max_stores:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -28,31 +47,34 @@ async def create_store(
     store = Store(
         company_id=company.id,
         name=store_data.name,
-        track_inventory=store_data.track_inventory
+        track_inventory=store_data.track_inventory,
+        timezone=store_data.timezone,
+        business_day_start=store_data.business_day_start
     )
     db.add(store)
-    db.commit()
-    db.refresh(store)
+    await invalidate_company(db, company.id)
+    await db.commit()
+    await db.refresh(store)
     return store
 
 
 @router.get("", response_model=List[StoreResponse])
 async def list_stores(
     company: Company = Depends(get_current_company),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get all stores for the current company"""
-    stores = db.query(Store).filter(Store.company_id == company.id).all()
+    stores = (await db.scalars(select(Store).where(Store.company_id == company.id))).all()
     return stores
 
 
 @router.get("/current", response_model=StoreResponse)
 async def get_current_store(
     company: Company = Depends(get_current_company),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Get the current company's store"""
-    store = db.query(Store).filter(Store.company_id == company.id).first()
+    store = await db.scalar(select(Store).where(Store.company_id == company.id).limit(1))
     if not store:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -65,14 +87,21 @@ async def get_current_store(
 async def update_store(
     store_id: str,
     store_data: StoreUpdate,
+    request: Request,
+    background_tasks: BackgroundTasks,
     company: Company = Depends(get_current_company),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Update a store"""
-    store = db.query(Store).filter(
+    """Update a store
+
+    Changing its timezone or business day start moves orders to other
+    business days: the sales rollups are rebuilt after the response is
+    sent, so range reports catch up a moment later.
+    """
+    store = await db.scalar(select(Store).where(
         Store.id == store_id,
         Store.company_id == company.id
-    ).first()
+    ))
 
     if not store:
         raise HTTPException(status_code=404, detail="Store not found")
@@ -81,9 +110,19 @@ async def update_store(
         store.name = store_data.name
     if store_data.track_inventory is not None:
         store.track_inventory = store_data.track_inventory
-
-    db.commit()
-    db.refresh(store)
+    if store_data.timezone is not None:
+        store.timezone = store_data.timezone
+    if store_data.business_day_start is not None:
+        store.business_day_start = store_data.business_day_start
+
+    # Orders may now fall on other business days
+    state = inspect(store).attrs
+    if state.timezone.history.has_changes() or state.business_day_start.history.has_changes():
+        background_tasks.add_task(rebuild_sales_rollups, request.app.state.session_factory, store.id)
+
+    await invalidate_store(db, store.id)
+    await db.commit()
+    await db.refresh(store)
     return store
 
 
@@ -91,17 +130,18 @@ async def update_store(
 async def delete_store(
     store_id: str,
     company: Company = Depends(get_current_company),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Delete a store"""
-    store = db.query(Store).filter(
+    store = await db.scalar(select(Store).where(
         Store.id == store_id,
         Store.company_id == company.id
-    ).first()
+    ))
 
     if not store:
         raise HTTPException(status_code=404, detail="Store not found")
 
-    db.delete(store)
-    db.commit()
+    await db.delete(store)
+    await invalidate_store(db, store.id)
+    await db.commit()
     return None
@@ -0,0 +1,36 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from ..database import get_db
+from ..models import Store
+from ..schemas.sync import SyncResponse
+from ..dependencies import get_current_store
+from ..services.sync_service import SyncService, SYNC_SECTIONS
+
+router = APIRouter(prefix="/api/sync", tags=["Sync"])
+
+
+@router.get("", response_model=SyncResponse)
+async def sync(
+    since: int = Query(0, ge=0, description="Cursor returned by the previous sync; 0 for a full snapshot"),
+    include: Optional[str] = Query(None, description="Comma-separated sections, e.g. products,combos; all by default"),
+    store: Store = Depends(get_current_store),
+    db: AsyncSession = Depends(get_db)
+):
+    """Products, combos, orders and customer names changed since a cursor
+
+    Upsert the returned rows, drop the deleted ids and keep the new cursor.
+    A cursor is only valid for the sections it was requested with.
+    """
+    sections = None
+    if include:
+        sections = {section.strip() for section in include.split(",") if section.strip()}
+        unknown = sections - set(SYNC_SECTIONS)
+        if unknown:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Unknown sync sections: {', '.join(sorted(unknown))}"
+            )
+
+    return await SyncService.changes_since(db, store, since, sections)
@@ -1,10 +1,21 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Header, Response
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 
+from ..cache_bus import cache_bus
 from ..database import get_db
-from ..models import Unit
-from ..schemas.unit import UnitResponse, UnitConversionRequest, UnitConversionResponse
+from ..models import User
+from ..schemas.unit import (
+    UnitResponse,
+    UnitConversionRequest,
+    UnitConversionResponse,
+    UnitBatchConversionRequest,
+    UnitBatchConversionResult,
+    UnitBatchConversionResponse,
+)
+from ..dependencies import get_current_admin_user, get_unit_registry
+from ..http_cache import etag_matches, make_etag
+from ..services.unit_registry import UnitRegistry, load_unit_registry
 from ..services.unit_service import UnitService
 
 router = APIRouter(prefix="/api/units", tags=["Units"])
@@ -12,12 +23,16 @@ router = APIRouter(prefix="/api/units", tags=["Units"])
 
 @router.get("", response_model=List[UnitResponse])
 async def list_units(
+    response: Response,
     type: Optional[str] = Query(None, description="Filter by unit type: weight, volume, count, or length"),
-    db: Session = Depends(get_db)
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    registry: UnitRegistry = Depends(get_unit_registry)
 ):
-    """List all available units, optionally filtered by type"""
-    query = db.query(Unit)
+    """List all available units, optionally filtered by type
 
+    Answers If-None-Match with 304 until the units are reloaded with
+    different content.
+    """
     if type:
         # Validate type
         valid_types = ["weight", "volume", "count", "length"]
@@ -26,19 +41,37 @@ async def list_units(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Invalid unit type. Must be one of: {', '.join(valid_types)}"
             )
-        query = query.filter(Unit.type == type)
 
-    units = query.order_by(Unit.type, Unit.code).all()
+    units = registry.units(type)
+    etag = "W/" + make_etag(repr(units).encode())
+    if etag_matches(if_none_match, etag):
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    response.headers.update({"ETag": etag, "Cache-Control": "no-cache"})
     return units
 
 
+@router.post("/refresh", response_model=List[UnitResponse])
+async def refresh_units(
+    current_user: User = Depends(get_current_admin_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """Reload the unit registry from the database (admin only)
+
+    Other workers reload theirs on next use.
+    """
+    await cache_bus.publish(db, "units")
+    await db.commit()
+    registry = await load_unit_registry(db)
+    return registry.units()
+
+
 @router.get("/{code}", response_model=UnitResponse)
 async def get_unit(
     code: str,
-    db: Session = Depends(get_db)
+    registry: UnitRegistry = Depends(get_unit_registry)
 ):
     """Get a specific unit by code"""
-    unit = db.query(Unit).filter(Unit.code == code).first()
+    unit = registry.get(code)
 
     if not unit:
         raise HTTPException(
@@ -52,18 +85,18 @@ async def get_unit(
 @router.post("/convert", response_model=UnitConversionResponse)
 async def convert_units(
     conversion: UnitConversionRequest,
-    db: Session = Depends(get_db)
+    registry: UnitRegistry = Depends(get_unit_registry)
 ):
     """Convert a quantity from one unit to another"""
     # Validate units exist
-    from_unit = db.query(Unit).filter(Unit.code == conversion.from_unit).first()
+    from_unit = registry.get(conversion.from_unit)
     if not from_unit:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Source unit not found: {conversion.from_unit}"
         )
 
-    to_unit = db.query(Unit).filter(Unit.code == conversion.to_unit).first()
+    to_unit = registry.get(conversion.to_unit)
     if not to_unit:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -71,7 +104,7 @@ async def convert_units(
         )
 
     # Check compatibility
-    if not UnitService.are_compatible(conversion.from_unit, conversion.to_unit, db):
+    if not UnitService.are_compatible(conversion.from_unit, conversion.to_unit, registry):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Incompatible units: {conversion.from_unit} ({from_unit.type}) and {conversion.to_unit} ({to_unit.type})"
@@ -83,7 +116,7 @@ async def convert_units(
             conversion.quantity,
             conversion.from_unit,
             conversion.to_unit,
-            db
+            registry
         )
 
         return UnitConversionResponse(
@@ -97,3 +130,36 @@ async def convert_units(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Conversion failed: {str(e)}"
         )
+
+
+@router.post("/convert/batch", response_model=UnitBatchConversionResponse)
+async def convert_units_batch(
+    batch: UnitBatchConversionRequest,
+    registry: UnitRegistry = Depends(get_unit_registry)
+):
+    """Convert many quantities in one call, reporting errors per row"""
+    converted = UnitService.convert_many(
+        ((c.quantity, c.from_unit, c.to_unit) for c in batch.conversions),
+        registry
+    )
+
+    results = [
+        UnitBatchConversionResult(
+            index=index,
+            original_quantity=conversion.quantity,
+            original_unit=conversion.from_unit,
+            converted_quantity=quantity,
+            converted_unit=conversion.to_unit,
+            success=error is None,
+            error=error
+        )
+        for index, (conversion, (quantity, error)) in enumerate(zip(batch.conversions, converted))
+    ]
+    successful = sum(1 for r in results if r.success)
+
+    return UnitBatchConversionResponse(
+        total=len(results),
+        successful=successful,
+        failed=len(results) - successful,
+        results=results
+    )
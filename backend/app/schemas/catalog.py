@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+from typing import List
+
+from .product import ProductResponse
+from .combo import ComboResponse
+from .unit import UnitResponse
+
+
+class CatalogResponse(BaseModel):
+    version: int = Field(..., description="Store catalog version; grows with every product or combo change")
+    products: List[ProductResponse]
+    combos: List[ComboResponse]
+    units: List[UnitResponse] = Field(..., description="Units the products are sold in")
@@ -8,6 +8,7 @@ class CompanyBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     currency_symbol: str = Field(default="$", max_length=5)
     max_stores: int = Field(default=1, ge=1)
+    order_retention_months: Optional[int] = Field(None, ge=1, description="Months of orders kept hot before archival; null keeps all")
 
 
 class CompanyCreate(CompanyBase):
@@ -18,6 +19,7 @@ class CompanyUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     currency_symbol: Optional[str] = Field(None, max_length=5)
     max_stores: Optional[int] = Field(None, ge=1)
+    order_retention_months: Optional[int] = Field(None, ge=1, description="Set to null to stop archiving")
 
 
 class CompanyResponse(CompanyBase):
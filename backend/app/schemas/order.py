@@ -1,6 +1,7 @@
-from pydantic import BaseModel, Field
-from typing import List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Any, Dict, List, Optional
 from datetime import datetime
+from datetime import date as date_type
 from uuid import UUID
 from decimal import Decimal
 
@@ -30,6 +31,7 @@ class OrderBase(BaseModel):
 
 
 class OrderCreate(OrderBase):
+    id: Optional[UUID] = Field(None, description="Client-generated order id; resending it returns the order already created")
     items: List[OrderItemCreate] = Field(..., min_length=1)
     is_paid: bool = False
 
@@ -54,10 +56,64 @@ class OrderResponse(OrderBase):
         from_attributes = True
 
 
+class OrderPage(BaseModel):
+    orders: List[OrderResponse]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch the next page; null on the last page")
+
+
+class OrderHistoryEntry(BaseModel):
+    version: int
+    edited_at: datetime
+    edited_by: UUID
+    changes: Dict[str, Any]
+
+    class Config:
+        from_attributes = True
+
+
+class OrderHistoryPage(BaseModel):
+    entries: List[OrderHistoryEntry]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to fetch older edits; null on the last page")
+
+
+class OrderVersionItem(BaseModel):
+    id: Optional[UUID] = None  # Missing for lines recorded before diff history
+    product_id: Optional[UUID] = None
+    product_name: str
+    quantity: Decimal
+    price: Decimal
+    sold_in_unit: Optional[str] = None
+    base_unit: Optional[str] = None
+    quantity_in_base: Optional[Decimal] = None
+
+
+class OrderVersionResponse(BaseModel):
+    order_id: UUID
+    version: int = Field(..., description="0 is the order as created, n the state after its n-th edit")
+    customer_name: Optional[str] = None
+    total: Decimal
+    items: List[OrderVersionItem]
+
+
 class BulkUpdatePaymentRequest(BaseModel):
-    order_ids: List[UUID] = Field(..., min_length=1, max_length=100)
+    """Either list order_ids, or select orders by customer_name and/or date
+
+    In filter mode only orders whose payment status differs from is_paid
+    are selected (e.g. all unpaid orders of a customer).
+    """
+    order_ids: Optional[List[UUID]] = Field(None, min_length=1, max_length=5000)
+    customer_name: Optional[str] = Field(None, min_length=1, max_length=100)
+    date: Optional[date_type] = Field(None, description="Business day of the orders (YYYY-MM-DD)")
     is_paid: bool
 
+    @model_validator(mode='after')
+    def ids_or_filter(self):
+        """Require exactly one of the two selection modes"""
+        has_filter = self.customer_name is not None or self.date is not None
+        if (self.order_ids is None) == (not has_filter):
+            raise ValueError("Provide either order_ids or a customer_name/date filter")
+        return self
+
 
 class BulkUpdateResult(BaseModel):
     order_id: UUID
@@ -70,3 +126,38 @@ class BulkUpdatePaymentResponse(BaseModel):
     successful: int
     failed: int
     results: List[BulkUpdateResult]
+
+
+class OrderBatchCreate(BaseModel):
+    """Orders queued offline, uploaded together
+
+    Every order needs its client-generated id, so an interrupted upload can
+    be resent as a whole: orders already created are reported as replayed.
+    """
+    orders: List[OrderCreate] = Field(..., min_length=1, max_length=500)
+
+    @model_validator(mode='after')
+    def client_ids(self):
+        """Require a distinct client id on every order"""
+        ids = [order.id for order in self.orders]
+        if any(order_id is None for order_id in ids):
+            raise ValueError("Every order in a batch needs a client-generated id")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Order ids in a batch must be unique")
+        return self
+
+
+class OrderBatchResult(BaseModel):
+    index: int
+    id: UUID
+    status: str = Field(..., description="created, replayed (already uploaded) or failed")
+    order: Optional[OrderResponse] = None
+    error: Optional[str] = None
+
+
+class OrderBatchResponse(BaseModel):
+    total: int
+    created: int
+    replayed: int
+    failed: int
+    results: List[OrderBatchResult]
@@ -0,0 +1,53 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import date as date_type
+from uuid import UUID
+from decimal import Decimal
+
+
+class ProductSales(BaseModel):
+    product_id: Optional[UUID] = None  # Null once the product has been deleted
+    product_name: str
+    unit: Optional[str] = Field(None, description="Base unit the quantity is in; null for plain units")
+    quantity: Decimal
+    revenue: Decimal
+
+
+class DailyReport(BaseModel):
+    date: date_type = Field(..., description="Business day of the store")
+    order_count: int
+    revenue: Decimal
+    paid_count: int
+    paid_revenue: Decimal
+    unpaid_count: int
+    unpaid_revenue: Decimal
+    edited_count: int
+    products: List[ProductSales]
+    text: Optional[str] = Field(None, description="Ready-made text summary, when requested")
+
+
+class DaySales(BaseModel):
+    date: date_type = Field(..., description="Business day of the store")
+    order_count: int
+    revenue: Decimal
+    paid_count: int
+    paid_revenue: Decimal
+    edited_count: int
+
+
+class RangeProductSales(ProductSales):
+    order_count: int = Field(..., description="Orders containing the product")
+
+
+class RangeReport(BaseModel):
+    date_from: date_type
+    date_to: date_type
+    order_count: int
+    revenue: Decimal
+    paid_count: int
+    paid_revenue: Decimal
+    unpaid_count: int
+    unpaid_revenue: Decimal
+    edited_count: int
+    days: List[DaySales] = Field(..., description="Days with orders, oldest first")
+    products: List[RangeProductSales]
@@ -1,12 +1,28 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 from typing import Optional
-from datetime import datetime
+from datetime import datetime, time
 from uuid import UUID
 
+from ..services.business_day_service import BusinessDayService
+
+
+def _check_timezone(v):
+    if v is not None and not BusinessDayService.is_valid_timezone(v):
+        raise ValueError(f"Unknown timezone: {v}")
+    return v
+
 
 class StoreBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=100)
     track_inventory: bool = False
+    timezone: str = Field("UTC", max_length=64, description="IANA timezone, e.g. 'Europe/Paris'")
+    business_day_start: time = Field(time(0, 0), description="Local time at which a business day begins")
+
+    @field_validator('timezone')
+    @classmethod
+    def valid_timezone(cls, v):
+        """Reject timezone names that are not IANA zones"""
+        return _check_timezone(v)
 
 
 class StoreCreate(StoreBase):
@@ -16,6 +32,14 @@ class StoreCreate(StoreBase):
 class StoreUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=100)
     track_inventory: Optional[bool] = None
+    timezone: Optional[str] = Field(None, max_length=64)
+    business_day_start: Optional[time] = None
+
+    @field_validator('timezone')
+    @classmethod
+    def valid_timezone(cls, v):
+        """Reject timezone names that are not IANA zones"""
+        return _check_timezone(v)
 
 
 class StoreResponse(StoreBase):
@@ -0,0 +1,23 @@
+from pydantic import BaseModel, Field
+from typing import List
+from uuid import UUID
+
+from .product import ProductResponse
+from .combo import ComboResponse
+from .order import OrderResponse
+
+
+class SyncDeleted(BaseModel):
+    product: List[UUID] = []
+    combo: List[UUID] = []
+    order: List[UUID] = []
+
+
+class SyncResponse(BaseModel):
+    cursor: int = Field(..., description="Pass as since on the next sync")
+    full: bool = Field(..., description="True when this is a full snapshot (since=0) rather than a delta")
+    products: List[ProductResponse]
+    combos: List[ComboResponse]
+    orders: List[OrderResponse]
+    customer_names: List[str]
+    deleted: SyncDeleted
@@ -3,6 +3,7 @@ Pydantic schemas for Unit API responses and requests.
 """
 from pydantic import BaseModel, Field
 from decimal import Decimal
+from typing import List, Optional
 
 
 class UnitResponse(BaseModel):
@@ -31,3 +32,27 @@ class UnitConversionResponse(BaseModel):
     original_unit: str = Field(..., description="Original unit code")
     converted_quantity: Decimal = Field(..., description="Converted quantity")
     converted_unit: str = Field(..., description="Target unit code")
+
+
+class UnitBatchConversionRequest(BaseModel):
+    """Request schema for converting many quantities at once"""
+    conversions: List[UnitConversionRequest] = Field(..., min_length=1, max_length=1000)
+
+
+class UnitBatchConversionResult(BaseModel):
+    """Result of one conversion in a batch; error is set if it failed"""
+    index: int = Field(..., description="Position of the conversion in the request")
+    original_quantity: Decimal
+    original_unit: str
+    converted_quantity: Optional[Decimal] = None
+    converted_unit: str
+    success: bool
+    error: Optional[str] = None
+
+
+class UnitBatchConversionResponse(BaseModel):
+    """Response schema for batch unit conversion"""
+    total: int
+    successful: int
+    failed: int
+    results: List[UnitBatchConversionResult]
@@ -0,0 +1,110 @@
+"""
+Business day service for QuickStore.
+
+A store's business day runs from its day start time (e.g. 04:00 for a
+late-night bar) to the same time the next day, in the store's timezone.
+Order timestamps are stored as naive UTC, so days are turned into
+half-open [start, end) UTC ranges that range predicates on created_at
+(and its indexes) can use.
+"""
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from ..models.store import Store
+
+
+class BusinessDayService:
+    """Service for store-local business day boundaries"""
+
+    DEFAULT_TIMEZONE = "UTC"
+
+    @staticmethod
+    def is_valid_timezone(name: str) -> bool:
+        """
+        Check that a timezone name is a known IANA zone.
+
+        Example:
+            >>> is_valid_timezone("Europe/Paris")
+            True
+        """
+        if not name:
+            return False
+        try:
+            ZoneInfo(name)
+        except (ZoneInfoNotFoundError, ValueError):
+            return False
+        return True
+
+    @staticmethod
+    def store_zone(store: Store) -> ZoneInfo:
+        """The store's timezone (UTC if unset)"""
+        return ZoneInfo(store.timezone or BusinessDayService.DEFAULT_TIMEZONE)
+
+    @staticmethod
+    def current_day(store: Store, now: Optional[datetime] = None) -> date:
+        """
+        The business day in progress at a moment (default: now) for a store.
+
+        Args:
+            store: Store whose timezone and day start apply
+            now: Naive UTC or aware datetime; defaults to the current time
+
+        Returns:
+            The business day's date
+
+        Example:
+            >>> # Store in America/New_York with day start 04:00
+            >>> current_day(store, datetime(2026, 3, 2, 7, 30))  # 02:30 local
+            date(2026, 3, 1)
+        """
+        if now is None:
+            now = datetime.now(timezone.utc)
+        elif now.tzinfo is None:
+            now = now.replace(tzinfo=timezone.utc)
+
+        local = now.astimezone(BusinessDayService.store_zone(store))
+        day_start = store.business_day_start or time.min
+        if local.time() < day_start:
+            return local.date() - timedelta(days=1)
+        return local.date()
+
+    @staticmethod
+    def day_start_utc(store: Store, day: date) -> datetime:
+        """
+        Naive UTC moment at which a business day starts.
+
+        Example:
+            >>> # Store in Europe/Paris (UTC+1 in winter), day start 00:00
+            >>> day_start_utc(store, date(2026, 1, 15))
+            datetime(2026, 1, 14, 23, 0)
+        """
+        local = datetime.combine(
+            day,
+            store.business_day_start or time.min,
+            tzinfo=BusinessDayService.store_zone(store)
+        )
+        return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+    @staticmethod
+    def day_range(store: Store, first_day: date, last_day: Optional[date] = None) -> Tuple[datetime, datetime]:
+        """
+        Half-open naive UTC [start, end) covering business days first_day..last_day.
+
+        Args:
+            store: Store whose timezone and day start apply
+            first_day: First business day included
+            last_day: Last business day included (defaults to first_day)
+
+        Returns:
+            (start, end) to filter with start <= created_at < end
+
+        Example:
+            >>> start, end = day_range(store, date(2026, 1, 15))
+            >>> query.where(Order.created_at >= start, Order.created_at < end)
+        """
+        last_day = last_day or first_day
+        return (
+            BusinessDayService.day_start_utc(store, first_day),
+            BusinessDayService.day_start_utc(store, last_day + timedelta(days=1))
+        )
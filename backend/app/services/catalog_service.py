@@ -0,0 +1,138 @@
+"""
+Catalog service for QuickStore.
+
+A store's catalog (products, combos with their lines, and the units the
+products are sold in) changes a few times a day but is read whenever a
+device opens the store. Every product and combo change bumps the
+store's catalog_version in its own transaction (see
+store_version_service.py). Snapshots of the catalog are kept in an
+in-process cache with the version they were built at: a request reads
+the current version (one indexed row), and reuses the snapshot while it
+matches, so other workers' changes are seen at once.
+
+Inventory moves with every order, so it is not part of the snapshot: it
+is read with the version on every request and merged into the products.
+"""
+import json
+from dataclasses import dataclass
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..cache import TTLCache
+from ..cache_bus import cache_bus
+from ..config import settings
+from ..http_cache import make_etag
+from ..models import Combo, Product, Store
+from ..schemas.combo import ComboResponse
+from ..schemas.product import ProductResponse
+from ..schemas.unit import UnitResponse
+from .unit_registry import UnitRegistry
+
+
+catalog_cache = cache_bus.register(TTLCache(
+    "catalog",
+    maxsize=settings.CATALOG_CACHE_MAX_ENTRIES,
+    ttl=settings.CATALOG_CACHE_TTL_SECONDS
+))
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """JSON-ready catalog of a store at one catalog version"""
+    version: int
+    registry: UnitRegistry  # Units may be reloaded; a new registry means a new snapshot
+    products: Tuple[Dict[str, Any], ...]  # Without inventory
+    combos: Tuple[Dict[str, Any], ...]
+    units: Tuple[Dict[str, Any], ...]
+    content: bytes  # Canonical JSON of the above, for the ETag
+
+
+class CatalogService:
+    """Service for versioned, cached store catalogs"""
+
+    @staticmethod
+    async def load(
+        db: AsyncSession,
+        store: Store,
+        registry: UnitRegistry
+    ) -> Tuple[CatalogSnapshot, Dict[str, str]]:
+        """
+        Current catalog snapshot and inventory of a store.
+
+        One query when the cached snapshot is current, three more to
+        rebuild it otherwise. The version is read before the catalog, so
+        a snapshot is never older than the version it is cached under.
+
+        Args:
+            db: Database session
+            store: Store whose catalog to load
+            registry: Unit registry to resolve the products' units
+
+        Returns:
+            (snapshot, inventory as a string per product id)
+
+        Example:
+            >>> snapshot, inventory = await CatalogService.load(db, store, registry)
+            >>> CatalogService.etag(snapshot, inventory)
+            '"3f1c…"'
+        """
+        rows = (await db.execute(
+            select(Store.catalog_version, Product.id, Product.inventory)
+            .outerjoin(Product, and_(Product.store_id == Store.id, Product.inventory.isnot(None)))
+            .where(Store.id == store.id)
+        )).all()
+        version = rows[0].catalog_version
+        inventory = {str(row.id): str(row.inventory) for row in rows if row.id is not None}
+
+        snapshot = catalog_cache.get(store.id)
+        if snapshot is None or snapshot.version != version or snapshot.registry is not registry:
+            snapshot = await CatalogService._build(db, store, version, registry)
+            catalog_cache.set(store.id, snapshot, tags=(f"store:{store.id}",))
+        return snapshot, inventory
+
+    @staticmethod
+    async def _build(db: AsyncSession, store: Store, version: int, registry: UnitRegistry) -> CatalogSnapshot:
+        products = (await db.scalars(
+            select(Product).where(Product.store_id == store.id).order_by(Product.created_at, Product.id)
+        )).all()
+        combos = (await db.scalars(
+            select(Combo).options(selectinload(Combo.items))
+            .where(Combo.store_id == store.id)
+            .order_by(Combo.created_at, Combo.id)
+        )).all()
+        codes = {product.base_unit for product in products if product.base_unit}
+
+        product_data = tuple(
+            ProductResponse.model_validate(product).model_dump(mode="json", exclude={"inventory"})
+            for product in products
+        )
+        combo_data = tuple(ComboResponse.model_validate(combo).model_dump(mode="json") for combo in combos)
+        unit_data = tuple(
+            UnitResponse.model_validate(unit).model_dump(mode="json")
+            for unit in registry.units() if unit.code in codes
+        )
+        content = json.dumps(
+            [version, product_data, combo_data, unit_data], separators=(",", ":"), sort_keys=True
+        ).encode()
+        return CatalogSnapshot(version, registry, product_data, combo_data, unit_data, content)
+
+    @staticmethod
+    def etag(snapshot: CatalogSnapshot, inventory: Dict[str, str]) -> str:
+        """ETag of the catalog as render() would send it"""
+        return make_etag(snapshot.content, json.dumps(inventory, sort_keys=True).encode())
+
+    @staticmethod
+    def render(snapshot: CatalogSnapshot, inventory: Dict[str, str]) -> bytes:
+        """Catalog JSON (CatalogResponse), products with their current inventory"""
+        products: List[Dict[str, Any]] = [
+            dict(product, inventory=inventory.get(product["id"])) for product in snapshot.products
+        ]
+        return json.dumps({
+            "version": snapshot.version,
+            "products": products,
+            "combos": snapshot.combos,
+            "units": snapshot.units,
+        }, separators=(",", ":")).encode()
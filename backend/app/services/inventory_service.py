@@ -0,0 +1,109 @@
+"""
+Inventory service for QuickStore.
+
+Applies stock changes with a single guarded UPDATE so concurrent checkouts
+can never oversell or lose each other's decrements.
+"""
+from decimal import Decimal
+from typing import Dict, List, Mapping
+from uuid import UUID
+
+from sqlalchemy import Numeric, column, select, update, values
+from sqlalchemy.dialects.postgresql import UUID as PGUUID
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.product import Product
+
+
+class InsufficientInventoryError(ValueError):
+    """Raised when a change would take a product's inventory below zero"""
+
+    def __init__(self, product_ids: List[UUID]):
+        self.product_ids = product_ids
+        super().__init__(f"Insufficient inventory for products: {product_ids}")
+
+
+class InventoryService:
+    """Service for atomic inventory updates"""
+
+    @staticmethod
+    def merge_changes(*changes: Mapping[UUID, Decimal]) -> Dict[UUID, Decimal]:
+        """
+        Sum several per-product change maps into one.
+
+        Example:
+            >>> merge_changes({a: Decimal("2")}, {a: Decimal("-3"), b: Decimal("-1")})
+            {a: Decimal("-1"), b: Decimal("-1")}
+        """
+        merged: Dict[UUID, Decimal] = {}
+        for change in changes:
+            for product_id, quantity in change.items():
+                merged[product_id] = merged.get(product_id, Decimal(0)) + quantity
+        return merged
+
+    @staticmethod
+    async def apply_changes(
+        db: AsyncSession,
+        changes: Mapping[UUID, Decimal]
+    ) -> Dict[UUID, Decimal]:
+        """
+        Apply inventory changes (negative = deduct) for many products at once.
+
+        Rows are locked in primary key order before they are updated, so
+        two orders touching the same products cannot deadlock. Products
+        that do not track inventory (NULL) are left alone. The caller's
+        transaction must be rolled back if this raises.
+
+        Args:
+            db: Database session
+            changes: Quantity change in base units per product id
+
+        Returns:
+            New inventory per updated product id
+
+        Raises:
+            InsufficientInventoryError: If any deduction exceeds the stock
+        """
+        changes = {pid: qty for pid, qty in changes.items() if qty != 0}
+        if not changes:
+            return {}
+
+        ordered = sorted(changes.items())
+        deltas = values(
+            column("product_id", PGUUID(as_uuid=True)),
+            column("delta", Numeric(14, 4)),
+            name="deltas"
+        ).data(ordered)
+
+        locked = (
+            select(Product.id)
+            .where(Product.id.in_([pid for pid, _ in ordered]), Product.inventory.isnot(None))
+            .order_by(Product.id)
+            .with_for_update()
+            .cte("locked")
+        )
+
+        stmt = (
+            update(Product)
+            .where(
+                Product.id == deltas.c.product_id,
+                Product.id.in_(select(locked.c.id)),
+                Product.inventory + deltas.c.delta >= 0
+            )
+            .values(inventory=Product.inventory + deltas.c.delta)
+            .returning(Product.id, Product.inventory)
+            .execution_options(synchronize_session=False)
+        )
+        updated = {row.id: row.inventory for row in await db.execute(stmt)}
+
+        deductions = [pid for pid, qty in ordered if qty < 0 and pid not in updated]
+        if deductions:
+            # Distinguish untracked products from ones that ran out of stock
+            tracked = set((await db.scalars(
+                select(Product.id).where(Product.id.in_(deductions), Product.inventory.isnot(None))
+            )).all())
+            failed = [pid for pid in deductions if pid in tracked]
+            if failed:
+                raise InsufficientInventoryError(failed)
+
+        return updated
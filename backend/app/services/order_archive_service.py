@@ -0,0 +1,353 @@
+"""
+Order archive service for QuickStore.
+
+Orders older than their company's retention window (order_retention_months)
+are moved out of the order tables into segment files: one gzipped JSONL
+file per store and business month under settings.ORDER_ARCHIVE_DIR, one
+order per line with its items and edit history, oldest first. The
+quick_store__order_archive_segments table is the manifest of those files,
+and quick_store__archived_orders maps archived order ids to their segment.
+
+Each store records in archived_until the instant before which its orders
+are archived, so reads only look at segments for ranges that start
+before it. Archived orders are read-only; the sales rollups keep counting
+them.
+
+A month is archived in one transaction: the orders are locked and
+written to a new file, the manifest switches to it, and the orders are
+deleted. A file is only deleted once no committed manifest row points to
+it, so a failed run leaves the previous state intact.
+"""
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from uuid import UUID, uuid4
+
+from sqlalchemy import delete, func, select, text, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+
+from ..cache_bus import cache_bus
+from ..config import settings
+from ..models import ArchivedOrder, Company, Order, OrderArchiveSegment, Store
+from ..schemas.order import OrderResponse
+from .business_day_service import BusinessDayService
+from .order_history_service import OrderHistoryService
+from .partition_service import add_months, month_start
+
+
+logger = logging.getLogger(__name__)
+
+# Serializes archival runs
+ARCHIVE_LOCK_ID = 0x5155_4943_4B41  # "QUICKA"
+
+
+def _text(value: Any) -> Any:
+    """Datetimes as ISO strings, decimals and UUIDs as strings"""
+    if value is None or isinstance(value, (str, bool, int, dict, list)):
+        return value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+
+def order_record(order: Order) -> Dict[str, Any]:
+    """JSON-safe copy of an order with its items and edit history"""
+    return {
+        "id": _text(order.id),
+        "store_id": _text(order.store_id),
+        "customer_name": order.customer_name,
+        "total": _text(order.total),
+        "is_paid": order.is_paid,
+        "is_edited": order.is_edited,
+        "created_at": _text(order.created_at),
+        "created_by": _text(order.created_by),
+        "updated_at": _text(order.updated_at),
+        "items": [OrderHistoryService.item_state(item) for item in order.items],
+        "edit_history": [
+            {
+                "version": entry.version,
+                "edited_at": _text(entry.edited_at),
+                "edited_by": _text(entry.edited_by),
+                "changes": entry.changes,
+            }
+            for entry in sorted(order.edit_history, key=lambda entry: entry.version)
+        ],
+    }
+
+
+def _archive_path(relative: str) -> Path:
+    return Path(settings.ORDER_ARCHIVE_DIR) / relative
+
+
+def _write_segment(relative: str, records: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """Write a segment file (atomically) and return its size and sha256"""
+    path = _archive_path(relative)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    with gzip.open(partial, "wt", encoding="utf-8") as out:
+        for record in records:
+            out.write(json.dumps(record, separators=(",", ":")) + "\n")
+    with open(partial, "rb") as written:
+        os.fsync(written.fileno())
+        digest = hashlib.file_digest(written, "sha256").hexdigest()
+    os.replace(partial, path)
+    return {"size": path.stat().st_size, "sha256": digest}
+
+
+def _read_segment(relative: str) -> List[Dict[str, Any]]:
+    with gzip.open(_archive_path(relative), "rt", encoding="utf-8") as lines:
+        return [json.loads(line) for line in lines]
+
+
+def _remove_segment(relative: str) -> None:
+    try:
+        _archive_path(relative).unlink()
+    except FileNotFoundError:
+        pass
+
+
+class OrderArchiveService:
+    """Service for archiving cold orders and reading them back"""
+
+    @staticmethod
+    async def archive_due(
+        db: AsyncSession,
+        company_id: Optional[UUID] = None,
+        today: Optional[datetime] = None
+    ) -> List[OrderArchiveSegment]:
+        """
+        Archive every store-month past its company's retention window.
+
+        Months are business months of the store: a window of 3 on any day
+        of October keeps July to October hot and archives June and before.
+        Commits once per store-month.
+
+        Args:
+            db: Database session
+            company_id: Only archive this company's stores
+            today: Reference instant in UTC (default: now)
+
+        Returns:
+            The segments written
+
+        Example:
+            >>> await OrderArchiveService.archive_due(db)
+            [<OrderArchiveSegment store_id=… month=2026-06-01 order_count=1180>, ...]
+        """
+        query = (
+            select(Store, Company.order_retention_months)
+            .join(Company, Company.id == Store.company_id)
+            .where(Company.order_retention_months.isnot(None))
+            .order_by(Store.id)
+        )
+        if company_id is not None:
+            query = query.where(Company.id == company_id)
+        stores = (await db.execute(query)).all()
+        await db.commit()
+
+        segments = []
+        for store, retention_months in stores:
+            cutoff = add_months(month_start(BusinessDayService.current_day(store, today)), -retention_months)
+            cutoff_utc = BusinessDayService.day_start_utc(store, cutoff)
+            oldest = await db.scalar(
+                select(func.min(Order.created_at)).where(Order.store_id == store.id, Order.created_at < cutoff_utc)
+            )
+            await db.commit()
+            if oldest is None:
+                continue
+
+            month = month_start(BusinessDayService.current_day(store, oldest))
+            while month < cutoff:
+                segment = await OrderArchiveService.archive_month(db, store, month)
+                if segment is not None:
+                    segments.append(segment)
+                month = add_months(month, 1)
+        return segments
+
+    @staticmethod
+    async def archive_month(db: AsyncSession, store: Store, month: date) -> Optional[OrderArchiveSegment]:
+        """
+        Move a store's orders of one business month to its segment file.
+
+        Orders already archived for that month are kept: the segment is
+        rewritten with both. Commits.
+
+        Args:
+            db: Database session (no transaction in progress)
+            store: Store to archive
+            month: First day of the business month
+
+        Returns:
+            The segment, or None if the month had no orders left
+        """
+        start, end = BusinessDayService.day_range(store, month, add_months(month, 1) - timedelta(days=1))
+        new_path = f"{store.id}/{month:%Y-%m}-{uuid4().hex[:8]}.jsonl.gz"
+        old_path = None
+        try:
+            await db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": ARCHIVE_LOCK_ID})
+            orders = (await db.scalars(
+                select(Order)
+                .options(selectinload(Order.items), selectinload(Order.edit_history))
+                .where(Order.store_id == store.id, Order.created_at >= start, Order.created_at < end)
+                .order_by(Order.created_at, Order.id)
+                .with_for_update()
+            )).all()
+            if not orders:
+                await db.commit()  # A rollback would expire store
+                return None
+
+            segment = await db.scalar(select(OrderArchiveSegment).where(
+                OrderArchiveSegment.store_id == store.id,
+                OrderArchiveSegment.month == month
+            ))
+            records = {record["id"]: record for record in await OrderArchiveService.read_records(segment)}
+            records.update((str(order.id), order_record(order)) for order in orders)
+            records = sorted(records.values(), key=lambda record: (record["created_at"], record["id"]))
+
+            written = await asyncio.to_thread(_write_segment, new_path, records)
+            if segment is None:
+                segment = OrderArchiveSegment(id=uuid4(), store_id=store.id, month=month)
+                db.add(segment)
+            else:
+                old_path = segment.path
+            segment.path = new_path
+            segment.order_count = len(records)
+            segment.first_created_at = datetime.fromisoformat(records[0]["created_at"])
+            segment.last_created_at = datetime.fromisoformat(records[-1]["created_at"])
+            segment.size = written["size"]
+            segment.sha256 = written["sha256"]
+            segment.archived_at = datetime.utcnow()
+            await db.flush()
+
+            await db.execute(pg_insert(ArchivedOrder).values([
+                {"store_id": store.id, "order_id": order.id, "segment_id": segment.id, "created_at": order.created_at}
+                for order in orders
+            ]).on_conflict_do_nothing())
+            # Items and edit history go with their orders (ON DELETE CASCADE)
+            await db.execute(
+                delete(Order)
+                .where(Order.store_id == store.id, Order.created_at >= start, Order.created_at < end)
+                .execution_options(synchronize_session=False)
+            )
+            await db.execute(
+                update(Store)
+                .where(Store.id == store.id)
+                .values(
+                    archived_until=func.greatest(func.coalesce(Store.archived_until, end), end),
+                    orders_version=Store.orders_version + 1
+                )
+                .execution_options(synchronize_session=False)
+            )
+            # Cached stores hold archived_until
+            await cache_bus.publish(db, f"store:{store.id}")
+            await db.commit()
+        except BaseException:
+            await db.rollback()
+            _remove_segment(new_path)
+            raise
+
+        if old_path is not None:
+            _remove_segment(old_path)
+        logger.info("Archived %d orders of store %s for %s to %s", len(orders), store.id, month, new_path)
+        return segment
+
+    @staticmethod
+    async def read_records(segment: Optional[OrderArchiveSegment]) -> List[Dict[str, Any]]:
+        """Raw records of a segment file, oldest first (none for None)"""
+        if segment is None:
+            return []
+        return await asyncio.to_thread(_read_segment, segment.path)
+
+    @staticmethod
+    async def read_orders(segment: OrderArchiveSegment) -> List[OrderResponse]:
+        """Orders of a segment, oldest first"""
+        return [OrderResponse.model_validate(record) for record in await OrderArchiveService.read_records(segment)]
+
+    @staticmethod
+    async def segments_between(
+        db: AsyncSession,
+        store: Store,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        newest_first: bool = False
+    ) -> List[OrderArchiveSegment]:
+        """
+        Segments holding orders created in [start, end), oldest first (or newest).
+
+        Costs nothing when the range starts at or after the store's
+        archived_until (or the store has no archive).
+
+        Example:
+            >>> await OrderArchiveService.segments_between(db, store, datetime(2026, 1, 1), datetime(2026, 2, 1))
+            [<OrderArchiveSegment month=2026-01-01 ...>]
+        """
+        if store.archived_until is None or (start is not None and start >= store.archived_until):
+            return []
+        query = select(OrderArchiveSegment).where(OrderArchiveSegment.store_id == store.id)
+        if start is not None:
+            query = query.where(OrderArchiveSegment.last_created_at >= start)
+        if end is not None:
+            query = query.where(OrderArchiveSegment.first_created_at < end)
+        month = OrderArchiveSegment.month.desc() if newest_first else OrderArchiveSegment.month
+        return (await db.scalars(query.order_by(month))).all()
+
+    @staticmethod
+    async def orders_between(
+        db: AsyncSession,
+        store: Store,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        match: Optional[Callable[[OrderResponse], bool]] = None,
+        limit: Optional[int] = None
+    ) -> List[OrderResponse]:
+        """
+        Archived orders created in [start, end), newest first.
+
+        Segments are read one at a time, newest first, and no further once
+        limit orders were found.
+
+        Args:
+            db: Database session
+            store: Store whose archive is read
+            start: Created at or after (default: the oldest)
+            end: Created before (default: the newest)
+            match: Only orders it returns True for
+            limit: Most orders returned
+        """
+        orders = []
+        for segment in await OrderArchiveService.segments_between(db, store, start, end, newest_first=True):
+            # Records are sorted by (created_at, id)
+            orders.extend(
+                order for order in reversed(await OrderArchiveService.read_orders(segment))
+                if (start is None or order.created_at >= start) and (end is None or order.created_at < end)
+                and (match is None or match(order))
+            )
+            if limit is not None and len(orders) >= limit:
+                return orders[:limit]
+        return orders
+
+    @staticmethod
+    async def find_order(db: AsyncSession, store: Store, order_id: UUID) -> Optional[OrderResponse]:
+        """An archived order of the store, or None"""
+        if store.archived_until is None:
+            return None
+        segment = await db.scalar(
+            select(OrderArchiveSegment)
+            .join(ArchivedOrder, ArchivedOrder.segment_id == OrderArchiveSegment.id)
+            .where(ArchivedOrder.store_id == store.id, ArchivedOrder.order_id == order_id)
+        )
+        if segment is None:
+            return None
+        wanted = str(order_id)
+        for record in await OrderArchiveService.read_records(segment):
+            if record["id"] == wanted:
+                return OrderResponse.model_validate(record)
+        return None
@@ -0,0 +1,219 @@
+"""
+Live order events for QuickStore.
+
+Order writes publish events (order.created, order.edited, order.paid,
+order.deleted) with NOTIFY on one Postgres channel, in the writing
+transaction: Postgres delivers them on commit and drops them on rollback,
+to every worker listening, so no broker is needed.
+
+Each worker receives them on its shared LISTEN connection (pg_listener.py),
+opened when the first device subscribes if it is not open yet. The hub
+(OrderEventHub) hands each notification to the subscribers of its store,
+which stream them to devices as server-sent events. Without a usable
+LISTEN connection (a transaction-mode pooler and no LISTEN_DATABASE_URL)
+subscribing fails rather than streaming nothing.
+
+Events carry order summaries, not full orders, to stay under the 8000
+byte NOTIFY payload limit; larger sets of orders are split over several
+notifications. A device that connects, reconnects or falls behind gets a
+"ready" or "resync" event and refetches today's orders (cheap with their
+ETag) rather than replaying what it missed.
+"""
+import asyncio
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Set
+from uuid import UUID
+
+from sqlalchemy import ARRAY, String, bindparam, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Order
+from ..pg_listener import PgListener, pg_listener
+
+
+logger = logging.getLogger(__name__)
+
+ORDER_EVENTS_CHANNEL = "quick_store__order_events"
+ORDER_EVENTS = ("created", "edited", "paid", "deleted")
+
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD_BYTES = 7000
+
+
+def order_summary(order: Order) -> Dict[str, Any]:
+    """Fields of an order a live view needs to update its list"""
+    return {
+        "id": str(order.id),
+        "customer_name": order.customer_name,
+        "total": str(order.total),
+        "is_paid": order.is_paid,
+        "is_edited": bool(order.is_edited),  # None before the first flush
+        "created_at": order.created_at.isoformat(),
+    }
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class OrderEventService:
+    """Service for publishing order events"""
+
+    @staticmethod
+    def payloads(store_id: UUID, event: str, orders: Iterable[Dict[str, Any]]) -> List[str]:
+        """
+        NOTIFY payloads for an event, each under MAX_PAYLOAD_BYTES.
+
+        Example:
+            >>> OrderEventService.payloads(store.id, "paid", [{"id": "…", "is_paid": True}])
+            ['{"store_id":"…","event":"order.paid","orders":[{"id":"…","is_paid":true}]}']
+        """
+        if event not in ORDER_EVENTS:
+            raise ValueError(f"Unknown order event: {event}")
+        head = {"store_id": str(store_id), "event": f"order.{event}"}
+        empty = len(json.dumps(dict(head, orders=[]), separators=(",", ":")))
+
+        payloads, chunk, size = [], [], empty
+        for order in orders:
+            encoded = len(json.dumps(order, separators=(",", ":")).encode()) + 1
+            if chunk and size + encoded > MAX_PAYLOAD_BYTES:
+                payloads.append(json.dumps(dict(head, orders=chunk), separators=(",", ":")))
+                chunk, size = [], empty
+            chunk.append(order)
+            size += encoded
+        if chunk:
+            payloads.append(json.dumps(dict(head, orders=chunk), separators=(",", ":")))
+        return payloads
+
+    @staticmethod
+    async def publish(db: AsyncSession, store_id: UUID, event: str, orders: Iterable[Dict[str, Any]]) -> None:
+        """
+        Publish an order event in the caller's transaction (one statement).
+
+        Args:
+            db: Database session; the event is sent when it commits
+            store_id: Store of the orders
+            event: "created", "edited", "paid" or "deleted"
+            orders: Order summaries (order_summary), or {"id": ...} for deletions
+
+        Example:
+            >>> await OrderEventService.publish(db, store.id, "created", [order_summary(order)])
+            >>> await db.commit()
+        """
+        payloads = OrderEventService.payloads(store_id, event, orders)
+        if payloads:
+            await db.execute(
+                text("SELECT pg_notify(:channel, payload) FROM unnest(:payloads) AS payload").bindparams(
+                    bindparam("payloads", type_=ARRAY(String))
+                ),
+                {"channel": ORDER_EVENTS_CHANNEL, "payloads": payloads}
+            )
+
+
+class OrderEventsUnavailable(RuntimeError):
+    """The hub has no usable LISTEN connection"""
+
+
+class OrderEventSubscription:
+    """Events of one store for one connected device"""
+
+    # Events held for a slow device before it is told to resync
+    MAX_PENDING = 256
+
+    def __init__(self, store_id: str):
+        self.store_id = store_id
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(self.MAX_PENDING)
+
+    def push(self, message: str) -> None:
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            # Too far behind: drop what is pending and have it refetch
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait(_sse("resync", {}))
+
+
+class OrderEventHub:
+    """Fans order events from the worker's LISTEN connection out to subscribers"""
+
+    # How long a subscriber waits for the connection
+    CONNECT_TIMEOUT_SECONDS = 10.0
+
+    def __init__(self, listener: Optional[PgListener] = None):
+        self.listener = listener or pg_listener
+        self._subscribers: Dict[str, Set[OrderEventSubscription]] = {}
+        self._was_connected = False
+        self.listener.add_channel(ORDER_EVENTS_CHANNEL, self._dispatch, on_connect=self._on_connect)
+
+    async def subscribe(self, store_id: UUID) -> OrderEventSubscription:
+        """
+        Start receiving a store's events (opens the LISTEN connection if needed).
+
+        Returns once the worker is listening, so no event committed after
+        this call is missed. Call unsubscribe() when the device goes away.
+
+        Raises:
+            OrderEventsUnavailable: If there is no LISTEN DSN, or the
+                database cannot be reached in time
+        """
+        if self.listener.resolved_dsn is None:
+            raise OrderEventsUnavailable("LISTEN_DATABASE_URL is required behind PgBouncer in transaction mode")
+        subscription = OrderEventSubscription(str(store_id))
+        self._subscribers.setdefault(subscription.store_id, set()).add(subscription)
+        try:
+            await self.listener.start()
+            connected = await self.listener.wait_connected(self.CONNECT_TIMEOUT_SECONDS)
+        except BaseException:
+            self.unsubscribe(subscription)
+            raise
+        if not connected:
+            self.unsubscribe(subscription)
+            raise OrderEventsUnavailable("Could not listen for order events in time")
+        return subscription
+
+    def unsubscribe(self, subscription: OrderEventSubscription) -> None:
+        subscribers = self._subscribers.get(subscription.store_id)
+        if subscribers is not None:
+            subscribers.discard(subscription)
+            if not subscribers:
+                del self._subscribers[subscription.store_id]
+
+    def _on_connect(self) -> None:
+        if self._was_connected:
+            # Events may have been missed while disconnected
+            self._broadcast(_sse("resync", {}))
+        self._was_connected = True
+
+    def _dispatch(self, payload: str) -> None:
+        try:
+            message = json.loads(payload)
+        except ValueError:
+            logger.warning("Ignoring malformed order event: %r", payload[:200])
+            return
+        sse = _sse(message["event"], {"orders": message["orders"]})
+        for subscription in tuple(self._subscribers.get(message["store_id"], ())):
+            subscription.push(sse)
+
+    def _broadcast(self, message: str) -> None:
+        for subscribers in self._subscribers.values():
+            for subscription in tuple(subscribers):
+                subscription.push(message)
+
+    @staticmethod
+    async def stream(subscription: OrderEventSubscription, heartbeat: float = 15.0) -> AsyncIterator[str]:
+        """
+        Server-sent events text for a subscription, starting with "ready".
+
+        Comments are sent while idle so proxies keep the connection open.
+        """
+        yield "retry: 3000\n" + _sse("ready", {})
+        while True:
+            try:
+                yield await asyncio.wait_for(subscription.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+
+
+order_event_hub = OrderEventHub()
@@ -0,0 +1,188 @@
+"""
+Order export service for QuickStore.
+
+Exports are streamed: order lines are read through a server-side cursor
+in batches and each batch is formatted and sent before the next is read,
+so memory use stays flat whatever the date range. Archived orders are
+read one segment at a time and sent before the orders still in the
+database, which are all newer.
+"""
+import csv
+import io
+import json
+from collections import namedtuple
+from datetime import datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import AsyncIterator, Iterable, List, Optional, Sequence
+
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Row
+
+from ..models import Order, OrderItem, Store
+from ..schemas.order import OrderResponse
+
+
+CENTS = Decimal("0.01")
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+CSV_COLUMNS = (
+    "order_id", "created_at", "customer_name", "is_paid", "is_edited", "order_total",
+    "item_id", "product_id", "product_name", "quantity", "unit", "price", "line_total",
+)
+
+# Order line of an archived order, with the columns of lines_query
+ArchivedLine = namedtuple("ArchivedLine", (
+    "order_id", "created_at", "customer_name", "is_paid", "is_edited", "order_total",
+    "item_id", "product_id", "product_name", "quantity", "sold_in_unit", "price",
+))
+
+
+def _line_total(row: Row) -> Decimal:
+    return (row.price * row.quantity).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _text(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+
+class OrderExportService:
+    """Service for streaming order exports"""
+
+    # Rows fetched from the server-side cursor per round trip
+    BATCH_SIZE = 1000
+
+    @staticmethod
+    def lines_query(store: Store, start: Optional[datetime] = None, end: Optional[datetime] = None) -> Select:
+        """
+        One row per order line, oldest order first, with its order's columns.
+
+        Args:
+            store: Store to export
+            start: First instant to include (naive UTC), or None
+            end: First instant to exclude (naive UTC), or None
+
+        Example:
+            >>> start, end = BusinessDayService.day_range(store, date(2026, 9, 1), date(2026, 9, 30))
+            >>> OrderExportService.lines_query(store, start, end)
+        """
+        query = (
+            select(
+                Order.id.label("order_id"),
+                Order.created_at,
+                Order.customer_name,
+                Order.is_paid,
+                Order.is_edited,
+                Order.total.label("order_total"),
+                OrderItem.id.label("item_id"),
+                OrderItem.product_id,
+                OrderItem.product_name,
+                OrderItem.quantity,
+                OrderItem.sold_in_unit,
+                OrderItem.price,
+            )
+            .join(OrderItem, (OrderItem.order_id == Order.id) & (OrderItem.order_created_at == Order.created_at))
+            .where(Order.store_id == store.id)
+            .order_by(Order.created_at, Order.id, OrderItem.id)
+        )
+        # Bounds repeated on the items so both tables prune their partitions
+        if start is not None:
+            query = query.where(Order.created_at >= start, OrderItem.order_created_at >= start)
+        if end is not None:
+            query = query.where(Order.created_at < end, OrderItem.order_created_at < end)
+        return query.execution_options(yield_per=OrderExportService.BATCH_SIZE)
+
+    @staticmethod
+    def archived_lines(orders: Iterable[OrderResponse]) -> List[ArchivedLine]:
+        """
+        Lines of archived orders, in the order lines_query returns them.
+
+        Example:
+            >>> OrderExportService.archived_lines(await OrderArchiveService.read_orders(segment))
+            [ArchivedLine(order_id=UUID("…"), created_at=datetime(2026, 3, 1, 9, 12), ...), ...]
+        """
+        return [
+            ArchivedLine(
+                order.id, order.created_at, order.customer_name, order.is_paid, order.is_edited, order.total,
+                item.id, item.product_id, item.product_name, item.quantity, item.sold_in_unit, item.price,
+            )
+            for order in sorted(orders, key=lambda order: (order.created_at, order.id))
+            for item in sorted(order.items, key=lambda item: item.id)
+        ]
+
+    @staticmethod
+    async def csv_chunks(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[str]:
+        """
+        CSV text, header first, one chunk per batch of order lines.
+
+        Example:
+            >>> async for chunk in OrderExportService.csv_chunks(result.partitions()):
+            ...     send(chunk)
+        """
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(CSV_COLUMNS)
+
+        async for rows in batches:
+            for row in rows:
+                writer.writerow((
+                    row.order_id, row.created_at.isoformat(), row.customer_name or "",
+                    row.is_paid, row.is_edited, row.order_total,
+                    row.item_id, row.product_id or "", row.product_name, row.quantity,
+                    row.sold_in_unit or "", row.price, _line_total(row),
+                ))
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue()
+
+    @staticmethod
+    def _order_json(rows: List[Row]) -> str:
+        first = rows[0]
+        return json.dumps({
+            "id": str(first.order_id),
+            "created_at": first.created_at.isoformat(),
+            "customer_name": first.customer_name,
+            "is_paid": first.is_paid,
+            "is_edited": first.is_edited,
+            "total": str(first.order_total),
+            "items": [
+                {
+                    "id": str(row.item_id),
+                    "product_id": _text(row.product_id),
+                    "product_name": row.product_name,
+                    "quantity": str(row.quantity),
+                    "unit": row.sold_in_unit,
+                    "price": str(row.price),
+                    "line_total": str(_line_total(row)),
+                }
+                for row in rows
+            ],
+        }) + "\n"
+
+    @staticmethod
+    async def ndjson_chunks(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[str]:
+        """
+        One JSON object per order (with its items) per line.
+
+        Lines arrive grouped by order, so only the order being assembled is
+        held back between batches.
+        """
+        current: List[Row] = []
+        async for rows in batches:
+            out = []
+            for row in rows:
+                if current and current[0].order_id != row.order_id:
+                    out.append(OrderExportService._order_json(current))
+                    current = []
+                current.append(row)
+            if out:
+                yield "".join(out)
+
+        if current:
+            yield OrderExportService._order_json(current)
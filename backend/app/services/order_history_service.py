@@ -0,0 +1,168 @@
+"""
+Order edit history service for QuickStore.
+
+Each content edit of an order is stored as a diff rather than a snapshot:
+the order fields that changed and the lines that were removed, added or
+changed, each with its value before ("from") and after ("to") the edit.
+A history row therefore grows with the size of the edit, not the size of
+the order. Any past version is rebuilt by undoing diffs from the current
+order backwards.
+
+Diff format (decimals are stored as strings to stay exact)::
+
+    {
+        "fields": {"customer_name": {"from": "Ann", "to": "Anne"}},
+        "items": {
+            "removed": [<item>],
+            "added": [<item>],
+            "changed": [{"id": "...", "quantity": {"from": "1.0000", "to": "3.0000"}}]
+        }
+    }
+
+Items recorded before diffs existed have no "id" and are matched by
+product, quantity and price instead.
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from ..models.order import Order, OrderItem
+
+
+ITEM_FIELDS = ("product_id", "product_name", "quantity", "price", "sold_in_unit", "base_unit", "quantity_in_base")
+CHANGED_ITEM_FIELDS = ("quantity", "quantity_in_base")
+
+
+def _json_value(value: Any) -> Any:
+    """Decimals and UUIDs as strings, everything else unchanged"""
+    if value is None or isinstance(value, (str, bool, int)):
+        return value
+    return str(value)
+
+
+class OrderHistoryService:
+    """Service for building and replaying order edit diffs"""
+
+    @staticmethod
+    def item_state(item: OrderItem) -> Dict[str, Any]:
+        """
+        JSON-safe copy of an order item.
+
+        Example:
+            >>> item_state(item)
+            {"id": "…", "product_id": "…", "product_name": "Tea", "quantity": "2.0000", ...}
+        """
+        state = {"id": _json_value(item.id)}
+        state.update({field: _json_value(getattr(item, field)) for field in ITEM_FIELDS})
+        return state
+
+    @staticmethod
+    def order_state(order: Order) -> Dict[str, Any]:
+        """JSON-safe copy of an order's editable content"""
+        return {
+            "customer_name": order.customer_name,
+            "total": _json_value(order.total),
+            "items": [OrderHistoryService.item_state(item) for item in order.items],
+        }
+
+    @staticmethod
+    def build_changes(
+        fields: Dict[str, Tuple[Any, Any]],
+        removed: Iterable[OrderItem] = (),
+        added: Iterable[OrderItem] = (),
+        changed: Iterable[Tuple[OrderItem, Dict[str, Tuple[Any, Any]]]] = ()
+    ) -> Dict[str, Any]:
+        """
+        Build the diff of one edit.
+
+        Args:
+            fields: Order field name -> (old value, new value), only for fields that changed
+            removed: Items deleted by the edit (as they were before it)
+            added: Items created by the edit
+            changed: Items updated in place, with item field -> (old value, new value)
+
+        Returns:
+            Diff in the format described in the module docstring
+
+        Example:
+            >>> build_changes({"total": (Decimal("2.00"), Decimal("6.00"))},
+            ...               changed=[(item, {"quantity": (Decimal("1"), Decimal("3"))})])
+        """
+        changes: Dict[str, Any] = {}
+        if fields:
+            changes["fields"] = {
+                name: {"from": _json_value(old), "to": _json_value(new)}
+                for name, (old, new) in fields.items()
+            }
+
+        items: Dict[str, List[Dict[str, Any]]] = {}
+        removed = [OrderHistoryService.item_state(item) for item in removed]
+        added = [OrderHistoryService.item_state(item) for item in added]
+        changed = [
+            dict(
+                {"id": _json_value(item.id)},
+                **{name: {"from": _json_value(old), "to": _json_value(new)} for name, (old, new) in diffs.items()}
+            )
+            for item, diffs in changed
+        ]
+        if removed:
+            items["removed"] = removed
+        if added:
+            items["added"] = added
+        if changed:
+            items["changed"] = changed
+        if items:
+            changes["items"] = items
+
+        return changes
+
+    @staticmethod
+    def _find_item(items: List[Dict[str, Any]], target: Dict[str, Any]) -> Optional[int]:
+        """Index of the item a diff entry refers to"""
+        if target.get("id"):
+            for index, item in enumerate(items):
+                if item.get("id") == target["id"]:
+                    return index
+            return None
+
+        # Legacy entries: same product, quantity and price
+        for index, item in enumerate(items):
+            if (
+                item.get("product_id") == target.get("product_id")
+                and Decimal(str(item["quantity"])) == Decimal(str(target["quantity"]))
+                and Decimal(str(item["price"])) == Decimal(str(target["price"]))
+            ):
+                return index
+        return None
+
+    @staticmethod
+    def undo(state: Dict[str, Any], changes: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Turn the state after an edit into the state before it.
+
+        Args:
+            state: Order state as returned by order_state (not modified)
+            changes: Diff of the edit
+
+        Returns:
+            The order state before the edit
+        """
+        previous = dict(state)
+        previous["items"] = [dict(item) for item in state["items"]]
+
+        for name, value in changes.get("fields", {}).items():
+            previous[name] = value["from"]
+
+        items = changes.get("items", {})
+        for added in items.get("added", []):
+            index = OrderHistoryService._find_item(previous["items"], added)
+            if index is not None:
+                del previous["items"][index]
+        for changed in items.get("changed", []):
+            index = OrderHistoryService._find_item(previous["items"], changed)
+            if index is not None:
+                for name, value in changed.items():
+                    if name != "id":
+                        previous["items"][index][name] = value["from"]
+        previous["items"].extend(dict(item) for item in items.get("removed", []))
+
+        return previous
@@ -0,0 +1,119 @@
+"""
+Order partition maintenance for QuickStore.
+
+quick_store__orders is range partitioned by month on created_at, and
+quick_store__order_items by month on order_created_at (a copy of its
+order's created_at), so both prune to the same months: checkouts insert
+into the current month only, and queries bounded by time (today's
+orders, day reports, exports) only scan the months they cover.
+
+Partitions are named <table>_pYYYYMM and cover one UTC calendar month.
+Each table also has a <table>_default partition for rows no monthly
+partition covers. Months must be created before they start, by
+ensure_partitions() (run at startup and by
+``python -m app.commands.create_order_partitions``).
+"""
+import logging
+import re
+from datetime import date, datetime
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import settings
+
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> partition key column
+PARTITIONED_TABLES = (
+    ("quick_store__orders", "created_at"),
+    ("quick_store__order_items", "order_created_at"),
+)
+
+# Serializes partition creation across workers
+PARTITION_LOCK_ID = 0x5155_4943_4B50  # "QUICKP"
+
+
+def month_start(value: date) -> date:
+    """First day of the month of a date"""
+    return value.replace(day=1)
+
+
+def add_months(month: date, count: int) -> date:
+    """First day of the month `count` months after `month`"""
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    """Name of a table's partition for a month"""
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partition(name: str) -> bool:
+    """True for the name of a monthly or default order partition"""
+    return any(re.fullmatch(rf"{table}_(p\d{{6}}|default)", name) for table, _ in PARTITIONED_TABLES)
+
+
+class PartitionService:
+    """Service for creating monthly order partitions"""
+
+    @staticmethod
+    async def ensure_partitions(
+        db: AsyncSession,
+        months_ahead: Optional[int] = None,
+        today: Optional[date] = None
+    ) -> List[str]:
+        """
+        Create the partitions of the current month and the months ahead.
+
+        Existing partitions are left alone. A month whose rows already went
+        to the default partition is skipped with a warning: Postgres cannot
+        attach a range the default partition holds rows for, and those
+        rows stay readable where they are. The caller commits.
+
+        Args:
+            db: Database session
+            months_ahead: Months to create after the current one
+                (default: settings.ORDER_PARTITION_MONTHS_AHEAD)
+            today: Reference day in UTC (default: now)
+
+        Returns:
+            Names of the partitions created
+
+        Example:
+            >>> await PartitionService.ensure_partitions(db, months_ahead=2, today=date(2026, 10, 16))
+            ["quick_store__orders_p202610", "quick_store__order_items_p202610", ...]
+        """
+        if months_ahead is None:
+            months_ahead = settings.ORDER_PARTITION_MONTHS_AHEAD
+        first = month_start(today or datetime.utcnow().date())
+
+        await db.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": PARTITION_LOCK_ID})
+
+        created = []
+        for offset in range(months_ahead + 1):
+            start = add_months(first, offset)
+            end = add_months(start, 1)
+            for table, key in PARTITIONED_TABLES:
+                name = partition_name(table, start)
+                if await db.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+                    continue
+
+                stranded = await db.scalar(
+                    text(f"SELECT EXISTS (SELECT 1 FROM {table}_default WHERE {key} >= :start AND {key} < :end)"),
+                    {"start": start, "end": end}
+                )
+                if stranded:
+                    logger.warning("Not creating %s: its month already has rows in %s_default", name, table)
+                    continue
+
+                await db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF {table} "
+                    f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+                ))
+                created.append(name)
+
+        return created
@@ -0,0 +1,166 @@
+"""
+Sales report service for QuickStore.
+
+Reports are aggregated by the database (GROUP BY over the day's orders and
+their lines) so clients receive a few rows instead of every order with
+every item. Days whose orders have been archived are read from the daily
+sales rollups instead, which keep counting them.
+"""
+from datetime import date
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Optional
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Order, OrderItem, Store
+from .business_day_service import BusinessDayService
+from .sales_rollup_service import SalesRollupService
+
+
+CENTS = Decimal("0.01")
+
+
+def _money(value: Optional[Decimal]) -> Decimal:
+    return (value or Decimal(0)).quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def _quantity(value: Decimal) -> str:
+    """Quantity without trailing zeros, e.g. 2 or 0.25"""
+    return format(value.normalize(), "f")
+
+
+class ReportService:
+    """Service for aggregated sales reports"""
+
+    @staticmethod
+    async def daily_summary(db: AsyncSession, store: Store, day: date) -> Dict[str, Any]:
+        """
+        Sales of one business day of a store, in two aggregate queries.
+
+        Products are grouped by product, name and base unit; quantities
+        are summed in the base unit (so 500 g and 1 kg make 1.5 kg) and
+        revenue is price x quantity per line. Days before the store's
+        archived_until come from the rollups, where products are grouped
+        by product under their latest name.
+
+        Args:
+            db: Database session
+            store: Store to report on
+            day: Business day (see BusinessDayService)
+
+        Returns:
+            Dict with the day, order count, revenue, paid/unpaid split,
+            edited order count and per-product sales (highest revenue first)
+
+        Example:
+            >>> await ReportService.daily_summary(db, store, date(2026, 10, 16))
+            {"date": date(2026, 10, 16), "order_count": 42, "revenue": Decimal("318.50"), ...,
+             "products": [{"product_name": "Tea", "quantity": Decimal("61"), "revenue": Decimal("122.00"), ...}]}
+        """
+        start, end = BusinessDayService.day_range(store, day)
+        if store.archived_until is not None and start < store.archived_until:
+            return await ReportService._archived_day_summary(db, store, day)
+        in_day = (Order.store_id == store.id, Order.created_at >= start, Order.created_at < end)
+
+        totals = (await db.execute(
+            select(
+                func.count(Order.id).label("order_count"),
+                func.sum(Order.total).label("revenue"),
+                func.count(Order.id).filter(Order.is_paid).label("paid_count"),
+                func.sum(Order.total).filter(Order.is_paid).label("paid_revenue"),
+                func.count(Order.id).filter(Order.is_edited).label("edited_count"),
+            ).where(*in_day)
+        )).one()
+
+        quantity = func.sum(func.coalesce(OrderItem.quantity_in_base, OrderItem.quantity))
+        revenue = func.sum(OrderItem.price * OrderItem.quantity)
+        product_rows = (await db.execute(
+            select(
+                OrderItem.product_id,
+                OrderItem.product_name,
+                OrderItem.base_unit,
+                quantity.label("quantity"),
+                revenue.label("revenue"),
+            )
+            .join(Order, (Order.id == OrderItem.order_id) & (Order.created_at == OrderItem.order_created_at))
+            .where(*in_day, OrderItem.order_created_at >= start, OrderItem.order_created_at < end)
+            .group_by(OrderItem.product_id, OrderItem.product_name, OrderItem.base_unit)
+            .order_by(revenue.desc(), OrderItem.product_name)
+        )).all()
+
+        order_count = totals.order_count
+        paid_count = totals.paid_count
+        revenue_total = _money(totals.revenue)
+        paid_revenue = _money(totals.paid_revenue)
+        return {
+            "date": day,
+            "order_count": order_count,
+            "revenue": revenue_total,
+            "paid_count": paid_count,
+            "paid_revenue": paid_revenue,
+            "unpaid_count": order_count - paid_count,
+            "unpaid_revenue": revenue_total - paid_revenue,
+            "edited_count": totals.edited_count,
+            "products": [
+                {
+                    "product_id": row.product_id,
+                    "product_name": row.product_name,
+                    "unit": row.base_unit,
+                    "quantity": row.quantity,
+                    "revenue": _money(row.revenue),
+                }
+                for row in product_rows
+            ],
+        }
+
+    @staticmethod
+    async def _archived_day_summary(db: AsyncSession, store: Store, day: date) -> Dict[str, Any]:
+        """daily_summary of a day whose orders are archived, from the rollups"""
+        summary = await SalesRollupService.range_summary(db, store, day, day)
+        return {
+            "date": day,
+            **{
+                field: summary[field]
+                for field in ("order_count", "revenue", "paid_count", "paid_revenue",
+                              "unpaid_count", "unpaid_revenue", "edited_count")
+            },
+            "products": [
+                {field: product[field] for field in ("product_id", "product_name", "unit", "quantity", "revenue")}
+                for product in summary["products"]
+            ],
+        }
+
+    @staticmethod
+    def text_summary(report: Dict[str, Any], store_name: str, currency_symbol: str = "$") -> str:
+        """
+        Plain-text summary of a daily report, ready to paste into a message.
+
+        Same layout as the summary the app used to build on the device.
+
+        Example:
+            >>> print(ReportService.text_summary(report, "Corner Shop"))
+            Store: Corner Shop
+            Date: Oct 16, 2026
+            Orders: 2
+            ...
+        """
+        day = report["date"]
+        lines = [f"Store: {store_name}", f"Date: {day:%b} {day.day}, {day.year}"]
+        if report["order_count"] == 0:
+            return "\n".join(lines + ["", "No orders for this date."])
+
+        lines += [f"Orders: {report['order_count']}", "", "Items Sold:"]
+        for product in report["products"]:
+            unit = product["unit"] or "units"
+            lines.append(
+                f"- {product['product_name']}: {_quantity(product['quantity'])} {unit}"
+                f" - {currency_symbol}{product['revenue']}"
+            )
+        lines += ["", f"Total Revenue: {currency_symbol}{report['revenue']}"]
+        if report["unpaid_count"]:
+            lines.append(f"Unpaid: {report['unpaid_count']} orders - {currency_symbol}{report['unpaid_revenue']}")
+
+        if report["edited_count"]:
+            lines += ["", "⚠️  Note: Some orders were edited after creation"]
+        return "\n".join(lines)
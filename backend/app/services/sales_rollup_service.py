@@ -0,0 +1,360 @@
+"""
+Sales rollup service for QuickStore.
+
+Range reports read two pre-aggregated tables instead of scanning every
+order line: quick_store__daily_sales (order totals per store and business
+day) and quick_store__daily_product_sales (per product as well).
+
+Every order write adds its effect to the rollups in the same transaction,
+as a delta: a new order counts +1, a deleted one -1, and an edit counts
+the order as it was -1 and as it is +1. The deltas of a request are
+summed in a SalesDelta and applied with one upsert per table, rows in key
+order so concurrent writers lock them in the same order. Applying locks
+the rows until commit, so it is the last write of a request, and the day
+row (which every order of the day updates) is written last.
+
+rebuild() recomputes the rollups from the orders, e.g. after a store's
+business day settings change. Days before a store's archive horizon
+(archived_until) are kept as they are: their orders are no longer in the
+database. A per-store advisory lock keeps rebuilds and deltas apart:
+deltas hold it shared, so they do not wait for each other, and a rebuild
+holds it exclusively, so it counts every order whose delta was applied
+before it and no delta is applied over it half done. Deltas pick the
+business day of their orders under that lock, from the store's current
+settings, so none lands on a day of the settings the rebuild replaced.
+"""
+from collections import defaultdict
+from datetime import date, datetime
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable, Optional, Tuple
+from uuid import UUID, uuid4
+
+from sqlalchemy import Date, Interval, String, cast, delete, func, insert, literal, or_, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by, array_agg
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import DailyProductSales, DailySales, Order, OrderItem, Store
+from .business_day_service import BusinessDayService
+
+
+CENTS = Decimal("0.01")
+
+# Advisory lock class of a store's rollups (key: hash of the store id)
+ROLLUP_LOCK_CLASS = 0x5152_4F4C  # "QROL"
+
+DAY_FIELDS = ("order_count", "revenue", "paid_count", "paid_revenue", "edited_count")
+PRODUCT_FIELDS = ("quantity", "quantity_in_base", "revenue", "order_count")
+
+
+def business_day_sql(created_at, store_timezone, day_start):
+    """SQL for the business day of a naive UTC timestamp (BusinessDayService.current_day)"""
+    local = func.timezone(store_timezone, func.timezone("UTC", created_at))
+    return cast(local - cast(day_start, Interval), Date)
+
+
+def rollup_lock_sql(lock_function: str, store_id):
+    """SQL taking the advisory lock of a store's rollups until commit"""
+    return getattr(func, lock_function)(ROLLUP_LOCK_CLASS, func.hashtext(cast(store_id, String)))
+
+
+class SalesDelta:
+    """Pending changes to the sales rollups of one store"""
+
+    def __init__(self, store: Store):
+        self.store = store
+        # Keyed by order timestamp: the business day is picked in apply()
+        self.days: Dict[datetime, Dict[str, Any]] = defaultdict(lambda: dict.fromkeys(DAY_FIELDS, 0))
+        self.products: Dict[Tuple[datetime, Optional[UUID]], Dict[str, Any]] = {}
+
+    def add_order(self, order: Order, sign: int = 1) -> None:
+        """
+        Count an order (sign=1) or take it back out (sign=-1).
+
+        The order's items must be loaded. For an edit, call with -1 before
+        changing the order and with +1 after.
+
+        Example:
+            >>> delta = SalesDelta(store)
+            >>> delta.add_order(order, -1)
+            >>> ...  # edit the order
+            >>> delta.add_order(order)
+            >>> await delta.apply(db)
+        """
+        day = order.created_at
+        totals = self.days[day]
+        totals["order_count"] += sign
+        totals["revenue"] += sign * order.total
+        if order.is_paid:
+            totals["paid_count"] += sign
+            totals["paid_revenue"] += sign * order.total
+        if order.is_edited:
+            totals["edited_count"] += sign
+
+        in_order = set()
+        for item in order.items:
+            row = self.products.get((day, item.product_id))
+            if row is None:
+                row = self.products[(day, item.product_id)] = dict.fromkeys(PRODUCT_FIELDS, 0)
+            row["product_name"] = item.product_name
+            row["base_unit"] = item.base_unit
+            row["quantity"] += sign * item.quantity
+            row["quantity_in_base"] += sign * (item.quantity_in_base if item.quantity_in_base is not None else item.quantity)
+            row["revenue"] += sign * item.price * item.quantity
+            if item.product_id not in in_order:
+                in_order.add(item.product_id)
+                row["order_count"] += sign
+
+    def add_payment_change(self, created_at: datetime, total: Decimal, is_paid: bool) -> None:
+        """Count an order whose payment status flipped to is_paid"""
+        totals = self.days[created_at]
+        sign = 1 if is_paid else -1
+        totals["paid_count"] += sign
+        totals["paid_revenue"] += sign * total
+
+    async def apply(self, db: AsyncSession) -> None:
+        """
+        Add the pending changes to the rollups (at most three statements).
+
+        Call it right before committing: the rows stay locked until then.
+        """
+        store_id = self.store.id
+        if not self.days and not self.products:
+            return
+
+        # Settings as of the lock: a rebuild for new settings waits for this
+        # transaction, or this one for the rebuild
+        settings = (await db.execute(
+            select(Store.timezone, Store.business_day_start, rollup_lock_sql("pg_advisory_xact_lock_shared", Store.id))
+            .where(Store.id == store_id)
+        )).one()
+        store = Store(id=store_id, timezone=settings.timezone, business_day_start=settings.business_day_start)
+        business_days = {
+            created_at: BusinessDayService.current_day(store, created_at)
+            for created_at in {*self.days, *(created_at for created_at, _ in self.products)}
+        }
+
+        days: Dict[date, Dict[str, Any]] = defaultdict(lambda: dict.fromkeys(DAY_FIELDS, 0))
+        for created_at, totals in self.days.items():
+            day = days[business_days[created_at]]
+            for field in DAY_FIELDS:
+                day[field] += totals[field]
+        products: Dict[Tuple[date, Optional[UUID]], Dict[str, Any]] = {}
+        for (created_at, product_id), row in sorted(self.products.items(), key=lambda entry: entry[0][0]):
+            product = products.setdefault((business_days[created_at], product_id), dict.fromkeys(PRODUCT_FIELDS, 0))
+            product.update(product_name=row["product_name"], base_unit=row["base_unit"])
+            for field in PRODUCT_FIELDS:
+                product[field] += row[field]
+
+        product_rows = [
+            dict(id=uuid4(), store_id=store_id, business_day=day, product_id=product_id, **row)
+            for (day, product_id), row in sorted(products.items(), key=lambda entry: (entry[0][0], str(entry[0][1] or "")))
+            if any(row[field] for field in PRODUCT_FIELDS)
+        ]
+        if product_rows:
+            stmt = pg_insert(DailyProductSales).values(product_rows)
+            set_ = {field: DailyProductSales.__table__.c[field] + stmt.excluded[field] for field in PRODUCT_FIELDS}
+            set_.update(product_name=stmt.excluded.product_name, base_unit=stmt.excluded.base_unit)
+            await db.execute(stmt.on_conflict_do_update(constraint="unique_daily_product_sales", set_=set_))
+
+        day_rows = [
+            dict(store_id=store_id, business_day=day, **totals)
+            for day, totals in sorted(days.items())
+            if any(totals.values())
+        ]
+        if day_rows:
+            stmt = pg_insert(DailySales).values(day_rows)
+            await db.execute(stmt.on_conflict_do_update(
+                index_elements=[DailySales.store_id, DailySales.business_day],
+                set_={field: DailySales.__table__.c[field] + stmt.excluded[field] for field in DAY_FIELDS}
+            ))
+
+        self.days.clear()
+        self.products.clear()
+
+
+class SalesRollupService:
+    """Service for maintaining and reading the sales rollups"""
+
+    @staticmethod
+    async def rebuild(db: AsyncSession, store_ids: Optional[Iterable[UUID]] = None) -> None:
+        """
+        Recompute the rollups of some stores (default: all) from their orders.
+
+        Runs in the caller's transaction: two DELETEs and two INSERT ... SELECTs,
+        after taking the stores' rollup locks (held until commit, so order
+        writes of those stores wait for it). Only days from the business
+        day of the store's archived_until on are recomputed; earlier days
+        count archived orders and are kept.
+
+        Args:
+            db: Database session
+            store_ids: Stores to rebuild, or None for every store
+
+        Example:
+            >>> await SalesRollupService.rebuild(db, [store.id])
+            >>> await db.commit()
+        """
+        store_ids = None if store_ids is None else list(store_ids)
+        locked = select(rollup_lock_sql("pg_advisory_xact_lock", Store.id)).order_by(Store.id)
+        if store_ids is not None:
+            locked = locked.where(Store.id.in_(store_ids))
+        await db.execute(locked)
+
+        store_filter = [] if store_ids is None else [Order.store_id.in_(store_ids)]
+        day = business_day_sql(Order.created_at, Store.timezone, Store.business_day_start).label("business_day")
+        horizon = business_day_sql(Store.archived_until, Store.timezone, Store.business_day_start)
+        store_filter.append(or_(Store.archived_until.is_(None), day >= horizon))
+
+        for table in (DailySales, DailyProductSales):
+            table_horizon = select(horizon).where(Store.id == table.store_id).scalar_subquery()
+            stmt = delete(table).where(or_(table_horizon.is_(None), table.business_day >= table_horizon))
+            if store_ids is not None:
+                stmt = stmt.where(table.store_id.in_(store_ids))
+            await db.execute(stmt)
+
+        days = (
+            select(
+                Order.store_id,
+                day,
+                func.count(Order.id),
+                func.sum(Order.total),
+                func.count(Order.id).filter(Order.is_paid),
+                func.coalesce(func.sum(Order.total).filter(Order.is_paid), 0),
+                func.count(Order.id).filter(Order.is_edited),
+            )
+            .join(Store, Store.id == Order.store_id)
+            .where(*store_filter)
+            .group_by(Order.store_id, day)
+        )
+        await db.execute(insert(DailySales).from_select(["store_id", "business_day", *DAY_FIELDS], days))
+
+        products = (
+            select(
+                func.gen_random_uuid(),
+                Order.store_id,
+                day,
+                OrderItem.product_id,
+                array_agg(aggregate_order_by(OrderItem.product_name, Order.created_at.desc()))[1],
+                array_agg(aggregate_order_by(OrderItem.base_unit, Order.created_at.desc()))[1],
+                func.sum(OrderItem.quantity),
+                func.sum(func.coalesce(OrderItem.quantity_in_base, OrderItem.quantity)),
+                func.sum(OrderItem.price * OrderItem.quantity),
+                func.count(func.distinct(Order.id)),
+            )
+            .join(Order, (Order.id == OrderItem.order_id) & (Order.created_at == OrderItem.order_created_at))
+            .join(Store, Store.id == Order.store_id)
+            .where(*store_filter)
+            .group_by(Order.store_id, day, OrderItem.product_id)
+        )
+        await db.execute(insert(DailyProductSales).from_select(
+            ["id", "store_id", "business_day", "product_id", "product_name", "base_unit", *PRODUCT_FIELDS],
+            products
+        ))
+
+    @staticmethod
+    async def forget_product(db: AsyncSession, store_id: UUID, product_id: UUID) -> None:
+        """
+        Move a deleted product's rollup rows under product_id NULL.
+
+        Its order lines lose their product_id (ON DELETE SET NULL), so
+        later edits of those orders are counted there too.
+        """
+        moved = (
+            select(
+                func.gen_random_uuid(),
+                DailyProductSales.store_id,
+                DailyProductSales.business_day,
+                literal(None, DailyProductSales.product_id.type),
+                DailyProductSales.product_name,
+                DailyProductSales.base_unit,
+                *(DailyProductSales.__table__.c[field] for field in PRODUCT_FIELDS),
+            )
+            .where(DailyProductSales.store_id == store_id, DailyProductSales.product_id == product_id)
+            .order_by(DailyProductSales.business_day)
+        )
+        stmt = pg_insert(DailyProductSales).from_select(
+            ["id", "store_id", "business_day", "product_id", "product_name", "base_unit", *PRODUCT_FIELDS],
+            moved
+        )
+        set_ = {field: DailyProductSales.__table__.c[field] + stmt.excluded[field] for field in PRODUCT_FIELDS}
+        await db.execute(stmt.on_conflict_do_update(constraint="unique_daily_product_sales", set_=set_))
+        await db.execute(delete(DailyProductSales).where(
+            DailyProductSales.store_id == store_id,
+            DailyProductSales.product_id == product_id
+        ))
+
+    @staticmethod
+    async def range_summary(db: AsyncSession, store: Store, first_day: date, last_day: date) -> Dict[str, Any]:
+        """
+        Sales of a range of business days, read from the rollups.
+
+        Three indexed queries over at most one row per day (and product),
+        whatever the number of orders.
+
+        Args:
+            db: Database session
+            store: Store to report on
+            first_day: First business day included
+            last_day: Last business day included
+
+        Returns:
+            Dict with the range, totals, per-day totals and per-product
+            sales (highest revenue first)
+
+        Example:
+            >>> await SalesRollupService.range_summary(db, store, date(2026, 9, 1), date(2026, 9, 30))
+            {"date_from": date(2026, 9, 1), "date_to": date(2026, 9, 30), "order_count": 1204, ...}
+        """
+        in_range = (
+            DailySales.store_id == store.id,
+            DailySales.business_day >= first_day,
+            DailySales.business_day <= last_day,
+        )
+        days = (await db.scalars(
+            select(DailySales).where(*in_range, DailySales.order_count > 0).order_by(DailySales.business_day)
+        )).all()
+
+        revenue = func.sum(DailyProductSales.revenue)
+        products = (await db.execute(
+            select(
+                DailyProductSales.product_id,
+                array_agg(aggregate_order_by(DailyProductSales.product_name, DailyProductSales.business_day.desc()))[1].label("product_name"),
+                array_agg(aggregate_order_by(DailyProductSales.base_unit, DailyProductSales.business_day.desc()))[1].label("unit"),
+                func.sum(DailyProductSales.quantity_in_base).label("quantity"),
+                revenue.label("revenue"),
+                func.sum(DailyProductSales.order_count).label("order_count"),
+            )
+            .where(
+                DailyProductSales.store_id == store.id,
+                DailyProductSales.business_day >= first_day,
+                DailyProductSales.business_day <= last_day,
+            )
+            .group_by(DailyProductSales.product_id)
+            .having(func.sum(DailyProductSales.order_count) > 0)
+            .order_by(revenue.desc())
+        )).all()
+
+        totals = {field: sum((getattr(day, field) for day in days), 0) for field in DAY_FIELDS}
+        return {
+            "date_from": first_day,
+            "date_to": last_day,
+            **totals,
+            "unpaid_count": totals["order_count"] - totals["paid_count"],
+            "unpaid_revenue": totals["revenue"] - totals["paid_revenue"],
+            "days": [
+                dict(date=day.business_day, **{field: getattr(day, field) for field in DAY_FIELDS})
+                for day in days
+            ],
+            "products": [
+                {
+                    "product_id": row.product_id,
+                    "product_name": row.product_name,
+                    "unit": row.unit,
+                    "quantity": row.quantity,
+                    "revenue": row.revenue.quantize(CENTS, rounding=ROUND_HALF_UP),
+                    "order_count": row.order_count,
+                }
+                for row in products
+            ],
+        }
@@ -0,0 +1,111 @@
+"""
+Store change versions for QuickStore.
+
+Each store keeps one counter per kind of data its devices poll:
+
+- catalog: products and combos (create, update, delete)
+- orders: orders, including the inventory they move
+- customers: saved customer names
+
+Readers use them to answer conditional GETs and to key cached snapshots
+without querying the data itself, whichever worker wrote it.
+
+Catalog writes are rare and bump in their own transaction (bump), so a
+reader that sees an unchanged counter knows the catalog is unchanged.
+Order writes are a store's busiest path: a bump in their transaction
+would hold the store's row lock until commit and serialise every
+checkout of the store. They bump right after they commit instead
+(bump_committed), which locks the row for one statement. A reader
+between the two may label the new data with the old version; the bump
+then changes the version again, so clients refetch once more. The
+change is saved whether or not its bump succeeds, so a failed bump is
+logged rather than failing the request: it only leaves the version (and
+the ETags built from it) stale until the store's next order write.
+"""
+import logging
+from typing import Tuple
+from uuid import UUID
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models import Store
+
+
+logger = logging.getLogger(__name__)
+
+VERSION_COLUMNS = {
+    "catalog": Store.catalog_version,
+    "orders": Store.orders_version,
+    "customers": Store.customers_version,
+}
+
+
+class StoreVersionService:
+    """Service for bumping and reading store change versions"""
+
+    @staticmethod
+    async def bump(db: AsyncSession, store_id: UUID, *scopes: str) -> None:
+        """
+        Mark data of a store as changed, in the changing transaction.
+
+        Args:
+            db: Database session
+            store_id: Store whose data changed
+            scopes: Names from VERSION_COLUMNS ("catalog", "orders", "customers")
+
+        Example:
+            >>> await StoreVersionService.bump(db, store.id, "orders", "customers")
+            >>> await db.commit()
+        """
+        columns = {VERSION_COLUMNS[scope].key: VERSION_COLUMNS[scope] + 1 for scope in scopes}
+        if columns:
+            await db.execute(
+                update(Store)
+                .where(Store.id == store_id)
+                .values(**columns)
+                .execution_options(synchronize_session=False)
+            )
+
+    @staticmethod
+    async def bump_committed(db: AsyncSession, store_id: UUID, *scopes: str) -> None:
+        """
+        Mark data of a store as changed once the changing transaction has committed.
+
+        Runs the bump in a transaction of its own, so the store's row is
+        locked only for that statement. Never raises: the change is
+        already committed, and the client must not be told it failed
+        (and retry it) because its version could not be bumped.
+
+        Args:
+            db: Database session, after the commit of the change
+            store_id: Store whose data changed
+            scopes: Names from VERSION_COLUMNS
+
+        Example:
+            >>> await db.commit()
+            >>> await StoreVersionService.bump_committed(db, store.id, "orders")
+        """
+        try:
+            await StoreVersionService.bump(db, store_id, *scopes)
+            await db.commit()
+        except Exception:
+            logger.exception("Could not bump the %s version of store %s", "/".join(scopes), store_id)
+            try:
+                await db.rollback()
+            except Exception:
+                pass  # The session is closed at the end of the request anyway
+
+    @staticmethod
+    async def current(db: AsyncSession, store_id: UUID, *scopes: str) -> Tuple[int, ...]:
+        """
+        Current versions of a store, in the order of scopes (one query).
+
+        Example:
+            >>> await StoreVersionService.current(db, store.id, "catalog", "orders")
+            (12, 4031)
+        """
+        row = (await db.execute(
+            select(*(VERSION_COLUMNS[scope] for scope in scopes)).where(Store.id == store_id)
+        )).one()
+        return tuple(row)
@@ -0,0 +1,147 @@
+"""
+Unit registry for QuickStore.
+
+Units are static reference data (seeded by migration 194285429d4f), so they
+are loaded once per process into an immutable registry instead of being
+queried on every conversion. The registry holds every unit definition and
+the conversion factor for every compatible pair. It is loaded at startup
+and replaced as a whole when refreshed; a refresh in one worker makes
+the others reload theirs on next use (the "units" invalidation tag).
+"""
+from dataclasses import dataclass
+from decimal import Decimal, localcontext
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..cache_bus import cache_bus
+from ..models.unit import Unit
+
+
+@dataclass(frozen=True)
+class UnitDefinition:
+    """Immutable copy of a quick_store__units row"""
+    code: str
+    name: str
+    type: str
+    base_multiplier: Decimal
+    is_base: bool
+    symbol: str
+
+
+class UnitRegistry:
+    """Immutable set of units with precomputed conversion factors"""
+
+    # Factors are computed with extra precision so that multiplying by
+    # them matches converting through the base unit
+    FACTOR_PRECISION = 50
+
+    def __init__(self, units: Iterable[UnitDefinition]):
+        by_code = {unit.code: unit for unit in units}
+
+        factors: Dict[Tuple[str, str], Decimal] = {}
+        with localcontext() as ctx:
+            ctx.prec = self.FACTOR_PRECISION
+            for source in by_code.values():
+                for target in by_code.values():
+                    if source.type == target.type:
+                        factors[(source.code, target.code)] = (
+                            Decimal(source.base_multiplier) / Decimal(target.base_multiplier)
+                        )
+
+        self._units: Mapping[str, UnitDefinition] = MappingProxyType(by_code)
+        self._factors: Mapping[Tuple[str, str], Decimal] = MappingProxyType(factors)
+
+    @classmethod
+    def from_units(cls, units: Iterable[Unit]) -> "UnitRegistry":
+        """
+        Build a registry from Unit rows (or any objects with the same attributes).
+
+        Example:
+            >>> registry = UnitRegistry.from_units(db.query(Unit).all())
+            >>> registry.factor("g", "kg")
+            Decimal("0.001")
+        """
+        return cls(
+            UnitDefinition(
+                code=unit.code,
+                name=unit.name,
+                type=unit.type,
+                base_multiplier=unit.base_multiplier,
+                is_base=unit.is_base,
+                symbol=unit.symbol
+            )
+            for unit in units
+        )
+
+    def get(self, code: Optional[str]) -> Optional[UnitDefinition]:
+        """Unit definition for a code, or None if unknown"""
+        return self._units.get(code)
+
+    def __contains__(self, code: object) -> bool:
+        return code in self._units
+
+    def __len__(self) -> int:
+        return len(self._units)
+
+    def units(self, unit_type: Optional[str] = None) -> List[UnitDefinition]:
+        """All units ordered by type and code, optionally of one type only"""
+        return sorted(
+            (unit for unit in self._units.values() if unit_type is None or unit.type == unit_type),
+            key=lambda unit: (unit.type, unit.code)
+        )
+
+    def factor(self, from_unit: str, to_unit: str) -> Optional[Decimal]:
+        """
+        Multiplier converting a quantity in from_unit into to_unit.
+
+        Returns None if either unit is unknown or they are incompatible.
+
+        Example:
+            >>> registry.factor("kg", "g")
+            Decimal("1000")
+        """
+        return self._factors.get((from_unit, to_unit))
+
+    def are_compatible(self, unit1: str, unit2: str) -> bool:
+        """True if both units exist and are of the same type"""
+        return (unit1, unit2) in self._factors
+
+    def base_unit(self, unit_type: str) -> Optional[UnitDefinition]:
+        """Base unit for a unit type, or None if not found"""
+        for unit in self._units.values():
+            if unit.type == unit_type and unit.is_base:
+                return unit
+        return None
+
+
+_registry: Optional[UnitRegistry] = None
+
+
+def get_loaded_unit_registry() -> Optional[UnitRegistry]:
+    """The process-wide registry, or None if it has not been loaded yet"""
+    return _registry
+
+
+async def load_unit_registry(db: AsyncSession) -> UnitRegistry:
+    """
+    Load all units from the database and install them as the process-wide registry.
+
+    Called at startup and whenever units need to be refreshed. Readers
+    holding the previous registry keep a consistent (if stale) view.
+    """
+    global _registry
+    units = (await db.scalars(select(Unit))).all()
+    _registry = UnitRegistry.from_units(units)
+    return _registry
+
+
+def reset_unit_registry() -> None:
+    """Forget the loaded registry so the next request reloads it"""
+    global _registry
+    _registry = None
+
+
+cache_bus.on_invalidate("units", reset_unit_registry)
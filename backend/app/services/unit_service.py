@@ -2,13 +2,13 @@
 Unit conversion service for QuickStore.
 
 Provides utility functions for converting between units of measurement,
-validating quantities, and checking unit compatibility.
+validating quantities, and checking unit compatibility. Unit definitions
+come from the in-memory UnitRegistry, so none of these touch the database.
 """
 from decimal import Decimal, ROUND_HALF_UP
-from typing import Optional
-from sqlalchemy.orm import Session
+from typing import Iterable, List, Optional, Tuple
 
-from ..models.unit import Unit
+from .unit_registry import UnitDefinition, UnitRegistry
 
 
 class UnitService:
@@ -22,7 +22,7 @@ class UnitService:
         quantity: Decimal,
         from_unit: str,
         to_unit: str,
-        db: Session
+        registry: UnitRegistry
     ) -> Decimal:
         """
         Convert quantity from one unit to another compatible unit.
@@ -31,7 +31,7 @@ class UnitService:
             quantity: Amount to convert
             from_unit: Source unit code (e.g., "g")
             to_unit: Target unit code (e.g., "kg")
-            db: Database session
+            registry: Loaded unit registry
 
         Returns:
             Converted quantity rounded to 4 decimal places
@@ -40,7 +40,7 @@ class UnitService:
             ValueError: If units are invalid or incompatible
 
         Example:
-            >>> convert(Decimal("500"), "g", "kg", db)
+            >>> convert(Decimal("500"), "g", "kg", registry)
             Decimal("0.5000")
         """
         # Same unit, no conversion needed
@@ -48,54 +48,95 @@ class UnitService:
             return UnitService.validate_quantity(quantity)
 
         # Get unit definitions
-        from_unit_obj = db.query(Unit).filter(Unit.code == from_unit).first()
-        to_unit_obj = db.query(Unit).filter(Unit.code == to_unit).first()
+        from_unit_obj = registry.get(from_unit)
+        to_unit_obj = registry.get(to_unit)
 
         if not from_unit_obj or not to_unit_obj:
             raise ValueError(f"Invalid units: {from_unit}, {to_unit}")
 
         # Check compatibility (must be same type)
-        if from_unit_obj.type != to_unit_obj.type:
+        factor = registry.factor(from_unit, to_unit)
+        if factor is None:
             raise ValueError(
                 f"Cannot convert {from_unit_obj.type} to {to_unit_obj.type}"
             )
 
-        # Convert: from_unit → base → to_unit
-        # Example: 500g → 0.5kg
-        # Step 1: 500 * 0.001 = 0.5 (to base unit kg)
-        # Step 2: 0.5 / 1.0 = 0.5 (from base to target)
-        in_base = quantity * from_unit_obj.base_multiplier
-        result = in_base / to_unit_obj.base_multiplier
+        # The factor is from_unit's multiplier over to_unit's, precomputed
+        # Example: 500g → 500 * (0.001 / 1.0) = 0.5kg
+        result = quantity * factor
 
         # Round to 4 decimal places
         return result.quantize(UnitService.PRECISION, rounding=ROUND_HALF_UP)
 
     @staticmethod
-    def are_compatible(unit1: str, unit2: str, db: Session) -> bool:
+    def convert_many(
+        conversions: Iterable[Tuple[Decimal, str, str]],
+        registry: UnitRegistry
+    ) -> List[Tuple[Optional[Decimal], Optional[str]]]:
+        """
+        Convert many (quantity, from_unit, to_unit) triples in one pass.
+
+        Each row is one lookup in the registry's factor table and one exact
+        Decimal multiplication, rounded like convert(). A bad row does not
+        stop the others.
+
+        Args:
+            conversions: Triples of quantity, source unit code and target unit code
+            registry: Loaded unit registry
+
+        Returns:
+            One (converted quantity, None) or (None, error message) per row, in order
+
+        Example:
+            >>> convert_many([(Decimal("500"), "g", "kg"), (Decimal("1"), "kg", "L")], registry)
+            [(Decimal("0.5000"), None), (None, "Incompatible units: kg (weight) and L (volume)")]
+        """
+        results: List[Tuple[Optional[Decimal], Optional[str]]] = []
+        precision = UnitService.PRECISION
+
+        for quantity, from_unit, to_unit in conversions:
+            factor = registry.factor(from_unit, to_unit)
+            if factor is not None:
+                results.append((
+                    (quantity * factor).quantize(precision, rounding=ROUND_HALF_UP),
+                    None
+                ))
+                continue
+
+            from_unit_obj = registry.get(from_unit)
+            to_unit_obj = registry.get(to_unit)
+            if not from_unit_obj:
+                results.append((None, f"Source unit not found: {from_unit}"))
+            elif not to_unit_obj:
+                results.append((None, f"Target unit not found: {to_unit}"))
+            else:
+                results.append((
+                    None,
+                    f"Incompatible units: {from_unit} ({from_unit_obj.type}) and {to_unit} ({to_unit_obj.type})"
+                ))
+
+        return results
+
+    @staticmethod
+    def are_compatible(unit1: str, unit2: str, registry: UnitRegistry) -> bool:
         """
         Check if two units are compatible for conversion.
 
         Args:
             unit1: First unit code
             unit2: Second unit code
-            db: Database session
+            registry: Loaded unit registry
 
         Returns:
             True if units are same type and can be converted
 
         Example:
-            >>> are_compatible("kg", "g", db)
+            >>> are_compatible("kg", "g", registry)
             True
-            >>> are_compatible("kg", "L", db)
+            >>> are_compatible("kg", "L", registry)
             False
         """
-        u1 = db.query(Unit).filter(Unit.code == unit1).first()
-        u2 = db.query(Unit).filter(Unit.code == unit2).first()
-
-        if not u1 or not u2:
-            return False
-
-        return u1.type == u2.type
+        return registry.are_compatible(unit1, unit2)
 
     @staticmethod
     def validate_quantity(quantity: Decimal) -> Decimal:
@@ -121,22 +162,19 @@ class UnitService:
         return quantity.quantize(UnitService.PRECISION, rounding=ROUND_HALF_UP)
 
     @staticmethod
-    def get_base_unit_for_type(unit_type: str, db: Session) -> Optional[Unit]:
+    def get_base_unit_for_type(unit_type: str, registry: UnitRegistry) -> Optional[UnitDefinition]:
         """
         Get the base unit for a given unit type.
 
         Args:
             unit_type: Type of unit ("weight", "volume", "count", or "length")
-            db: Database session
+            registry: Loaded unit registry
 
         Returns:
             Base unit for the type, or None if not found
 
         Example:
-            >>> get_base_unit_for_type("weight", db).code
+            >>> get_base_unit_for_type("weight", registry).code
             "kg"
         """
-        return db.query(Unit).filter(
-            Unit.type == unit_type,
-            Unit.is_base == True
-        ).first()
+        return registry.base_unit(unit_type)
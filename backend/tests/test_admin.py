@@ -164,3 +164,27 @@ def test_update_user(client, admin_token, db_session):
     data = response.json()
     assert data["email"] == "new@test.com"
     assert data["is_active"] is False
+
+
+def test_deactivated_user_rejected_immediately(client, admin_token, user_token):
+    """Test that deactivating a user takes effect despite the tenant cache"""
+    # Warm the cached tenant context for the user
+    response = client.get(
+        "/api/auth/me",
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 200
+    user_id = response.json()["id"]
+
+    response = client.patch(
+        f"/api/admin/users/{user_id}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"is_active": False}
+    )
+    assert response.status_code == 200
+
+    response = client.get(
+        "/api/auth/me",
+        headers={"Authorization": f"Bearer {user_token}"}
+    )
+    assert response.status_code == 403
@@ -0,0 +1,58 @@
+"""
+Tests for the catalog snapshot endpoint
+"""
+from decimal import Decimal
+
+from app.models import Unit
+
+
+def test_catalog_snapshot_and_revalidation(client, user_token, store, db_session, query_counter):
+    """Test the catalog payload, 304 revalidation and what changes its ETag"""
+    db_session.add_all([
+        Unit(code="kg", name="Kilogram", type="weight", base_multiplier=Decimal("1"), is_base=True, symbol="kg"),
+        Unit(code="g", name="Gram", type="weight", base_multiplier=Decimal("0.001"), is_base=False, symbol="g"),
+    ])
+    db_session.commit()
+    headers = {"Authorization": f"Bearer {user_token}"}
+    tea_id = client.post(
+        "/api/products", headers=headers, json={"name": "Tea", "price": 2.00, "inventory": 10, "base_unit": "kg"}
+    ).json()["id"]
+    cake_id = client.post(
+        "/api/products", headers=headers, json={"name": "Cake", "price": 3.50, "inventory": 5}
+    ).json()["id"]
+    client.post("/api/combos", headers=headers, json={
+        "name": "Tea & Cake", "total_price": 5.00,
+        "items": [{"product_id": tea_id, "quantity": 1}, {"product_id": cake_id, "quantity": 1}]
+    })
+
+    response = client.get("/api/catalog", headers=headers)
+    assert response.status_code == 200
+    catalog = response.json()
+    assert catalog["version"] == 3
+    assert [(p["name"], Decimal(p["inventory"])) for p in catalog["products"]] == [("Tea", 10), ("Cake", 5)]
+    assert [len(combo["items"]) for combo in catalog["combos"]] == [2]
+    assert [unit["code"] for unit in catalog["units"]] == ["kg"]
+    etag = response.headers["etag"]
+
+    # Unchanged: one query for the version and inventory, no body
+    query_counter.reset()
+    response = client.get("/api/catalog", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert query_counter.count == 1
+
+    # An order moves inventory only: the snapshot is reused, the ETag changes
+    client.post("/api/orders", headers=headers, json={"items": [{"product_id": cake_id, "quantity": 2}]})
+    query_counter.reset()
+    response = client.get("/api/catalog", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert query_counter.count == 1
+    assert Decimal(response.json()["products"][1]["inventory"]) == 3
+    assert response.headers["etag"] != etag
+    etag = response.headers["etag"]
+
+    client.patch(f"/api/products/{tea_id}", headers=headers, json={"name": "Green Tea"})
+    response = client.get("/api/catalog", headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["version"] == 4
+    assert response.json()["products"][0]["name"] == "Green Tea"
@@ -0,0 +1,86 @@
+"""
+Tests for conditional GETs of store-scoped lists
+"""
+from app.models import Order
+from app.services.store_version_service import StoreVersionService
+
+
+def _revalidate(client, url, headers, etag, query_counter):
+    query_counter.reset()
+    response = client.get(url, headers={**headers, "If-None-Match": etag})
+    return response, query_counter.count
+
+
+def test_lists_answer_304_until_their_data_changes(client, user_token, store, query_counter):
+    """Test ETags of the product, combo, customer and today's order lists"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = client.post(
+        "/api/products", headers=headers, json={"name": "Tea", "price": 2.00, "inventory": 10}
+    ).json()["id"]
+    client.post("/api/combos", headers=headers, json={
+        "name": "Two teas", "total_price": 3.50, "items": [{"product_id": product_id, "quantity": 2}]
+    })
+
+    urls = ["/api/products", "/api/combos", "/api/customers", "/api/customers/names", "/api/orders/today"]
+    etags = {}
+    for url in urls:
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('W/"')
+        assert response.headers["cache-control"] == "private, no-cache"
+        etags[url] = response.headers["etag"]
+
+        # The version lookup is the only query; the list is not read
+        response, count = _revalidate(client, url, headers, etags[url], query_counter)
+        assert (response.status_code, response.content, count) == (304, b"", 1)
+        assert response.headers["etag"] == etags[url]
+
+    # Other query parameters are another representation
+    response = client.get("/api/products", headers={**headers, "If-None-Match": etags["/api/products"]},
+                          params={"category": "Drinks"})
+    assert response.status_code == 200
+
+    # An order changes today's orders, customer names and (tracked) inventory,
+    # but not the combos
+    client.post("/api/orders", headers=headers, json={
+        "customer_name": "Ann", "items": [{"product_id": product_id, "quantity": 1}]
+    })
+    for url in urls:
+        response, _ = _revalidate(client, url, headers, etags[url], query_counter)
+        assert response.status_code == (304 if url == "/api/combos" else 200), url
+    assert response.json()[0]["customer_name"] == "Ann"
+
+    etag = client.get("/api/combos", headers=headers).headers["etag"]
+    client.patch(f"/api/products/{product_id}", headers=headers, json={"price": 2.50})
+    response, _ = _revalidate(client, "/api/combos", headers, etag, query_counter)
+    assert response.status_code == 200
+
+
+def test_units_answer_304(client, user_token, db_session):
+    """Test the unit list ETag"""
+    from decimal import Decimal
+    from app.models import Unit
+
+    db_session.add(Unit(code="kg", name="Kilogram", type="weight", base_multiplier=Decimal("1"), is_base=True, symbol="kg"))
+    db_session.commit()
+
+    response = client.get("/api/units")
+    etag = response.headers["etag"]
+    assert client.get("/api/units", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/units", headers={"If-None-Match": etag}, params={"type": "volume"}).status_code == 200
+
+
+def test_failed_version_bump_does_not_fail_a_saved_order(client, user_token, store, db_session, monkeypatch):
+    """Test that an order committed before its version bump failed is reported as created"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = client.post(
+        "/api/products", headers=headers, json={"name": "Tea", "price": 2.00, "inventory": 10}
+    ).json()["id"]
+
+    async def fail(db, store_id, *scopes):
+        raise ConnectionError("database went away")
+    monkeypatch.setattr(StoreVersionService, "bump", fail)
+
+    response = client.post("/api/orders", headers=headers, json={"items": [{"product_id": product_id, "quantity": 1}]})
+    assert response.status_code == 201
+    assert db_session.query(Order).filter_by(id=response.json()["id"]).count() == 1
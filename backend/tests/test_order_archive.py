@@ -0,0 +1,180 @@
+"""
+Tests for archiving cold orders to segment files
+"""
+import asyncio
+import csv
+import io
+from datetime import datetime
+from pathlib import Path
+
+from app.config import settings
+from app.models import Company, Order, OrderArchiveSegment
+from app.services.order_archive_service import OrderArchiveService
+from app.services.sales_rollup_service import SalesRollupService
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def _archive_due():
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            return await OrderArchiveService.archive_due(db)
+    return asyncio.run(run())
+
+
+def _rebuild_rollups():
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            await SalesRollupService.rebuild(db)
+            await db.commit()
+    asyncio.run(run())
+
+
+def _keep_months(client, admin_token, db_session, months):
+    company = db_session.query(Company).one()
+    response = client.patch(
+        f"/api/admin/companies/{company.id}",
+        headers={"Authorization": f"Bearer {admin_token}"},
+        json={"order_retention_months": months}
+    )
+    assert response.json()["order_retention_months"] == months
+
+
+def _create_order(client, headers, product_id, customer_name, created_at, db_session):
+    order_id = client.post("/api/orders", headers=headers, json={
+        "customer_name": customer_name, "items": [{"product_id": product_id, "quantity": 1}]
+    }).json()["id"]
+    if created_at is not None:
+        order = db_session.query(Order).filter_by(id=order_id).one()
+        order.created_at = created_at
+        db_session.commit()
+    return order_id
+
+
+def test_archived_orders_stay_readable(client, admin_token, user_token, store, db_session, tmp_path, monkeypatch):
+    """Test archival of old months and reads falling back to the segments"""
+    monkeypatch.setattr(settings, "ORDER_ARCHIVE_DIR", str(tmp_path))
+    headers = {"Authorization": f"Bearer {user_token}"}
+    _keep_months(client, admin_token, db_session, 3)
+
+    product_id = client.post(
+        "/api/products", headers=headers, json={"name": "Tea", "price": 2.00, "inventory": 100}
+    ).json()["id"]
+    first_id = _create_order(client, headers, product_id, "Ann", datetime(2020, 3, 10, 12, 0), db_session)
+    second_id = _create_order(client, headers, product_id, "Bob", datetime(2020, 3, 20, 12, 0), db_session)
+    hot_id = _create_order(client, headers, product_id, "Ann", None, db_session)
+
+    [segment] = _archive_due()
+    assert (str(segment.month), segment.order_count) == ("2020-03-01", 2)
+    first_path = Path(tmp_path, segment.path)
+    assert first_path.exists()
+    assert db_session.query(Order).filter(Order.id.in_([first_id, second_id])).count() == 0
+
+    # A late order of an archived month is merged into a new version of its segment
+    third_id = _create_order(client, headers, product_id, "Cy", datetime(2020, 3, 25, 12, 0), db_session)
+    [segment] = _archive_due()
+    assert segment.order_count == 3
+    assert Path(tmp_path, segment.path).exists() and not first_path.exists()
+    assert db_session.query(OrderArchiveSegment).count() == 1
+    assert _archive_due() == []
+
+    response = client.get(f"/api/orders/{first_id}", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["customer_name"] == "Ann"
+    assert response.json()["items"][0]["product_name"] == "Tea"
+
+    # Archived orders follow the hot ones, newest first, in ranges with a first day
+    orders = client.get("/api/orders", headers=headers, params={"date_from": "2020-01-01"}).json()
+    assert [order["id"] for order in orders] == [hot_id, third_id, second_id, first_id]
+    orders = client.get("/api/orders", headers=headers, params={"date_from": "2020-01-01", "customer": "ann"}).json()
+    assert [order["id"] for order in orders] == [hot_id, first_id]
+    orders = client.get("/api/orders", headers=headers).json()
+    assert [order["id"] for order in orders] == [hot_id]
+    orders = client.get("/api/orders", headers=headers, params={"date_from": "2020-03-15", "date_to": "2020-03-31"}).json()
+    assert [order["id"] for order in orders] == [third_id, second_id]
+
+    page = client.get("/api/orders", headers=headers, params={"limit": 2}).json()
+    assert [order["id"] for order in page["orders"]] == [hot_id, third_id]
+    page = client.get("/api/orders", headers=headers, params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [order["id"] for order in page["orders"]] == [second_id, first_id]
+    assert page["next_cursor"] is None
+
+    # Archived orders are read-only
+    response = client.patch(f"/api/orders/{first_id}", headers=headers, json={"is_paid": True})
+    assert response.status_code == 404
+
+    response = client.get("/api/orders/export", headers=headers)
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["order_id"] for row in rows] == [first_id, second_id, third_id, hot_id]
+    response = client.get("/api/orders/export", headers=headers, params={"format": "ndjson", "to": "2020-03-15"})
+    assert response.text.count("\n") == 1 and first_id in response.text
+
+
+def test_order_pages_read_only_the_segments_they_need(client, admin_token, user_token, store, db_session, tmp_path, monkeypatch):
+    """Test that a page of archived orders reads segments from the cursor's month back, until it is full"""
+    monkeypatch.setattr(settings, "ORDER_ARCHIVE_DIR", str(tmp_path))
+    headers = {"Authorization": f"Bearer {user_token}"}
+    _keep_months(client, admin_token, db_session, 3)
+
+    product_id = client.post(
+        "/api/products", headers=headers, json={"name": "Tea", "price": 2.00, "inventory": 100}
+    ).json()["id"]
+    march_id = _create_order(client, headers, product_id, "Ann", datetime(2020, 3, 10, 12, 0), db_session)
+    april_ids = [
+        _create_order(client, headers, product_id, "Bob", datetime(2020, 4, day, 12, 0), db_session)
+        for day in (10, 20)
+    ]
+    may_id = _create_order(client, headers, product_id, "Cy", datetime(2020, 5, 10, 12, 0), db_session)
+    segments = {str(segment.month): segment.path for segment in _archive_due()}
+    assert sorted(segments) == ["2020-03-01", "2020-04-01", "2020-05-01"]
+
+    read = []
+    read_records = OrderArchiveService.read_records
+
+    async def counting_read_records(segment):
+        read.append(segment.path)
+        return await read_records(segment)
+
+    monkeypatch.setattr(OrderArchiveService, "read_records", counting_read_records)
+
+    page = client.get("/api/orders", headers=headers, params={"limit": 1}).json()
+    assert [order["id"] for order in page["orders"]] == [may_id]
+    # One order past the page tells whether there is a next one
+    assert read == [segments["2020-05-01"], segments["2020-04-01"]]
+
+    read.clear()
+    page = client.get("/api/orders", headers=headers, params={"limit": 1, "cursor": page["next_cursor"]}).json()
+    assert [order["id"] for order in page["orders"]] == [april_ids[1]]
+    # From the cursor's month back: nothing newer
+    assert read == [segments["2020-05-01"], segments["2020-04-01"]]
+
+    read.clear()
+    page = client.get("/api/orders", headers=headers, params={"limit": 2, "cursor": page["next_cursor"]}).json()
+    assert [order["id"] for order in page["orders"]] == [april_ids[0], march_id]
+    assert read == [segments["2020-04-01"], segments["2020-03-01"]]
+    assert page["next_cursor"] is None
+
+    # Without a page or a first day the archive is not read at all
+    read.clear()
+    assert client.get("/api/orders", headers=headers).json() == []
+    assert read == []
+
+
+def test_daily_report_of_an_archived_day(client, admin_token, user_token, store, db_session, tmp_path, monkeypatch):
+    """Test that the daily report of an archived day is read from the rollups"""
+    monkeypatch.setattr(settings, "ORDER_ARCHIVE_DIR", str(tmp_path))
+    headers = {"Authorization": f"Bearer {user_token}"}
+    _keep_months(client, admin_token, db_session, 3)
+    product_id = client.post(
+        "/api/products", headers=headers, json={"name": "Tea", "price": 2.00, "inventory": 100}
+    ).json()["id"]
+    _create_order(client, headers, product_id, "Ann", datetime(2020, 3, 10, 12, 0), db_session)
+    _create_order(client, headers, product_id, "Bob", datetime(2020, 3, 10, 13, 0), db_session)
+    _rebuild_rollups()  # The orders were moved to March behind the API's back
+    assert len(_archive_due()) == 1
+
+    response = client.get("/api/reports/daily", headers=headers, params={"date": "2020-03-10", "include_text": True})
+    assert response.status_code == 200
+    report = response.json()
+    assert (report["order_count"], report["revenue"], report["unpaid_count"]) == (2, "4.00", 2)
+    assert [(p["product_name"], p["quantity"], p["revenue"]) for p in report["products"]] == [("Tea", "2.0000", "4.00")]
+    assert "- Tea: 2 units - $4.00" in report["text"]
@@ -0,0 +1,83 @@
+"""
+Tests for live order events
+"""
+import asyncio
+import json
+from uuid import uuid4
+
+from app.config import settings
+from app.pg_listener import PgListener
+from app.services.order_event_service import MAX_PAYLOAD_BYTES, OrderEventHub, OrderEventService
+from tests.conftest import SQLALCHEMY_DATABASE_URL
+
+
+def test_order_writes_reach_subscribers_of_their_store(client, user_token, store):
+    """Test that committed order writes are pushed to the store's subscribers only"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = client.post(
+        "/api/products", headers=headers, json={"name": "Tea", "price": 2.00, "inventory": 10}
+    ).json()["id"]
+
+    async def run():
+        listener = PgListener(SQLALCHEMY_DATABASE_URL)
+        hub = OrderEventHub(listener)
+        subscription = await hub.subscribe(store["id"])
+        other = await hub.subscribe(uuid4())
+        stream = hub.stream(subscription, heartbeat=0.05)
+        try:
+            assert (await anext(stream)).endswith("event: ready\ndata: {}\n\n")
+
+            def writes():
+                order_id = client.post("/api/orders", headers=headers, json={
+                    "customer_name": "Ann", "items": [{"product_id": product_id, "quantity": 1}]
+                }).json()["id"]
+                # Rolled back: out of stock
+                assert client.post("/api/orders", headers=headers, json={
+                    "items": [{"product_id": product_id, "quantity": 100}]
+                }).status_code == 400
+                client.patch(f"/api/orders/{order_id}", headers=headers, json={"is_paid": True})
+                client.patch(f"/api/orders/{order_id}", headers=headers, json={"customer_name": "Anne"})
+                client.delete(f"/api/orders/{order_id}", headers=headers)
+                return order_id
+
+            order_id = await asyncio.to_thread(writes)
+            events = []
+            while len(events) < 4:
+                chunk = await asyncio.wait_for(anext(stream), 5)
+                if chunk.startswith("event: "):
+                    name, data = chunk.split("\n")[:2]
+                    events.append((name.removeprefix("event: "), json.loads(data.removeprefix("data: "))["orders"]))
+            assert other.queue.empty()
+        finally:
+            await stream.aclose()
+            await listener.stop()
+        return order_id, events
+
+    order_id, events = asyncio.run(run())
+    assert [name for name, _ in events] == ["order.created", "order.paid", "order.edited", "order.deleted"]
+    created = events[0][1][0]
+    assert (created["id"], created["customer_name"], created["total"], created["is_paid"]) == (order_id, "Ann", "2.00", False)
+    assert events[1][1][0]["is_paid"] is True
+    assert events[2][1][0]["customer_name"] == "Anne"
+    assert events[3][1] == [{"id": order_id}]
+
+
+def test_large_events_are_split_under_the_notify_limit():
+    """Test that events for many orders are split into payloads NOTIFY accepts"""
+    orders = [{"id": str(uuid4()), "is_paid": True} for _ in range(500)]
+    payloads = OrderEventService.payloads(uuid4(), "paid", orders)
+    assert len(payloads) > 1
+    assert all(len(payload.encode()) <= MAX_PAYLOAD_BYTES for payload in payloads)
+    assert [order for payload in payloads for order in json.loads(payload)["orders"]] == orders
+
+
+def test_order_events_refused_behind_a_transaction_pooler(client, user_token, store, monkeypatch):
+    """Test that without a direct LISTEN connection subscribers get 503, not a silent stream"""
+    monkeypatch.setattr(settings, "DATABASE_PGBOUNCER", True)
+    monkeypatch.setattr(settings, "LISTEN_DATABASE_URL", None)
+    assert settings.listen_dsn is None
+    response = client.get("/api/orders/events", headers={"Authorization": f"Bearer {user_token}"})
+    assert response.status_code == 503
+
+    monkeypatch.setattr(settings, "LISTEN_DATABASE_URL", "postgresql+asyncpg://user:pass@db:5432/quickstore")
+    assert settings.listen_dsn == "postgresql://user:pass@db:5432/quickstore"
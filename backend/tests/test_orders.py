@@ -2,7 +2,13 @@
 Tests for order CRUD operations and inventory management
 """
 import pytest
+from concurrent.futures import ThreadPoolExecutor
 from datetime import date
+from decimal import Decimal
+from uuid import uuid4
+from fastapi.testclient import TestClient
+
+from app.main import app
 
 
 def test_create_order(client, user_token, store):
@@ -113,6 +119,106 @@ def test_list_orders(client, user_token, store):
     assert len(data) == 3
 
 
+def test_list_orders_keyset_pages(client, user_token, store, db_session):
+    """Test walking orders page by page with limit and next_cursor"""
+    from app.models import Order
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Paged Product", "price": 1.00, "inventory": 100}
+    ).json()["id"]
+
+    for i in range(5):
+        client.post(
+            "/api/orders",
+            headers=headers,
+            json={
+                "customer_name": f"Customer {i}",
+                "is_paid": i % 2 == 0,
+                "items": [{"product_id": product_id, "quantity": 1}]
+            }
+        )
+
+    # Two orders sharing a timestamp must still be paged without gaps
+    orders = db_session.query(Order).all()
+    orders[1].created_at = orders[2].created_at
+    db_session.commit()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get("/api/orders", headers=headers, params=params)
+        assert response.status_code == 200
+        page = response.json()
+        assert len(page["orders"]) <= 2
+        seen.extend(page["orders"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert len(seen) == 5
+    assert len({o["id"] for o in seen}) == 5
+    keys = [(o["created_at"], o["id"]) for o in seen]
+    assert keys == sorted(keys, reverse=True)
+
+    # Filters
+    response = client.get("/api/orders", headers=headers, params={"limit": 10, "is_paid": True})
+    assert {o["customer_name"] for o in response.json()["orders"]} == {"Customer 0", "Customer 2", "Customer 4"}
+
+    response = client.get("/api/orders", headers=headers, params={"limit": 10, "customer": "mer 3"})
+    assert [o["customer_name"] for o in response.json()["orders"]] == ["Customer 3"]
+
+    response = client.get("/api/orders", headers=headers, params={"limit": 10, "date_to": "2000-01-01"})
+    assert response.json() == {"orders": [], "next_cursor": None}
+
+    response = client.get("/api/orders", headers=headers, params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+def test_list_orders_date_filter_uses_store_business_day(client, user_token, store, db_session):
+    """Test that date filters follow the store's timezone and day start"""
+    from datetime import datetime
+    from app.models import Order
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Late Product", "price": 1.00, "inventory": 100}
+    ).json()["id"]
+    order_id = client.post(
+        "/api/orders",
+        headers=headers,
+        json={"items": [{"product_id": product_id, "quantity": 1}]}
+    ).json()["id"]
+
+    # 20:00 UTC on Jan 15th is 05:00 on Jan 16th in Tokyo
+    order = db_session.query(Order).filter_by(id=order_id).one()
+    order.created_at = datetime(2026, 1, 15, 20, 0)
+    db_session.commit()
+
+    def ids_on(day):
+        response = client.get("/api/orders", headers=headers, params={"date_filter": day})
+        assert response.status_code == 200
+        return [o["id"] for o in response.json()]
+
+    assert ids_on("2026-01-15") == [order_id]
+
+    client.patch(f"/api/stores/{store['id']}", headers=headers, json={"timezone": "Asia/Tokyo"})
+    assert ids_on("2026-01-15") == []
+    assert ids_on("2026-01-16") == [order_id]
+
+    # With business days starting at 06:00 it is still the night of the 15th
+    client.patch(f"/api/stores/{store['id']}", headers=headers, json={"business_day_start": "06:00"})
+    assert ids_on("2026-01-15") == [order_id]
+    assert ids_on("2026-01-16") == []
+
+
 def test_list_today_orders(client, user_token, store):
     """Test listing today's orders"""
     # Create product
@@ -307,3 +413,640 @@ def test_order_saves_customer_name(client, user_token, store):
     assert response.status_code == 200
     data = response.json()
     assert "Saved Customer" in data
+
+
+def test_parallel_checkouts_never_oversell(client, user_token, store):
+    """Test that parallel checkouts of the last items cannot oversell or lose decrements"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Last Items", "price": 5.00, "inventory": 5}
+    )
+    product_id = product_response.json()["id"]
+
+    def checkout(_):
+        with TestClient(app) as till:
+            return till.post(
+                "/api/orders",
+                headers=headers,
+                json={"items": [{"product_id": product_id, "quantity": 1}]}
+            ).status_code
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        statuses = list(pool.map(checkout, range(20)))
+
+    assert statuses.count(201) == 5
+    assert statuses.count(400) == 15
+
+    p_response = client.get(f"/api/products/{product_id}", headers=headers)
+    assert Decimal(str(p_response.json()["inventory"])) == 0
+
+    orders = client.get("/api/orders", headers=headers).json()
+    assert len(orders) == 5
+
+
+def test_parallel_checkouts_with_opposite_item_order(client, user_token, store):
+    """Test that orders locking the same products in opposite order do not deadlock"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_ids = []
+    for name in ("Apples", "Pears"):
+        response = client.post(
+            "/api/products",
+            headers=headers,
+            json={"name": name, "price": 1.00, "inventory": 100}
+        )
+        product_ids.append(response.json()["id"])
+
+    def checkout(i):
+        ids = product_ids if i % 2 else list(reversed(product_ids))
+        with TestClient(app) as till:
+            return till.post(
+                "/api/orders",
+                headers=headers,
+                json={"items": [{"product_id": pid, "quantity": 1} for pid in ids]}
+            ).status_code
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        statuses = list(pool.map(checkout, range(30)))
+
+    assert statuses == [201] * 30
+    for product_id in product_ids:
+        p_response = client.get(f"/api/products/{product_id}", headers=headers)
+        assert Decimal(str(p_response.json()["inventory"])) == 70
+
+
+def test_create_order_idempotency_key_replays(client, user_token, store, query_counter):
+    """Test that a retried order creation returns the first order and deducts stock once"""
+    headers = {"Authorization": f"Bearer {user_token}", "Idempotency-Key": "till-1-sale-42"}
+    product_response = client.post(
+        "/api/products",
+        headers={"Authorization": f"Bearer {user_token}"},
+        json={"name": "Retried", "price": 2.00, "inventory": 10}
+    )
+    product_id = product_response.json()["id"]
+    body = {"customer_name": "Retry", "items": [{"product_id": product_id, "quantity": 3}]}
+
+    first = client.post("/api/orders", headers=headers, json=body)
+    assert first.status_code == 201
+    assert "Idempotent-Replayed" not in first.headers
+
+    query_counter.reset()
+    retry = client.post("/api/orders", headers=headers, json=body)
+    assert retry.status_code == 201
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert retry.json() == first.json()
+    # Tenant lookup is cached; the replay itself is one statement
+    assert query_counter.count == 1
+
+    # Same key, different request
+    changed = client.post("/api/orders", headers=headers, json={**body, "customer_name": "Other"})
+    assert changed.status_code == 422
+
+    p_response = client.get(f"/api/products/{product_id}", headers={"Authorization": f"Bearer {user_token}"})
+    assert Decimal(str(p_response.json()["inventory"])) == 7
+    orders = client.get("/api/orders", headers={"Authorization": f"Bearer {user_token}"}).json()
+    assert len(orders) == 1
+
+
+def test_create_order_with_client_id_is_idempotent(client, user_token, store):
+    """Test that a client-generated order id is used and makes resending safe"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Client Id", "price": 1.00, "inventory": 5}
+    )
+    product_id = product_response.json()["id"]
+    order_id = str(uuid4())
+    body = {"id": order_id, "items": [{"product_id": product_id, "quantity": 1}]}
+
+    first = client.post("/api/orders", headers=headers, json=body)
+    retry = client.post("/api/orders", headers=headers, json=body)
+    assert first.status_code == 201
+    assert first.json()["id"] == order_id
+    assert retry.status_code == 201
+    assert retry.json()["id"] == order_id
+
+    # The key stays used after the order is deleted
+    assert client.delete(f"/api/orders/{order_id}", headers=headers).status_code == 204
+    assert client.post("/api/orders", headers=headers, json=body).status_code == 409
+
+    p_response = client.get(f"/api/products/{product_id}", headers=headers)
+    assert Decimal(str(p_response.json()["inventory"])) == 5
+
+
+def test_create_order_with_taken_client_id_conflicts(client, user_token, store):
+    """Test that a client id already claimed under another key is reported as a taken id"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Taken Id", "price": 1.00, "inventory": 5}
+    )
+    product_id = product_response.json()["id"]
+    order_id = str(uuid4())
+    body = {"id": order_id, "items": [{"product_id": product_id, "quantity": 1}]}
+    keyed = dict(headers, **{"Idempotency-Key": str(uuid4())})
+    assert client.post("/api/orders", headers=keyed, json=body).status_code == 201
+
+    # Without the header the id itself is the key, which was never used
+    response = client.post("/api/orders", headers=headers, json=body)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Order id already exists"
+
+    batch = client.post("/api/orders/batch", headers=headers, json={"orders": [body]}).json()
+    assert [r["status"] for r in batch["results"]] == ["failed"]
+    assert batch["results"][0]["error"] == "Order id already exists"
+
+    # A reused key still reports the key, even once its order is deleted
+    assert client.delete(f"/api/orders/{order_id}", headers=headers).status_code == 204
+    response = client.post("/api/orders", headers=keyed, json=body)
+    assert response.status_code == 409
+    assert response.json()["detail"] == "Idempotency key has already been used"
+
+    p_response = client.get(f"/api/products/{product_id}", headers=headers)
+    assert Decimal(str(p_response.json()["inventory"])) == 5
+
+
+def test_parallel_retries_create_one_order(client, user_token, store):
+    """Test that concurrent attempts with the same key create a single order"""
+    headers = {"Authorization": f"Bearer {user_token}", "Idempotency-Key": str(uuid4())}
+    product_response = client.post(
+        "/api/products",
+        headers={"Authorization": f"Bearer {user_token}"},
+        json={"name": "Flaky Network", "price": 1.00, "inventory": 100}
+    )
+    product_id = product_response.json()["id"]
+
+    def checkout(_):
+        with TestClient(app) as till:
+            response = till.post(
+                "/api/orders",
+                headers=headers,
+                json={"items": [{"product_id": product_id, "quantity": 1}]}
+            )
+            return response.status_code, response.json()["id"]
+
+    with ThreadPoolExecutor(max_workers=10) as pool:
+        results = list(pool.map(checkout, range(10)))
+
+    assert {status for status, _ in results} == {201}
+    assert len({order_id for _, order_id in results}) == 1
+
+    p_response = client.get(f"/api/products/{product_id}", headers={"Authorization": f"Bearer {user_token}"})
+    assert Decimal(str(p_response.json()["inventory"])) == 99
+
+
+def test_create_orders_batch_reports_per_order_results(client, user_token, store):
+    """Test that a batch upload creates what it can and can be resent safely"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Queued", "price": 2.50, "inventory": 5}
+    )
+    product_id = product_response.json()["id"]
+
+    batch = {"orders": [
+        {"id": str(uuid4()), "customer_name": "Offline A", "items": [{"product_id": product_id, "quantity": 3}]},
+        {"id": str(uuid4()), "items": [{"product_id": str(uuid4()), "quantity": 1}]},
+        # Only 2 left after the first order
+        {"id": str(uuid4()), "items": [{"product_id": product_id, "quantity": 3}]},
+        {"id": str(uuid4()), "customer_name": "Offline B", "is_paid": True,
+         "items": [{"product_id": product_id, "quantity": 2}]},
+    ]}
+
+    response = client.post("/api/orders/batch", headers=headers, json=batch)
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["total"], data["created"], data["replayed"], data["failed"]) == (4, 2, 0, 2)
+    assert [r["status"] for r in data["results"]] == ["created", "failed", "failed", "created"]
+    assert data["results"][0]["order"]["id"] == batch["orders"][0]["id"]
+    assert Decimal(data["results"][0]["order"]["total"]) == Decimal("7.50")
+    assert data["results"][1]["error"] == "One or more products not found"
+    assert data["results"][2]["error"] == "Insufficient inventory for product: Queued"
+    assert data["results"][3]["order"]["is_paid"] is True
+
+    # Resending the interrupted upload does not create or deduct anything twice
+    retry = client.post("/api/orders/batch", headers=headers, json=batch).json()
+    assert [r["status"] for r in retry["results"]] == ["replayed", "failed", "failed", "replayed"]
+    assert retry["results"][3]["order"] == data["results"][3]["order"]
+
+    p_response = client.get(f"/api/products/{product_id}", headers=headers)
+    assert Decimal(str(p_response.json()["inventory"])) == 0
+    assert len(client.get("/api/orders", headers=headers).json()) == 2
+    assert {"Offline A", "Offline B"} <= set(client.get("/api/customers/names", headers=headers).json())
+
+
+def test_create_orders_batch_requires_client_ids(client, user_token, store):
+    """Test that every order of a batch needs a distinct client id"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    item = {"product_id": str(uuid4()), "quantity": 1}
+
+    response = client.post("/api/orders/batch", headers=headers, json={"orders": [{"items": [item]}]})
+    assert response.status_code == 422
+
+    order_id = str(uuid4())
+    response = client.post(
+        "/api/orders/batch",
+        headers=headers,
+        json={"orders": [{"id": order_id, "items": [item]}, {"id": order_id, "items": [item]}]}
+    )
+    assert response.status_code == 422
+
+
+def test_create_orders_batch_statement_count_independent_of_size(client, user_token, store, query_counter):
+    """Test that uploading 20 orders costs as many statements as uploading 2"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_ids = []
+    for i in range(3):
+        response = client.post(
+            "/api/products",
+            headers=headers,
+            json={"name": f"Batch {i}", "price": 1.00, "inventory": 1000}
+        )
+        product_ids.append(response.json()["id"])
+
+    def upload(size):
+        orders = [
+            {
+                "id": str(uuid4()),
+                "customer_name": f"Customer {n}",
+                "items": [{"product_id": pid, "quantity": 1} for pid in product_ids],
+            }
+            for n in range(size)
+        ]
+        query_counter.reset()
+        response = client.post("/api/orders/batch", headers=headers, json={"orders": orders})
+        assert response.status_code == 200
+        assert response.json()["created"] == size
+        return query_counter.count
+
+    assert upload(2) == upload(20)
+
+    p_response = client.get(f"/api/products/{product_ids[0]}", headers=headers)
+    assert Decimal(str(p_response.json()["inventory"])) == 978
+
+
+def _create_export_orders(client, headers, db_session):
+    """Three orders: two lines on Mar 1st, three lines and one line on Mar 2nd"""
+    from datetime import datetime
+    from app.models import Order
+
+    tea_id = client.post("/api/products", headers=headers, json={"name": "Tea", "price": 2.00}).json()["id"]
+    cake_id = client.post("/api/products", headers=headers, json={"name": "Cake, large", "price": 3.50}).json()["id"]
+    bodies = [
+        {"customer_name": "Ann", "items": [{"product_id": tea_id, "quantity": 2}, {"product_id": cake_id, "quantity": 1}]},
+        {"is_paid": True, "items": [
+            {"product_id": tea_id, "quantity": 1},
+            {"product_id": cake_id, "quantity": 2},
+            {"product_id": tea_id, "quantity": 3},
+        ]},
+        {"items": [{"product_id": cake_id, "quantity": 1}]},
+    ]
+    created = [
+        datetime(2026, 3, 1, 9, 0),
+        datetime(2026, 3, 2, 9, 0),
+        datetime(2026, 3, 2, 10, 0),
+    ]
+    order_ids = []
+    for body, created_at in zip(bodies, created):
+        order_id = client.post("/api/orders", headers=headers, json=body).json()["id"]
+        db_session.query(Order).filter_by(id=order_id).one().created_at = created_at
+        order_ids.append(order_id)
+    db_session.commit()
+    return order_ids
+
+
+def test_export_orders_csv_streams_lines(client, user_token, store, db_session, monkeypatch):
+    """Test that the CSV export has one row per line, oldest first, within the range"""
+    import csv
+    import io
+    from app.services.order_export_service import OrderExportService
+
+    monkeypatch.setattr(OrderExportService, "BATCH_SIZE", 2)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    order_ids = _create_export_orders(client, headers, db_session)
+
+    response = client.get("/api/orders/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert "attachment" in response.headers["content-disposition"]
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [row["order_id"] for row in rows] == [order_ids[0]] * 2 + [order_ids[1]] * 3 + [order_ids[2]]
+    assert rows[0]["customer_name"] == "Ann"
+    assert rows[0]["created_at"] == "2026-03-01T09:00:00"
+    assert {row["product_name"] for row in rows} == {"Tea", "Cake, large"}
+    assert sum(Decimal(row["line_total"]) for row in rows) == Decimal("7.50") + Decimal("15.00") + Decimal("3.50")
+
+    response = client.get("/api/orders/export", headers=headers, params={"from": "2026-03-02", "to": "2026-03-02"})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {row["order_id"] for row in rows} == set(order_ids[1:])
+
+    # No matching orders: header only
+    response = client.get("/api/orders/export", headers=headers, params={"from": "2027-01-01"})
+    assert response.text.strip() == "order_id,created_at,customer_name,is_paid,is_edited,order_total,item_id,product_id,product_name,quantity,unit,price,line_total"
+
+
+def test_export_orders_ndjson_groups_lines_by_order(client, user_token, store, db_session, monkeypatch):
+    """Test that NDJSON has one order per line even when its lines span batches"""
+    import json
+    from app.services.order_export_service import OrderExportService
+
+    monkeypatch.setattr(OrderExportService, "BATCH_SIZE", 2)
+    headers = {"Authorization": f"Bearer {user_token}"}
+    order_ids = _create_export_orders(client, headers, db_session)
+
+    response = client.get("/api/orders/export", headers=headers, params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    orders = [json.loads(line) for line in response.text.splitlines()]
+    assert [order["id"] for order in orders] == order_ids
+    assert [len(order["items"]) for order in orders] == [2, 3, 1]
+    assert orders[1]["is_paid"] is True
+    assert Decimal(orders[1]["total"]) == Decimal("15.00")
+
+    assert client.get("/api/orders/export", headers=headers, params={"format": "xlsx"}).status_code == 422
+
+
+def _seed_weight_units(db_session):
+    from app.models import Unit
+
+    db_session.add_all([
+        Unit(code="kg", name="Kilogram", type="weight", base_multiplier=Decimal("1"), is_base=True, symbol="kg"),
+        Unit(code="g", name="Gram", type="weight", base_multiplier=Decimal("0.001"), is_base=False, symbol="g"),
+    ])
+    db_session.commit()
+
+
+def test_create_order_statement_count_independent_of_lines(client, user_token, store, db_session, query_counter):
+    """Test that checkout runs the same number of statements for 1 or 10 lines"""
+    _seed_weight_units(db_session)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    product_ids = []
+    for i in range(10):
+        response = client.post(
+            "/api/products",
+            headers=headers,
+            json={"name": f"Bulk {i}", "price": 2.00, "inventory": 100, "base_unit": "kg"}
+        )
+        product_ids.append(response.json()["id"])
+
+    def checkout(ids):
+        query_counter.reset()
+        response = client.post(
+            "/api/orders",
+            headers=headers,
+            json={
+                "customer_name": "Counter",
+                "items": [{"product_id": pid, "quantity": 500, "unit": "g"} for pid in ids]
+            }
+        )
+        assert response.status_code == 201
+        return query_counter.count, response.json()
+
+    single_count, _ = checkout(product_ids[:1])
+    multi_count, data = checkout(product_ids)
+
+    assert single_count == multi_count
+    assert len(data["items"]) == 10
+    assert Decimal(data["items"][0]["quantity_in_base"]) == Decimal("0.5")
+    assert Decimal(data["total"]) == Decimal("10000.00")
+
+    p_response = client.get(f"/api/products/{product_ids[-1]}", headers=headers)
+    assert Decimal(str(p_response.json()["inventory"])) == Decimal("99.5")
+
+
+def test_checkout_issues_no_unit_queries(client, user_token, store, db_session, query_counter):
+    """Test that unit validation and conversion at checkout use the in-memory registry"""
+    _seed_weight_units(db_session)
+    headers = {"Authorization": f"Bearer {user_token}"}
+
+    response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Flour", "price": 3.00, "inventory": 10, "base_unit": "kg"}
+    )
+    product_id = response.json()["id"]
+
+    query_counter.reset()
+    response = client.post(
+        "/api/orders",
+        headers=headers,
+        json={"items": [{"product_id": product_id, "quantity": 250, "unit": "g"}]}
+    )
+
+    assert response.status_code == 201
+    assert Decimal(response.json()["items"][0]["quantity_in_base"]) == Decimal("0.25")
+    assert not [s for s in query_counter.statements if "quick_store__units" in s]
+
+
+@pytest.mark.parametrize("path", [
+    "/api/orders",
+    "/api/orders?limit=50",
+    "/api/orders?is_paid=false&date_from=2000-01-01",
+    "/api/orders/today",
+])
+def test_order_list_query_count_independent_of_result_size(client, user_token, store, query_counter, path):
+    """Regression guard: listing orders must not issue a query per order"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Guard Product", "price": 1.00, "inventory": 1000}
+    ).json()["id"]
+
+    def create_orders(n):
+        for _ in range(n):
+            client.post(
+                "/api/orders",
+                headers=headers,
+                json={"items": [{"product_id": product_id, "quantity": 1}, {"product_id": product_id, "quantity": 2}]}
+            )
+
+    def count_list_queries(expected):
+        query_counter.reset()
+        response = client.get(path, headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        orders = data["orders"] if isinstance(data, dict) else data
+        assert len(orders) == expected
+        assert all(len(o["items"]) == 2 for o in orders)
+        return query_counter.count
+
+    create_orders(1)
+    small = count_list_queries(1)
+    create_orders(9)
+    large = count_list_queries(10)
+
+    assert small == large
+
+
+def test_bulk_update_payment(client, user_token, store, query_counter):
+    """Test bulk payment by ids and by customer/date filter, in one statement"""
+    from uuid import uuid4
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Tab Product", "price": 1.00, "inventory": 1000}
+    ).json()["id"]
+
+    order_ids = []
+    for i in range(6):
+        order_ids.append(client.post(
+            "/api/orders",
+            headers=headers,
+            json={
+                "customer_name": "Alice" if i < 4 else "Bob",
+                "items": [{"product_id": product_id, "quantity": 1}]
+            }
+        ).json()["id"])
+
+    def bulk(payload):
+        query_counter.reset()
+        response = client.post("/api/orders/bulk/update-payment", headers=headers, json=payload)
+        return response, query_counter.count
+
+    # By ids: unknown ids are reported, the rest are updated
+    missing = str(uuid4())
+    response, one_id_count = bulk({"order_ids": [order_ids[0]], "is_paid": True})
+    assert response.json()["successful"] == 1
+    response, many_ids_count = bulk({"order_ids": order_ids[1:3] + [missing], "is_paid": True})
+    data = response.json()
+    assert (data["total"], data["successful"], data["failed"]) == (3, 2, 1)
+    assert [r["success"] for r in data["results"]] == [True, True, False]
+    assert one_id_count == many_ids_count
+
+    # By customer: only Alice's remaining unpaid order
+    response, _ = bulk({"customer_name": "Alice", "is_paid": True})
+    assert [r["order_id"] for r in response.json()["results"]] == [order_ids[3]]
+
+    # By business day: Bob's two orders
+    today = client.get("/api/sessions/today", headers=headers).json()["date"]
+    response, _ = bulk({"date": today, "is_paid": True})
+    assert sorted(r["order_id"] for r in response.json()["results"]) == sorted(order_ids[4:])
+
+    orders = client.get("/api/orders", headers=headers).json()
+    assert all(o["is_paid"] for o in orders)
+
+    # Exactly one selection mode
+    assert bulk({"is_paid": True})[0].status_code == 422
+    assert bulk({"order_ids": order_ids, "customer_name": "Alice", "is_paid": True})[0].status_code == 422
+
+
+def test_update_order_writes_only_changed_lines(client, user_token, store, query_counter):
+    """Test that editing one line costs the same whatever the order size"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_ids = [
+        client.post(
+            "/api/products",
+            headers=headers,
+            json={"name": f"Edit {i}", "price": 2.00, "inventory": 100}
+        ).json()["id"]
+        for i in range(21)
+    ]
+
+    def edit_one_line(size):
+        lines = [{"product_id": pid, "quantity": 1} for pid in product_ids[:size]]
+        order = client.post("/api/orders", headers=headers, json={"items": lines}).json()
+
+        # Change the first line, drop the second, add a new product
+        lines[0]["quantity"] = 3
+        del lines[1]
+        lines.append({"product_id": product_ids[20], "quantity": 2})
+
+        query_counter.reset()
+        response = client.patch(f"/api/orders/{order['id']}", headers=headers, json={"items": lines})
+        assert response.status_code == 200
+        item_writes = [
+            s for s in query_counter.statements
+            if "quick_store__order_items" in s and not s.lstrip().startswith("SELECT")
+        ]
+        return response.json(), order, query_counter.count, item_writes
+
+    small, _, small_count, small_writes = edit_one_line(3)
+    large, large_before, large_count, large_writes = edit_one_line(15)
+
+    assert small_count == large_count
+    assert len(small_writes) == len(large_writes) == 3  # one UPDATE, DELETE and INSERT
+
+    assert len(large["items"]) == 15
+    assert Decimal(large["total"]) == Decimal("36.00")
+    kept_ids = {i["id"] for i in large_before["items"]} & {i["id"] for i in large["items"]}
+    assert len(kept_ids) == 14
+
+    # Inventory: first product sold 1 + 3 and 1 + 1, second restored, new one sold 2 + 2
+    inventory = {
+        pid: Decimal(client.get(f"/api/products/{pid}", headers=headers).json()["inventory"])
+        for pid in (product_ids[0], product_ids[1], product_ids[20])
+    }
+    assert inventory[product_ids[0]] == Decimal("94")
+    assert inventory[product_ids[1]] == Decimal("100")
+    assert inventory[product_ids[20]] == Decimal("96")
+
+    # Sending the same lines again changes nothing
+    unchanged = [{"product_id": i["product_id"], "quantity": i["quantity"]} for i in large["items"]]
+    response = client.patch(f"/api/orders/{large['id']}", headers=headers, json={"items": unchanged})
+    assert response.json()["total"] == large["total"]
+
+
+def test_order_history_diffs_and_versions(client, user_token, store):
+    """Test that edits are stored as diffs and past versions can be rebuilt"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    tea, cake = [
+        client.post("/api/products", headers=headers, json={"name": name, "price": price, "inventory": 100}).json()["id"]
+        for name, price in (("Tea", 2.00), ("Cake", 5.00))
+    ]
+    order = client.post(
+        "/api/orders",
+        headers=headers,
+        json={"customer_name": "Ann", "items": [{"product_id": tea, "quantity": 1}]}
+    ).json()
+
+    edits = [
+        {"customer_name": "Anne"},
+        {"items": [{"product_id": tea, "quantity": 3}]},
+        {"items": [{"product_id": tea, "quantity": 3}, {"product_id": cake, "quantity": 1}]},
+        {"is_paid": True},  # payment only: not a content edit
+    ]
+    for edit in edits:
+        assert client.patch(f"/api/orders/{order['id']}", headers=headers, json=edit).status_code == 200
+
+    # Newest first, paginated
+    response = client.get(f"/api/orders/{order['id']}/history", headers=headers, params={"limit": 2})
+    page = response.json()
+    assert [e["version"] for e in page["entries"]] == [3, 2]
+    older = client.get(
+        f"/api/orders/{order['id']}/history",
+        headers=headers,
+        params={"limit": 2, "cursor": page["next_cursor"]}
+    ).json()
+    assert [e["version"] for e in older["entries"]] == [1]
+    assert older["next_cursor"] is None
+
+    # Each entry only holds what its edit changed
+    first, second, third = older["entries"][0], page["entries"][1], page["entries"][0]
+    assert first["changes"] == {"fields": {"customer_name": {"from": "Ann", "to": "Anne"}}}
+    assert list(second["changes"]["items"]) == ["changed"]
+    assert second["changes"]["items"]["changed"][0]["quantity"]["to"] == "3.0000"
+    assert [i["product_name"] for i in third["changes"]["items"]["added"]] == ["Cake"]
+
+    def version(n):
+        response = client.get(f"/api/orders/{order['id']}/history/{n}", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        return data["customer_name"], Decimal(data["total"]), sorted(
+            (i["product_name"], Decimal(i["quantity"])) for i in data["items"]
+        )
+
+    assert version(0) == ("Ann", Decimal("2.00"), [("Tea", Decimal("1"))])
+    assert version(1) == ("Anne", Decimal("2.00"), [("Tea", Decimal("1"))])
+    assert version(2) == ("Anne", Decimal("6.00"), [("Tea", Decimal("3"))])
+    assert version(3) == ("Anne", Decimal("11.00"), [("Cake", Decimal("1")), ("Tea", Decimal("3"))])
+    assert client.get(f"/api/orders/{order['id']}/history/4", headers=headers).status_code == 404
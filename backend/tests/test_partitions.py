@@ -0,0 +1,79 @@
+"""
+Tests for monthly order partitions
+"""
+import asyncio
+from datetime import date, datetime
+
+from sqlalchemy import text
+
+from app.models import Order
+from app.services.partition_service import PartitionService
+from tests.conftest import TestingAsyncSessionLocal
+
+
+def _ensure_partitions(**kwargs):
+    async def run():
+        async with TestingAsyncSessionLocal() as db:
+            created = await PartitionService.ensure_partitions(db, **kwargs)
+            await db.commit()
+            return created
+    return asyncio.run(run())
+
+
+def _partition_of(db_session, table, where, order_id):
+    name = db_session.execute(
+        text(f"SELECT DISTINCT tableoid::regclass::text FROM {table} WHERE {where} = :id"), {"id": order_id}
+    ).scalar_one()
+    db_session.commit()  # Partition DDL waits for open transactions on the table
+    return name
+
+
+def test_orders_and_items_move_into_monthly_partitions(client, user_token, store, db_session):
+    """Test partition creation, row placement and pruning of time-bounded queries"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = client.post(
+        "/api/products", headers=headers, json={"name": "Tea", "price": 2.00, "inventory": 100}
+    ).json()["id"]
+    order_id = client.post("/api/orders", headers=headers, json={
+        "items": [{"product_id": product_id, "quantity": 1}]
+    }).json()["id"]
+
+    # Rows of a month without a partition wait in the default partition
+    order = db_session.query(Order).filter_by(id=order_id).one()
+    order.created_at = datetime(2031, 7, 10, 12, 0)
+    db_session.commit()
+    assert _partition_of(db_session, "quick_store__orders", "id", order_id) == "quick_store__orders_default"
+
+    try:
+        # July already has rows in the default partition, so only June is created
+        created = _ensure_partitions(months_ahead=1, today=date(2031, 6, 20))
+        assert created == ["quick_store__orders_p203106", "quick_store__order_items_p203106"]
+        assert _ensure_partitions(months_ahead=1, today=date(2031, 6, 20)) == []
+
+        # The items follow their order (ON UPDATE CASCADE)
+        order.created_at = datetime(2031, 6, 15, 12, 0)
+        db_session.commit()
+        assert _partition_of(db_session, "quick_store__orders", "id", order_id) == "quick_store__orders_p203106"
+        assert _partition_of(db_session, "quick_store__order_items", "order_id", order_id) == "quick_store__order_items_p203106"
+
+        plan = "\n".join(db_session.execute(text(
+            "EXPLAIN SELECT * FROM quick_store__orders o JOIN quick_store__order_items i "
+            "ON i.order_id = o.id AND i.order_created_at = o.created_at "
+            "WHERE o.created_at >= '2031-06-15' AND o.created_at < '2031-06-16' "
+            "AND i.order_created_at >= '2031-06-15' AND i.order_created_at < '2031-06-16'"
+        )).scalars())
+        assert "quick_store__orders_p203106" in plan and "quick_store__order_items_p203106" in plan
+        assert "_default" not in plan
+
+        response = client.get(f"/api/orders/{order_id}", headers=headers)
+        assert response.status_code == 200
+        assert len(response.json()["items"]) == 1
+    finally:
+        db_session.rollback()
+        db_session.execute(text("DELETE FROM quick_store__orders WHERE created_at >= '2031-06-01'"))
+        db_session.execute(text("DROP TABLE IF EXISTS quick_store__order_items_p203106"))
+        if db_session.execute(text("SELECT to_regclass('quick_store__orders_p203106')")).scalar() is not None:
+            # A partition other tables reference must be detached before it is dropped
+            db_session.execute(text("ALTER TABLE quick_store__orders DETACH PARTITION quick_store__orders_p203106"))
+            db_session.execute(text("DROP TABLE quick_store__orders_p203106"))
+        db_session.commit()
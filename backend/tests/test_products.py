@@ -176,3 +176,51 @@ def test_update_product_inventory_validation(client, user_token, db_session):
     # This test would need to be run with a user assigned to the no-inventory company
     # For simplicity, we'll skip the full setup here
     pass
+
+
+def test_store_scoped_request_resolves_tenant_in_one_query(client, user_token, store, query_counter):
+    """Test that user, company and store are resolved with a single SELECT"""
+    from app.dependencies import tenant_cache
+
+    tenant_cache.clear()
+    query_counter.reset()
+    response = client.get(
+        "/api/products",
+        headers={"Authorization": f"Bearer {user_token}", "X-Store-ID": store["id"]}
+    )
+    assert response.status_code == 200
+    # One tenant lookup, the list version (for its ETag) and the product list itself
+    assert query_counter.count == 3
+
+    # A repeated request is served from the tenant cache
+    query_counter.reset()
+    client.get(
+        "/api/products",
+        headers={"Authorization": f"Bearer {user_token}", "X-Store-ID": store["id"]}
+    )
+    assert query_counter.count == 2
+
+
+def test_new_unit_usable_after_registry_refresh(client, admin_token, user_token, store, db_session):
+    """Test that units added to the database are picked up by POST /api/units/refresh"""
+    from app.models import Unit
+
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product = {"name": "Rope", "price": 1.00, "base_unit": "m"}
+
+    # Loads the (empty) unit registry
+    response = client.post("/api/products", headers=headers, json=product)
+    assert response.status_code == 400
+
+    db_session.add(Unit(code="m", name="Meter", type="length", base_multiplier=1, is_base=True, symbol="m"))
+    db_session.commit()
+
+    response = client.post("/api/units/refresh", headers=headers)
+    assert response.status_code == 403
+
+    response = client.post("/api/units/refresh", headers={"Authorization": f"Bearer {admin_token}"})
+    assert response.status_code == 200
+    assert [u["code"] for u in response.json()] == ["m"]
+
+    response = client.post("/api/products", headers=headers, json=product)
+    assert response.status_code == 201
@@ -0,0 +1,210 @@
+"""
+Tests for aggregated sales reports
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from decimal import Decimal
+
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app.main import app
+from app.models import DailyProductSales, Order, Store
+from app.services.business_day_service import BusinessDayService
+from app.services.sales_rollup_service import rollup_lock_sql
+
+
+def _create_product(client, headers, name, price):
+    response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": name, "price": price, "inventory": 100}
+    )
+    return response.json()["id"]
+
+
+def test_daily_report_aggregates_orders(client, user_token, store, query_counter):
+    """Test revenue, paid/unpaid split and per-product sales of a day"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    tea_id = _create_product(client, headers, "Tea", 2.00)
+    cake_id = _create_product(client, headers, "Cake", 3.50)
+
+    client.post("/api/orders", headers=headers, json={
+        "customer_name": "Ann", "is_paid": True,
+        "items": [{"product_id": tea_id, "quantity": 2}, {"product_id": cake_id, "quantity": 1}]
+    })
+    client.post("/api/orders", headers=headers, json={
+        "items": [{"product_id": tea_id, "quantity": 1}]
+    })
+    edited_id = client.post("/api/orders", headers=headers, json={
+        "items": [{"product_id": cake_id, "quantity": 1}]
+    }).json()["id"]
+    client.patch(f"/api/orders/{edited_id}", headers=headers, json={
+        "items": [{"product_id": cake_id, "quantity": 2}]
+    })
+
+    query_counter.reset()
+    response = client.get("/api/reports/daily", headers=headers, params={"include_text": True})
+    assert response.status_code == 200
+    # Tenant lookup is cached; the report is two aggregate queries
+    assert query_counter.count == 2
+
+    report = response.json()
+    assert report["order_count"] == 3
+    assert Decimal(report["revenue"]) == Decimal("16.50")
+    assert (report["paid_count"], Decimal(report["paid_revenue"])) == (1, Decimal("7.50"))
+    assert (report["unpaid_count"], Decimal(report["unpaid_revenue"])) == (2, Decimal("9.00"))
+    assert report["edited_count"] == 1
+    assert [(p["product_name"], Decimal(p["quantity"]), Decimal(p["revenue"])) for p in report["products"]] == [
+        ("Cake", Decimal(3), Decimal("10.50")),
+        ("Tea", Decimal(3), Decimal("6.00")),
+    ]
+
+    text = report["text"]
+    assert text.startswith("Store: Test Store\nDate: ")
+    assert "Orders: 3\n\nItems Sold:\n- Cake: 3 units - $10.50\n- Tea: 3 units - $6.00\n" in text
+    assert "Total Revenue: $16.50" in text
+    assert "Unpaid: 2 orders - $9.00" in text
+    assert "Some orders were edited" in text
+
+
+def test_daily_report_selects_business_day(client, user_token, store, db_session):
+    """Test that the date parameter selects the store's business day"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    tea_id = _create_product(client, headers, "Tea", 2.00)
+    order_id = client.post("/api/orders", headers=headers, json={
+        "items": [{"product_id": tea_id, "quantity": 1}]
+    }).json()["id"]
+
+    order = db_session.query(Order).filter_by(id=order_id).one()
+    order.created_at = datetime(2026, 3, 1, 12, 0)
+    db_session.commit()
+
+    report = client.get("/api/reports/daily", headers=headers, params={"date": "2026-03-01"}).json()
+    assert report["order_count"] == 1
+    assert report["text"] is None
+
+    empty = client.get(
+        "/api/reports/daily", headers=headers, params={"date": "2026-03-02", "include_text": True}
+    ).json()
+    assert empty["order_count"] == 0
+    assert Decimal(empty["revenue"]) == 0
+    assert empty["products"] == []
+    assert empty["text"] == "Store: Test Store\nDate: Mar 2, 2026\n\nNo orders for this date."
+
+
+def _range_report(client, headers, first, last):
+    return client.get("/api/reports/range", headers=headers, params={"from": str(first), "to": str(last)})
+
+
+def test_sales_rollup_follows_order_writes(client, user_token, store, db_session, query_counter):
+    """Test that the rollups match the orders after every kind of order write"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    tea_id = _create_product(client, headers, "Tea", 2.00)
+    cake_id = _create_product(client, headers, "Cake", 3.50)
+
+    client.post("/api/orders", headers=headers, json={
+        "customer_name": "Ann", "is_paid": True,
+        "items": [{"product_id": tea_id, "quantity": 2}, {"product_id": cake_id, "quantity": 1}]
+    })
+    unpaid_id = client.post("/api/orders", headers=headers, json={
+        "items": [{"product_id": tea_id, "quantity": 1}]
+    }).json()["id"]
+    edited_id = client.post("/api/orders", headers=headers, json={
+        "items": [{"product_id": cake_id, "quantity": 1}]
+    }).json()["id"]
+    deleted_id = client.post("/api/orders", headers=headers, json={
+        "items": [{"product_id": tea_id, "quantity": 5}]
+    }).json()["id"]
+    client.patch(f"/api/orders/{edited_id}", headers=headers, json={
+        "items": [{"product_id": cake_id, "quantity": 2}, {"product_id": tea_id, "quantity": 1}]
+    })
+    client.post("/api/orders/bulk/update-payment", headers=headers, json={
+        "order_ids": [unpaid_id, edited_id], "is_paid": True
+    })
+    client.delete(f"/api/orders/{deleted_id}", headers=headers)
+    client.delete(f"/api/products/{cake_id}", headers=headers)
+
+    today = datetime.utcnow().date()
+    live = client.get("/api/reports/daily", headers=headers).json()
+
+    query_counter.reset()
+    response = _range_report(client, headers, today, today)
+    assert response.status_code == 200
+    # Days and products read from the rollups, never from the orders
+    assert query_counter.count == 2
+    assert not any("quick_store__orders" in statement for statement in query_counter.statements)
+
+    report = response.json()
+    assert report["date_from"] == report["date_to"] == str(today)
+    for field in ("order_count", "paid_count", "unpaid_count", "edited_count"):
+        assert report[field] == live[field]
+    for field in ("revenue", "paid_revenue", "unpaid_revenue"):
+        assert Decimal(report[field]) == Decimal(live[field])
+    assert (report["order_count"], Decimal(report["revenue"]), report["paid_count"]) == (3, Decimal("18.50"), 3)
+    assert [day["date"] for day in report["days"]] == [str(today)]
+
+    products = [(p["product_id"], p["product_name"], Decimal(p["quantity"]), Decimal(p["revenue"])) for p in report["products"]]
+    assert products == [
+        (p["product_id"], p["product_name"], Decimal(p["quantity"]), Decimal(p["revenue"])) for p in live["products"]
+    ]
+    assert [(p["product_id"], p["order_count"]) for p in report["products"]] == [(None, 2), (tea_id, 3)]
+
+    # The deleted product's rows were folded into the product_id NULL row
+    assert db_session.query(DailyProductSales).filter(DailyProductSales.product_id == cake_id).count() == 0
+
+
+def test_sales_rollup_rebuilt_on_business_day_change(client, user_token, store, db_session):
+    """Test that changing the store's timezone recomputes the rollups"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    tea_id = _create_product(client, headers, "Tea", 2.00)
+    order_id = client.post("/api/orders", headers=headers, json={
+        "items": [{"product_id": tea_id, "quantity": 1}]
+    }).json()["id"]
+
+    # Moved behind the API's back: the rollups still count it today
+    order = db_session.query(Order).filter_by(id=order_id).one()
+    order.created_at = datetime(2026, 3, 1, 20, 0)
+    db_session.commit()
+    today = datetime.utcnow().date()
+    assert _range_report(client, headers, today, today).json()["order_count"] == 1
+
+    client.patch(f"/api/stores/{store['id']}", headers=headers, json={"timezone": "Asia/Tokyo"})
+
+    assert _range_report(client, headers, today, today).json()["order_count"] == 0
+    report = _range_report(client, headers, "2026-03-01", "2026-03-02").json()
+    # 20:00 UTC is 05:00 the next day in Tokyo
+    assert [(day["date"], day["order_count"]) for day in report["days"]] == [("2026-03-02", 1)]
+    assert [(p["product_name"], p["order_count"]) for p in report["products"]] == [("Tea", 1)]
+
+    assert _range_report(client, headers, "2026-03-02", "2026-03-01").status_code == 400
+
+
+def test_order_writes_wait_for_a_rollup_rebuild(client, user_token, store, db_session):
+    """Test that an order written during a rebuild is counted on a day of the new settings"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    tea_id = _create_product(client, headers, "Tea", 2.00)
+
+    # A rebuild for a new timezone holds the store's rollup lock until it commits
+    db_session.execute(select(rollup_lock_sql("pg_advisory_xact_lock", Store.id)).where(Store.id == store["id"]))
+    db_session.query(Store).filter_by(id=store["id"]).update({"timezone": "Asia/Tokyo"})
+
+    def checkout():
+        with TestClient(app) as till:
+            return till.post("/api/orders", headers=headers, json={"items": [{"product_id": tea_id, "quantity": 1}]})
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        pending = pool.submit(checkout)
+        time.sleep(0.5)
+        assert not pending.done()
+        db_session.commit()
+        response = pending.result(timeout=10)
+    assert response.status_code == 201
+
+    created_at = datetime.fromisoformat(response.json()["created_at"].rstrip("Z"))
+    day = BusinessDayService.current_day(Store(timezone="Asia/Tokyo"), created_at)
+    report = _range_report(client, headers, day, day).json()
+    assert [(d["date"], d["order_count"]) for d in report["days"]] == [(str(day), 1)]
+    assert [(p["product_name"], p["order_count"]) for p in report["products"]] == [("Tea", 1)]
+
@@ -96,3 +96,74 @@ def test_admin_cannot_access_stores(client, admin_token):
         headers={"Authorization": f"Bearer {admin_token}"}
     )
     assert response.status_code == 403
+
+
+def test_store_update_visible_to_store_scoped_requests(client, user_token, store):
+    """Test that store changes invalidate the cached tenant context"""
+    headers = {"Authorization": f"Bearer {user_token}", "X-Store-ID": store["id"]}
+
+    # Inventory is tracked while the store has track_inventory enabled
+    response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Tracked", "price": 1.00, "inventory": 5}
+    )
+    assert response.json()["inventory"] is not None
+
+    client.patch(
+        f"/api/stores/{store['id']}",
+        headers=headers,
+        json={"track_inventory": False}
+    )
+
+    response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": "Untracked", "price": 1.00, "inventory": 5}
+    )
+    assert response.json()["inventory"] is None
+
+
+def test_store_business_day_settings(client, user_token, store):
+    """Test setting and validating a store's timezone and business day start"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    assert store["timezone"] == "UTC"
+    assert store["business_day_start"] == "00:00:00"
+
+    response = client.patch(
+        f"/api/stores/{store['id']}",
+        headers=headers,
+        json={"timezone": "America/New_York", "business_day_start": "04:00"}
+    )
+    assert response.status_code == 200
+    assert response.json()["timezone"] == "America/New_York"
+    assert response.json()["business_day_start"] == "04:00:00"
+
+    response = client.patch(
+        f"/api/stores/{store['id']}",
+        headers=headers,
+        json={"timezone": "Mars/Olympus_Mons"}
+    )
+    assert response.status_code == 422
+
+
+def test_business_day_boundaries():
+    """Test business days in the store's timezone, starting at its day start"""
+    from datetime import date, datetime, time
+    from app.models import Store
+    from app.services.business_day_service import BusinessDayService
+
+    store = Store(timezone="America/New_York", business_day_start=time(4, 0))
+
+    # 02:30 local on March 2nd still belongs to March 1st
+    assert BusinessDayService.current_day(store, datetime(2026, 3, 2, 7, 30)) == date(2026, 3, 1)
+    assert BusinessDayService.current_day(store, datetime(2026, 3, 2, 9, 30)) == date(2026, 3, 2)
+
+    # Half-open UTC range; the DST switch early on March 8th makes the
+    # business day of March 7th 23 hours long
+    assert BusinessDayService.day_range(store, date(2026, 3, 1)) == (
+        datetime(2026, 3, 1, 9, 0), datetime(2026, 3, 2, 9, 0)
+    )
+    assert BusinessDayService.day_range(store, date(2026, 3, 7)) == (
+        datetime(2026, 3, 7, 9, 0), datetime(2026, 3, 8, 8, 0)
+    )
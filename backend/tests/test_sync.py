@@ -0,0 +1,161 @@
+"""
+Tests for incremental sync
+"""
+from decimal import Decimal
+
+from app.models import Product
+
+
+def _create_product(client, headers, name, price=1.00, inventory=100):
+    response = client.post(
+        "/api/products",
+        headers=headers,
+        json={"name": name, "price": price, "inventory": inventory}
+    )
+    return response.json()["id"]
+
+
+def test_full_sync_returns_whole_store(client, user_token, store):
+    """Test that since=0 returns every row of the store"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = _create_product(client, headers, "Tea")
+    client.post(
+        "/api/combos",
+        headers=headers,
+        json={"name": "Tea Duo", "total_price": 1.50, "items": [{"product_id": product_id, "quantity": 2}]}
+    )
+    client.post(
+        "/api/orders",
+        headers=headers,
+        json={"customer_name": "Ann", "items": [{"product_id": product_id, "quantity": 1}]}
+    )
+
+    response = client.get("/api/sync", headers=headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["full"] is True
+    assert data["cursor"] > 0
+    assert [p["name"] for p in data["products"]] == ["Tea"]
+    assert [c["name"] for c in data["combos"]] == ["Tea Duo"]
+    assert len(data["combos"][0]["items"]) == 1
+    assert len(data["orders"]) == 1
+    assert len(data["orders"][0]["items"]) == 1
+    assert data["customer_names"] == ["Ann"]
+    assert data["deleted"] == {"product": [], "combo": [], "order": []}
+
+
+def test_delta_sync_returns_only_changes_and_deletions(client, user_token, store):
+    """Test that a delta holds changed rows and tombstones, nothing else"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    untouched_id = _create_product(client, headers, "Untouched")
+    sold_id = _create_product(client, headers, "Sold")
+    renamed_id = _create_product(client, headers, "Renamed")
+    combo_id = client.post(
+        "/api/combos",
+        headers=headers,
+        json={"name": "Gone", "total_price": 1.00, "items": [{"product_id": untouched_id, "quantity": 1}]}
+    ).json()["id"]
+    old_order_id = client.post(
+        "/api/orders",
+        headers=headers,
+        json={"customer_name": "Old", "items": [{"product_id": untouched_id, "quantity": 1}]}
+    ).json()["id"]
+    paid_order_id = client.post(
+        "/api/orders",
+        headers=headers,
+        json={"customer_name": "Old", "items": [{"product_id": untouched_id, "quantity": 1}]}
+    ).json()["id"]
+
+    cursor = client.get("/api/sync", headers=headers).json()["cursor"]
+
+    client.patch(f"/api/products/{renamed_id}", headers=headers, json={"name": "New Name"})
+    new_order_id = client.post(
+        "/api/orders",
+        headers=headers,
+        json={"customer_name": "New", "items": [{"product_id": sold_id, "quantity": 2}]}
+    ).json()["id"]
+    client.delete(f"/api/combos/{combo_id}", headers=headers)
+    client.delete(f"/api/orders/{old_order_id}", headers=headers)
+    client.post("/api/orders/bulk/update-payment", headers=headers, json={"order_ids": [paid_order_id], "is_paid": True})
+
+    data = client.get(f"/api/sync?since={cursor}", headers=headers).json()
+    assert data["full"] is False
+    assert data["cursor"] >= cursor
+
+    products = {p["id"]: p for p in data["products"]}
+    # Deleting the old order returned its stock, so Untouched changed too
+    assert set(products) == {sold_id, renamed_id, untouched_id}
+    assert products[renamed_id]["name"] == "New Name"
+    assert Decimal(str(products[sold_id]["inventory"])) == 98
+    assert data["combos"] == []
+    assert {o["id"] for o in data["orders"]} == {new_order_id, paid_order_id}
+    assert data["customer_names"] == ["New"]
+    assert data["deleted"] == {"product": [], "combo": [combo_id], "order": [old_order_id]}
+
+    # Nothing changed since the last sync
+    again = client.get(f"/api/sync?since={data['cursor']}", headers=headers).json()
+    assert again["products"] == again["orders"] == again["combos"] == []
+
+
+def test_deleting_product_resyncs_its_combos(client, user_token, store):
+    """Test that combos losing a line to a product deletion appear in the delta"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    kept_id = _create_product(client, headers, "Kept")
+    deleted_id = _create_product(client, headers, "Deleted")
+    combo_id = client.post(
+        "/api/combos",
+        headers=headers,
+        json={
+            "name": "Pair",
+            "total_price": 1.50,
+            "items": [{"product_id": kept_id, "quantity": 1}, {"product_id": deleted_id, "quantity": 1}]
+        }
+    ).json()["id"]
+
+    cursor = client.get("/api/sync", headers=headers).json()["cursor"]
+    client.delete(f"/api/products/{deleted_id}", headers=headers)
+
+    data = client.get(f"/api/sync?since={cursor}", headers=headers).json()
+    assert data["deleted"]["product"] == [deleted_id]
+    assert [c["id"] for c in data["combos"]] == [combo_id]
+    assert [item["product_id"] for item in data["combos"][0]["items"]] == [kept_id]
+
+
+def test_sync_cursor_does_not_skip_late_commits(client, user_token, store, db_session):
+    """Test that a write committing after a sync is in the next delta"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    _create_product(client, headers, "Early")
+
+    # A transaction that started writing before the sync but commits after it
+    db_session.add(Product(store_id=store["id"], name="Late", price=Decimal("1.00")))
+    db_session.flush()
+
+    first = client.get("/api/sync", headers=headers).json()
+    assert [p["name"] for p in first["products"]] == ["Early"]
+    _create_product(client, headers, "After")
+
+    db_session.commit()
+
+    data = client.get(f"/api/sync?since={first['cursor']}", headers=headers).json()
+    assert {p["name"] for p in data["products"]} == {"Late", "After"}
+
+
+def test_sync_include_limits_sections(client, user_token, store):
+    """Test that include returns only the requested sections"""
+    headers = {"Authorization": f"Bearer {user_token}"}
+    product_id = _create_product(client, headers, "Only Catalog")
+    order_id = client.post(
+        "/api/orders",
+        headers=headers,
+        json={"customer_name": "Skipped", "items": [{"product_id": product_id, "quantity": 1}]}
+    ).json()["id"]
+
+    data = client.get("/api/sync?include=products,combos", headers=headers).json()
+    assert [p["id"] for p in data["products"]] == [product_id]
+    assert data["orders"] == [] and data["customer_names"] == []
+
+    client.delete(f"/api/orders/{order_id}", headers=headers)
+    delta = client.get(f"/api/sync?since={data['cursor']}&include=products", headers=headers).json()
+    assert delta["deleted"]["order"] == []
+
+    assert client.get("/api/sync?include=products,stock", headers=headers).status_code == 400
@@ -9,17 +9,15 @@ from uuid import uuid4
 
 from app.models.unit import Unit
 from app.models.product import Product
+from app.services.unit_registry import UnitRegistry
 from app.services.unit_service import UnitService
 
 
 class TestUnitService:
-    """Test the UnitService utility functions with mocked database"""
+    """Test the UnitService utility functions with an in-memory unit registry"""
 
     def test_convert_kg_to_g(self):
         """Test converting kilograms to grams"""
-        # Mock database session
-        db = Mock()
-
         # Mock units
         kg_unit = Mock(spec=Unit)
         kg_unit.code = "kg"
@@ -33,16 +31,13 @@ class TestUnitService:
         g_unit.base_multiplier = Decimal("0.001")
         g_unit.is_base = False
 
-        # Mock query results
-        db.query.return_value.filter.return_value.first.side_effect = [kg_unit, g_unit]
+        registry = UnitRegistry.from_units([kg_unit, g_unit])
 
-        result = UnitService.convert(Decimal("1.5"), "kg", "g", db)
+        result = UnitService.convert(Decimal("1.5"), "kg", "g", registry)
         assert result == Decimal("1500.0000")
 
     def test_convert_l_to_ml(self):
         """Test converting liters to milliliters"""
-        db = Mock()
-
         # Mock units
         l_unit = Mock(spec=Unit)
         l_unit.code = "L"
@@ -56,70 +51,114 @@ class TestUnitService:
         ml_unit.base_multiplier = Decimal("0.001")
         ml_unit.is_base = False
 
-        db.query.return_value.filter.return_value.first.side_effect = [l_unit, ml_unit]
+        registry = UnitRegistry.from_units([l_unit, ml_unit])
 
-        result = UnitService.convert(Decimal("4.1"), "L", "mL", db)
+        result = UnitService.convert(Decimal("4.1"), "L", "mL", registry)
         assert result == Decimal("4100.0000")
 
     def test_convert_same_unit(self):
         """Test converting a unit to itself"""
-        db = Mock()
-
         kg_unit = Mock(spec=Unit)
         kg_unit.code = "kg"
         kg_unit.type = "weight"
         kg_unit.base_multiplier = Decimal("1.0")
         kg_unit.is_base = True
 
-        db.query.return_value.filter.return_value.first.side_effect = [kg_unit, kg_unit]
+        registry = UnitRegistry.from_units([kg_unit])
 
-        result = UnitService.convert(Decimal("5.0"), "kg", "kg", db)
+        result = UnitService.convert(Decimal("5.0"), "kg", "kg", registry)
         assert result == Decimal("5.0000")
 
     def test_convert_incompatible_units_raises_error(self):
         """Test that converting incompatible units raises ValueError"""
-        db = Mock()
-
         kg_unit = Mock(spec=Unit)
         kg_unit.code = "kg"
         kg_unit.type = "weight"
+        kg_unit.base_multiplier = Decimal("1.0")
 
         l_unit = Mock(spec=Unit)
         l_unit.code = "L"
         l_unit.type = "volume"
+        l_unit.base_multiplier = Decimal("1.0")
 
-        db.query.return_value.filter.return_value.first.side_effect = [kg_unit, l_unit]
+        registry = UnitRegistry.from_units([kg_unit, l_unit])
 
         with pytest.raises(ValueError, match="Cannot convert|incompatible"):
-            UnitService.convert(Decimal("1.5"), "kg", "L", db)
+            UnitService.convert(Decimal("1.5"), "kg", "L", registry)
 
     def test_are_compatible_same_type(self):
         """Test that units of same type are compatible"""
-        db = Mock()
-
         kg_unit = Mock(spec=Unit)
+        kg_unit.code = "kg"
         kg_unit.type = "weight"
+        kg_unit.base_multiplier = Decimal("1.0")
 
         g_unit = Mock(spec=Unit)
+        g_unit.code = "g"
         g_unit.type = "weight"
+        g_unit.base_multiplier = Decimal("0.001")
 
-        db.query.return_value.filter.return_value.first.side_effect = [kg_unit, g_unit]
+        registry = UnitRegistry.from_units([kg_unit, g_unit])
 
-        assert UnitService.are_compatible("kg", "g", db) is True
+        assert UnitService.are_compatible("kg", "g", registry) is True
 
     def test_are_compatible_different_types(self):
         """Test that units of different types are incompatible"""
-        db = Mock()
-
         kg_unit = Mock(spec=Unit)
+        kg_unit.code = "kg"
         kg_unit.type = "weight"
+        kg_unit.base_multiplier = Decimal("1.0")
 
         l_unit = Mock(spec=Unit)
+        l_unit.code = "L"
         l_unit.type = "volume"
+        l_unit.base_multiplier = Decimal("1.0")
 
-        db.query.return_value.filter.return_value.first.side_effect = [kg_unit, l_unit]
+        registry = UnitRegistry.from_units([kg_unit, l_unit])
+
+        assert UnitService.are_compatible("kg", "L", registry) is False
+
+    def test_registry_precomputes_factors_for_compatible_pairs(self):
+        """Test that the registry holds a factor for every same-type pair"""
+        kg_unit = Unit(code="kg", name="Kilogram", type="weight", base_multiplier=Decimal("1.0"), is_base=True, symbol="kg")
+        lbs_unit = Unit(code="lbs", name="Pound", type="weight", base_multiplier=Decimal("0.453592"), is_base=False, symbol="lbs")
+        l_unit = Unit(code="L", name="Liter", type="volume", base_multiplier=Decimal("1.0"), is_base=True, symbol="L")
+
+        registry = UnitRegistry.from_units([kg_unit, lbs_unit, l_unit])
+
+        assert registry.factor("lbs", "kg") == Decimal("0.453592")
+        assert registry.factor("kg", "kg") == Decimal("1")
+        assert registry.factor("kg", "L") is None
+        assert registry.base_unit("weight").code == "kg"
+        assert [u.code for u in registry.units("weight")] == ["kg", "lbs"]
+        # Matches converting through the base unit
+        assert UnitService.convert(Decimal("3"), "kg", "lbs", registry) == Decimal("6.6139")
+
+    def test_convert_many_reports_errors_per_row(self):
+        """Test batch conversion returns a result or an error for every row"""
+        registry = UnitRegistry.from_units([
+            Unit(code="kg", name="Kilogram", type="weight", base_multiplier=Decimal("1.0"), is_base=True, symbol="kg"),
+            Unit(code="g", name="Gram", type="weight", base_multiplier=Decimal("0.001"), is_base=False, symbol="g"),
+            Unit(code="L", name="Liter", type="volume", base_multiplier=Decimal("1.0"), is_base=True, symbol="L"),
+        ])
+
+        results = UnitService.convert_many(
+            [
+                (Decimal("500"), "g", "kg"),
+                (Decimal("1.5"), "kg", "L"),
+                (Decimal("2"), "oz", "kg"),
+                (Decimal("0.33335"), "kg", "kg"),
+            ],
+            registry
+        )
+
+        assert results[0] == (Decimal("0.5000"), None)
+        assert results[1] == (None, "Incompatible units: kg (weight) and L (volume)")
+        assert results[2] == (None, "Source unit not found: oz")
+        assert results[3] == (Decimal("0.3334"), None)
 
-        assert UnitService.are_compatible("kg", "L", db) is False
+        # Same answers as converting one at a time
+        assert results[0][0] == UnitService.convert(Decimal("500"), "g", "kg", registry)
 
     def test_validate_quantity_precision(self):
         """Test quantity validation and rounding to 4 decimals"""
@@ -216,15 +255,13 @@ class TestInventoryManagementWithUnits:
 
     def test_inventory_deduction_with_unit_conversion(self):
         """Test that selling in different unit deducts correct inventory"""
-        db = Mock()
-
         # Product stored in kg
         product = Mock(spec=Product)
         product.base_unit = "kg"
         product.inventory = Decimal("10.0000")  # 10 kg
 
         # Selling 500g should deduct 0.5kg
-        # Mock the unit conversion
+        # Units known to the registry
         kg_unit = Mock(spec=Unit)
         kg_unit.code = "kg"
         kg_unit.type = "weight"
@@ -235,10 +272,10 @@ class TestInventoryManagementWithUnits:
         g_unit.type = "weight"
         g_unit.base_multiplier = Decimal("0.001")
 
-        db.query.return_value.filter.return_value.first.side_effect = [g_unit, kg_unit]
+        registry = UnitRegistry.from_units([g_unit, kg_unit])
 
         # Convert 500g to kg
-        quantity_in_base = UnitService.convert(Decimal("500"), "g", "kg", db)
+        quantity_in_base = UnitService.convert(Decimal("500"), "g", "kg", registry)
         assert quantity_in_base == Decimal("0.5000")
 
         # Deduct from inventory
@@ -336,8 +373,6 @@ class TestUnitConversionEdgeCases:
 
     def test_convert_zero_quantity(self):
         """Test converting zero quantity"""
-        db = Mock()
-
         kg_unit = Mock(spec=Unit)
         kg_unit.code = "kg"
         kg_unit.type = "weight"
@@ -348,15 +383,13 @@ class TestUnitConversionEdgeCases:
         g_unit.type = "weight"
         g_unit.base_multiplier = Decimal("0.001")
 
-        db.query.return_value.filter.return_value.first.side_effect = [kg_unit, g_unit]
+        registry = UnitRegistry.from_units([kg_unit, g_unit])
 
-        result = UnitService.convert(Decimal("0"), "kg", "g", db)
+        result = UnitService.convert(Decimal("0"), "kg", "g", registry)
         assert result == Decimal("0.0000")
 
     def test_convert_very_small_quantity(self):
         """Test converting very small quantities with precision"""
-        db = Mock()
-
         kg_unit = Mock(spec=Unit)
         kg_unit.code = "kg"
         kg_unit.type = "weight"
@@ -367,19 +400,18 @@ class TestUnitConversionEdgeCases:
         mg_unit.type = "weight"
         mg_unit.base_multiplier = Decimal("0.000001")
 
-        db.query.return_value.filter.return_value.first.side_effect = [mg_unit, kg_unit]
+        registry = UnitRegistry.from_units([mg_unit, kg_unit])
 
         # 1 mg = 0.000001 kg
-        result = UnitService.convert(Decimal("1"), "mg", "kg", db)
+        result = UnitService.convert(Decimal("1"), "mg", "kg", registry)
         assert result == Decimal("0.0000")  # Rounded to 4 decimals
 
     def test_nonexistent_unit_code(self):
         """Test that nonexistent unit code raises error"""
-        db = Mock()
-        db.query.return_value.filter.return_value.first.return_value = None
+        registry = UnitRegistry.from_units([])
 
         with pytest.raises(ValueError, match="not found|Invalid units"):
-            UnitService.convert(Decimal("1"), "invalid", "kg", db)
+            UnitService.convert(Decimal("1"), "invalid", "kg", registry)
 
 
 if __name__ == "__main__":
@@ -15,6 +15,9 @@ const HistoryTab = () => {
     products,
     getTodayOrders,
     getOrders,
+    getOrdersPage,
+    getDailyReport,
+    exportOrders,
     updateOrder,
     deleteOrder,
     clearTodayOrders,
@@ -31,6 +34,8 @@ const HistoryTab = () => {
   const [actionLoading, setActionLoading] = useState(false);
   const [actionError, setActionError] = useState('');
   const [ordersLoading, setOrdersLoading] = useState(false);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [dateFilter, setDateFilter] = useState('today');
   const [customDate, setCustomDate] = useState('');
   const [selectedOrderIds, setSelectedOrderIds] = useState(new Set());
@@ -52,11 +57,15 @@ const HistoryTab = () => {
 
     setOrdersLoading(true);
     let fetchedOrders = [];
+    let cursor = null;
 
     if (dateFilter === 'today') {
       fetchedOrders = await getTodayOrders();
     } else if (dateFilter === 'all') {
-      fetchedOrders = await getOrders();
+      // All-time history is loaded a page at a time
+      const page = await getOrdersPage();
+      fetchedOrders = page.orders;
+      cursor = page.next_cursor;
     } else if (dateFilter === 'custom' && customDate) {
       fetchedOrders = await getOrders(customDate);
     } else {
@@ -68,9 +77,20 @@ const HistoryTab = () => {
     }
 
     setOrders(fetchedOrders || []);
+    setNextCursor(cursor);
     setOrdersLoading(false);
   };
 
+  const loadMoreOrders = async () => {
+    if (!nextCursor) return;
+
+    setLoadingMore(true);
+    const page = await getOrdersPage({ cursor: nextCursor });
+    setOrders((prev) => [...prev, ...page.orders]);
+    setNextCursor(page.next_cursor);
+    setLoadingMore(false);
+  };
+
   // Helper to calculate date for different filters
   const getDateForFilter = (filter) => {
     const today = new Date();
@@ -401,12 +421,23 @@ const HistoryTab = () => {
     }
   };
 
-  const handleExport = () => {
+  const handleExport = async () => {
     if (orders.length === 0) {
       alert('No orders to export');
       return;
     }
 
+    // Past days and the full history are exported by the server, which
+    // includes orders beyond the pages loaded here
+    if (dateFilter !== 'today') {
+      const day = dateFilter === 'custom' ? customDate : getDateForFilter(dateFilter);
+      const csv = await exportOrders('csv', day, day);
+      if (csv !== null) {
+        downloadCSV(csv, `orders-${day || 'all'}.csv`);
+        return;
+      }
+    }
+
     // Generate CSV
     const headers = [
       'Order ID',
@@ -440,12 +471,15 @@ const HistoryTab = () => {
       ...rows.map((row) => row.join(',')),
     ].join('\n');
 
-    // Download CSV
+    downloadCSV(csvContent, `orders-${new Date().toISOString().split('T')[0]}.csv`);
+  };
+
+  const downloadCSV = (csvContent, filename) => {
     const blob = new Blob([csvContent], { type: 'text/csv' });
     const url = window.URL.createObjectURL(blob);
     const a = document.createElement('a');
     a.href = url;
-    a.download = `orders-${new Date().toISOString().split('T')[0]}.csv`;
+    a.download = filename;
     a.click();
     window.URL.revokeObjectURL(url);
   };
@@ -456,6 +490,28 @@ const HistoryTab = () => {
       return;
     }
 
+    // Single days are summarized by the server; only the all-time view
+    // is summarized from the loaded orders
+    let summary = null;
+    const reportDate = dateFilter === 'custom' ? customDate : getDateForFilter(dateFilter);
+    if (dateFilter === 'today' || reportDate) {
+      summary = (await getDailyReport(reportDate || null, true))?.text;
+    }
+
+    if (!summary) {
+      summary = buildLocalSummary();
+    }
+
+    const success = await copyToClipboard(summary);
+
+    if (success) {
+      alert('Summary copied to clipboard! You can now paste it in your message.');
+    } else {
+      alert('Failed to copy summary. Please try again.');
+    }
+  };
+
+  const buildLocalSummary = () => {
     // Transform orders data to match the format expected by generateTextSummary
     const transformedOrders = orders.map(order => ({
       ...order,
@@ -470,14 +526,7 @@ const HistoryTab = () => {
       isEdited: order.is_edited,
     }));
 
-    const summary = generateTextSummary(store.name, transformedOrders, new Date(), currencySymbol);
-    const success = await copyToClipboard(summary);
-
-    if (success) {
-      alert('Summary copied to clipboard! You can now paste it in your message.');
-    } else {
-      alert('Failed to copy summary. Please try again.');
-    }
+    return generateTextSummary(store.name, transformedOrders, new Date(), currencySymbol);
   };
 
   const totalRevenue = orders.reduce((sum, order) => sum + parseFloat(order.total || 0), 0);
@@ -778,6 +827,15 @@ const HistoryTab = () => {
               </div>
             </div>
           ))}
+          {nextCursor && (
+            <button
+              className="btn-secondary load-more-btn"
+              onClick={loadMoreOrders}
+              disabled={loadingMore}
+            >
+              {loadingMore ? 'Loading...' : 'Load more orders'}
+            </button>
+          )}
         </div>
       )}
 
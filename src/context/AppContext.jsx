@@ -5,12 +5,26 @@
  * All operations are async and use the backend API
  */
 
-import { createContext, useContext, useState, useEffect } from 'react';
+import { createContext, useContext, useState, useEffect, useRef } from 'react';
 import api, { setCurrentStoreId, removeCurrentStoreId } from '../services/api';
 import { useAuth } from './AuthContext';
 
 const AppContext = createContext();
 
+/**
+ * Apply a sync delta to a list of rows: replace changed rows in place,
+ * append new ones and drop deleted ids
+ */
+const mergeDelta = (rows, changed, deletedIds) => {
+  const changedById = new Map(changed.map(row => [row.id, row]));
+  const deleted = new Set(deletedIds);
+  const merged = rows
+    .filter(row => !deleted.has(row.id))
+    .map(row => changedById.get(row.id) || row);
+  const known = new Set(rows.map(row => row.id));
+  return merged.concat(changed.filter(row => !known.has(row.id)));
+};
+
 export const useApp = () => {
   const context = useContext(AppContext);
   if (!context) {
@@ -32,6 +46,28 @@ export const AppProvider = ({ children }) => {
   const [loading, setLoading] = useState(false);
   const [error, setError] = useState(null);
 
+  // Sync cursor of the loaded catalog: { storeId, cursor }
+  const catalogCursor = useRef(null);
+
+  /**
+   * Load products and combos of a store; after the first load only what
+   * changed since is transferred
+   */
+  const syncCatalog = async (storeId) => {
+    const previous = catalogCursor.current;
+    const since = previous && previous.storeId === storeId ? previous.cursor : 0;
+    const delta = await api.sync(since, ['products', 'combos']);
+
+    if (delta.full) {
+      setProducts(delta.products);
+      setCombos(delta.combos);
+    } else {
+      setProducts(prev => mergeDelta(prev, delta.products, delta.deleted.product));
+      setCombos(prev => mergeDelta(prev, delta.combos, delta.deleted.combo));
+    }
+    catalogCursor.current = { storeId, cursor: delta.cursor };
+  };
+
   // Load initial data when user is authenticated
   useEffect(() => {
     if (isAuthenticated && user) {
@@ -58,13 +94,7 @@ export const AppProvider = ({ children }) => {
           setCurrentStoreId(storesData[0].id);
 
           // Load products and combos for the first store
-          const [productsData, combosData] = await Promise.all([
-            api.listProducts(),
-            api.listCombos(),
-          ]);
-
-          setProducts(productsData);
-          setCombos(combosData);
+          await syncCatalog(storesData[0].id);
         } else {
           setStore(null);
           removeCurrentStoreId();
@@ -104,6 +134,8 @@ export const AppProvider = ({ children }) => {
       const newStore = await api.createStore({
         name,
         track_inventory: trackInventory,
+        // Business days follow the device's timezone
+        timezone: Intl.DateTimeFormat().resolvedOptions().timeZone || 'UTC',
       });
 
       setStore(newStore);
@@ -192,12 +224,7 @@ export const AppProvider = ({ children }) => {
         // Load products and combos for the selected store
         setLoading(true);
         try {
-          const [productsData, combosData] = await Promise.all([
-            api.listProducts(),
-            api.listCombos(),
-          ]);
-          setProducts(productsData);
-          setCombos(combosData);
+          await syncCatalog(selectedStore.id);
         } catch (err) {
           console.error('Failed to load store data:', err);
         } finally {
@@ -285,12 +312,13 @@ export const AppProvider = ({ children }) => {
   };
 
   /**
-   * Reload products from backend
+   * Reload products from backend (only the ones that changed)
    */
   const reloadProducts = async () => {
+    if (!store) return;
+
     try {
-      const productsData = await api.listProducts();
-      setProducts(productsData);
+      await syncCatalog(store.id);
     } catch (err) {
       console.error('Failed to reload products:', err);
     }
@@ -517,6 +545,39 @@ export const AppProvider = ({ children }) => {
     }
   };
 
+  const exportOrders = async (format = 'csv', from = null, to = null) => {
+    if (!store) return null;
+
+    try {
+      return await api.exportOrders(format, from, to);
+    } catch (err) {
+      console.error('Failed to export orders:', err);
+      return null;
+    }
+  };
+
+  const getDailyReport = async (date = null, includeText = false) => {
+    if (!store) return null;
+
+    try {
+      return await api.getDailyReport(date, includeText);
+    } catch (err) {
+      console.error('Failed to get daily report:', err);
+      return null;
+    }
+  };
+
+  const getOrdersPage = async (options = {}) => {
+    if (!store) return { orders: [], next_cursor: null };
+
+    try {
+      return await api.listOrdersPage(options);
+    } catch (err) {
+      console.error('Failed to get orders:', err);
+      return { orders: [], next_cursor: null };
+    }
+  };
+
   const clearTodayOrders = async () => {
     if (!store) return { success: false, error: 'No store selected' };
 
@@ -624,6 +685,9 @@ export const AppProvider = ({ children }) => {
     deleteOrder,
     getTodayOrders,
     getOrders,
+    getOrdersPage,
+    getDailyReport,
+    exportOrders,
     clearTodayOrders,
     bulkUpdateOrderPayment,
 
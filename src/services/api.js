@@ -93,17 +93,13 @@ const removeCurrentCompanyId = () => {
 };
 
 /**
- * Make HTTP request with authentication
+ * Authentication and tenant headers for the current session
  */
-const request = async (endpoint, options = {}) => {
+const authHeaders = () => {
   const token = getToken();
   const storeId = getCurrentStoreId();
   const companyId = getCurrentCompanyId();
-
-  const headers = {
-    'Content-Type': 'application/json',
-    ...options.headers,
-  };
+  const headers = {};
 
   if (token) {
     headers['Authorization'] = `Bearer ${token}`;
@@ -117,6 +113,19 @@ const request = async (endpoint, options = {}) => {
     headers['X-Store-ID'] = storeId;
   }
 
+  return headers;
+};
+
+/**
+ * Make HTTP request with authentication
+ */
+const request = async (endpoint, options = {}) => {
+  const headers = {
+    'Content-Type': 'application/json',
+    ...options.headers,
+    ...authHeaders(),
+  };
+
   const config = {
     ...options,
     headers,
@@ -424,15 +433,54 @@ const api = {
     });
   },
 
+  // ============ Catalog ============
+
+  /**
+   * Get products, combos and their units in one call
+   *
+   * The browser revalidates it with the ETag, so an unchanged catalog
+   * costs an empty 304.
+   */
+  getCatalog: async () => {
+    return await request('/api/catalog');
+  },
+
   // ============ Orders ============
 
   /**
    * Create a new order
+   *
+   * The order id is generated here so that retries after a network error
+   * send the same id and the server returns the order it already created
+   * instead of recording the sale twice.
+   */
+  createOrder: async (data, retries = 2) => {
+    const body = JSON.stringify({ id: crypto.randomUUID(), ...data });
+    for (let attempt = 0; ; attempt++) {
+      try {
+        return await request('/api/orders', {
+          method: 'POST',
+          body,
+        });
+      } catch (error) {
+        if (error.status !== 0 || attempt >= retries) {
+          throw error;
+        }
+      }
+    }
+  },
+
+  /**
+   * Upload orders queued offline in one request
+   *
+   * Every order needs its client-generated `id`; resending a partially
+   * uploaded batch returns the orders already created as "replayed".
+   * Returns { total, created, replayed, failed, results: [{ index, id, status, order, error }] }
    */
-  createOrder: async (data) => {
-    return await request('/api/orders', {
+  createOrdersBatch: async (orders) => {
+    return await request('/api/orders/batch', {
       method: 'POST',
-      body: JSON.stringify(data),
+      body: JSON.stringify({ orders }),
     });
   },
 
@@ -444,6 +492,20 @@ const api = {
     return await request(`/api/orders${params}`);
   },
 
+  /**
+   * List one page of orders, newest first
+   * Pass the returned next_cursor as cursor to get the following page
+   */
+  listOrdersPage: async ({ limit = 50, cursor = null, isPaid = null, customer = null, dateFrom = null, dateTo = null } = {}) => {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.set('cursor', cursor);
+    if (isPaid !== null) params.set('is_paid', String(isPaid));
+    if (customer) params.set('customer', customer);
+    if (dateFrom) params.set('date_from', dateFrom);
+    if (dateTo) params.set('date_to', dateTo);
+    return await request(`/api/orders?${params}`);
+  },
+
   /**
    * List today's orders
    */
@@ -451,6 +513,63 @@ const api = {
     return await request('/api/orders/today');
   },
 
+  /**
+   * Follow the store's live order events
+   *
+   * Reads the server-sent event stream with fetch, as EventSource cannot
+   * send the auth headers. onEvent(type, data) gets "ready" and "resync"
+   * (refetch today's orders) and "order.created", "order.edited",
+   * "order.paid" and "order.deleted" ({ orders: [...] }). Reconnects after
+   * errors. Returns a function that stops listening.
+   */
+  subscribeOrderEvents: (onEvent) => {
+    const controller = new AbortController();
+
+    const listen = async () => {
+      const response = await fetch(`${API_BASE_URL}/api/orders/events`, {
+        headers: authHeaders(),
+        signal: controller.signal,
+      });
+      if (!response.ok) {
+        throw new APIError('Could not open order events', response.status, null);
+      }
+
+      const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+      let buffer = '';
+      for (;;) {
+        const { value, done } = await reader.read();
+        if (done) return;
+        buffer += value;
+        let end;
+        while ((end = buffer.indexOf('\n\n')) >= 0) {
+          const block = buffer.slice(0, end);
+          buffer = buffer.slice(end + 2);
+          let type = 'message';
+          let data = '';
+          for (const line of block.split('\n')) {
+            if (line.startsWith('event: ')) type = line.slice(7);
+            else if (line.startsWith('data: ')) data += line.slice(6);
+          }
+          if (data) onEvent(type, JSON.parse(data));
+        }
+      }
+    };
+
+    (async () => {
+      while (!controller.signal.aborted) {
+        try {
+          await listen();
+        } catch (error) {
+          if (controller.signal.aborted) return;
+          console.warn('Order events interrupted:', error);
+        }
+        await new Promise((resolve) => setTimeout(resolve, 3000));
+      }
+    })();
+
+    return () => controller.abort();
+  },
+
   /**
    * Get a specific order
    */
@@ -458,6 +577,22 @@ const api = {
     return await request(`/api/orders/${orderId}`);
   },
 
+  /**
+   * List an order's edits, newest first
+   */
+  getOrderHistory: async (orderId, { limit = 50, cursor = null } = {}) => {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.set('cursor', cursor);
+    return await request(`/api/orders/${orderId}/history?${params}`);
+  },
+
+  /**
+   * Get an order as it was after a given edit (0 = as created)
+   */
+  getOrderVersion: async (orderId, version) => {
+    return await request(`/api/orders/${orderId}/history/${version}`);
+  },
+
   /**
    * Update order
    */
@@ -490,6 +625,20 @@ const api = {
     });
   },
 
+  /**
+   * Set payment status of all orders of a customer and/or business day
+   */
+  bulkUpdateOrderPaymentByFilter: async ({ customerName = null, date = null }, isPaid) => {
+    return await request('/api/orders/bulk/update-payment', {
+      method: 'POST',
+      body: JSON.stringify({
+        customer_name: customerName,
+        date,
+        is_paid: isPaid,
+      }),
+    });
+  },
+
   // ============ Sessions ============
 
   /**
@@ -524,6 +673,65 @@ const api = {
     return await request('/api/customers/names');
   },
 
+  // ============ Exports ============
+
+  /**
+   * Export orders as CSV (one row per line) or NDJSON (one order per line)
+   * @param {string} format - 'csv' or 'ndjson'
+   * @param {string|null} from - First business day (YYYY-MM-DD), or null
+   * @param {string|null} to - Last business day (YYYY-MM-DD), or null
+   * Returns the file content as text
+   */
+  exportOrders: async (format = 'csv', from = null, to = null) => {
+    const params = new URLSearchParams({ format });
+    if (from) {
+      params.set('from', from);
+    }
+    if (to) {
+      params.set('to', to);
+    }
+    return await request(`/api/orders/export?${params}`);
+  },
+
+  // ============ Reports ============
+
+  /**
+   * Get the aggregated sales report of a business day
+   * @param {string|null} date - YYYY-MM-DD, or null for the current business day
+   * @param {boolean} includeText - Also return the ready-made text summary
+   */
+  getDailyReport: async (date = null, includeText = false) => {
+    const params = new URLSearchParams();
+    if (date) {
+      params.set('date', date);
+    }
+    if (includeText) {
+      params.set('include_text', 'true');
+    }
+    return await request(`/api/reports/daily?${params}`);
+  },
+
+  getRangeReport: async (from, to) => {
+    const params = new URLSearchParams({ from, to });
+    return await request(`/api/reports/range?${params}`);
+  },
+
+  // ============ Sync ============
+
+  /**
+   * Get what changed in the current store since a sync cursor
+   * @param {number} since - Cursor from the previous sync, 0 for everything
+   * @param {string[]} include - Sections to fetch (products, combos, orders, customer_names); all if null
+   * Returns { cursor, full, products, combos, orders, customer_names, deleted: { product, combo, order } }
+   */
+  sync: async (since = 0, include = null) => {
+    const params = new URLSearchParams({ since: String(since) });
+    if (include) {
+      params.set('include', include.join(','));
+    }
+    return await request(`/api/sync?${params}`);
+  },
+
   // ============ Units ============
 
   /**
@@ -554,6 +762,22 @@ const api = {
       }),
     });
   },
+
+  /**
+   * Convert many quantities in one request
+   */
+  convertUnitsBatch: async (conversions) => {
+    return await request('/api/units/convert/batch', {
+      method: 'POST',
+      body: JSON.stringify({
+        conversions: conversions.map(({ quantity, fromUnit, toUnit }) => ({
+          quantity: quantity.toString(),
+          from_unit: fromUnit,
+          to_unit: toUnit,
+        })),
+      }),
+    });
+  },
 };
 
 export default api;